@@ -11,14 +11,72 @@ DB_PATH = DATA_DIR / "etfmaster.db"
 
 # Railway가 DATABASE_URL 환경변수를 자동으로 설정하면 사용, 없으면 로컬 SQLite
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_PATH}")
+# DB 연결 pool (PostgreSQL 및 async engine). 끊긴 연결은 pre-ping으로 걸러낸다
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE_SECONDS = 1800
 
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY", "demo")
+# ETF ticker 목록 캐시. TTL 안에는 다시 받지 않고, 지나면 ETag/Last-Modified 조건부 요청
+TICKER_UNIVERSE_PATH = DATA_DIR / "ticker_universe.json"
+TICKER_UNIVERSE_TTL_HOURS = 12
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# OpenAI 호환 서버 주소 (비우면 api.openai.com). 로컬 테스트: scripts/mock_llm_server.py
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# 공유 LLM client의 최대 동시 연결 수
+LLM_MAX_CONNECTIONS = 20
+LLM_TIMEOUT_SECONDS = 60
+# 챗봇 프롬프트에 넣을 ETF 수 (대화와 관련된 ETF를 BM25 색인으로 선택)
+CHAT_CONTEXT_TOP_K = 40
+SEARCH_INDEX_DIR = DATA_DIR / "search_index"
 ADMIN_API_KEY = os.getenv("ADMIN_API_KEY", "")
 
+# 한 번에 수익률 계산/DB 저장하는 ticker 수
 BATCH_SIZE = 50
-BATCH_DELAY_SECONDS = 5
+# sync pipeline stage 사이 queue에 대기할 수 있는 최대 배치 수 (메모리 상한)
+SYNC_QUEUE_SIZE = 2
+
+# yfinance 요청 속도 상한 (전역 token bucket, 429 발생 시 자동 감속 후 회복)
+FETCH_RATE_LIMIT_PER_SEC = 2.0
+FETCH_WORKERS = 8
+FETCH_COOLDOWN_SECONDS = 30
+
+# 일별 가격 이력 저장소 (수익률 계산용, 증분 다운로드)
+PRICE_STORE_DIR = DATA_DIR / "prices"
+PRICE_HISTORY_DAYS = 365 * 5 + 30
+# 증분 다운로드 때 다시 받은 마지막 저장 bar의 종가가 이 비율 이상 다르면 분할/배당
+# 재조정(auto_adjust)으로 보고 그 ticker의 이력 전체를 다시 받는다
+PRICE_ADJUST_TOLERANCE = 1e-3
+# /api/etfs/compare에 한 번에 줄 수 있는 ticker 수
+COMPARE_MAX_TICKERS = 50
+# "비슷한 ETF" 색인: 최근 일별 수익률 상관계수 기준 상위 SIMILAR_TOP_K개를 미리 계산
+SIMILAR_LOOKBACK_DAYS = 365
+SIMILAR_TOP_K = 20
 
 SYNC_HOUR = 6
 SYNC_MINUTE = 0
+# 마지막 시도 후 이 시간이 지난 ticker만 다시 가져온다 (오래된 것부터). 가격에서 나오는
+# 수익률은 매번 갱신하고, .info는 아래 tier 간격이 지난 경우에만 조회한다
+SYNC_FRESHNESS_HOURS = 20
+# .info tier별 기본 조회 간격. 매일 돌아가는 sync 시각의 흔들림을 감안해 24h 단위보다 조금 짧게.
+# 조회했는데 값이 그대로면 간격을 두 배씩 늘리고 (최대 INFO_TTL_MAX_FACTOR배) 바뀌면 되돌린다
+STATIC_TTL_HOURS = 24 * 7 - 4
+FUNDAMENTALS_TTL_HOURS = 20
+INFO_TTL_MAX_FACTOR = 4
+# ETF가 아니라고 확인된 ticker는 이 기간 동안 다시 조회하지 않는다
+NON_ETF_RECHECK_HOURS = 24 * 7
+# .info tier 상태 (quoteType, tier별 content hash/확인 시각/간격)
+INFO_CACHE_DIR = DATA_DIR / "info_cache"
+# 중단된 실행을 이어서 진행할 수 있는 최대 기간
+SYNC_RESUME_MAX_AGE_HOURS = 48
+# 오래된 ticker / 중단된 실행을 따라잡는 주기
+STALE_SYNC_INTERVAL_HOURS = 6
 PRICE_UPDATE_INTERVAL_HOURS = 2
+
+# 외부(DB 직접 쓰기) 변경 여부를 확인하는 주기 — /api/etfs snapshot
+SNAPSHOT_PROBE_SECONDS = 300
+# /api/etfs 읽기 응답의 Cache-Control. 데이터는 sync/bulk-update 때만 바뀌므로
+# 짧게 fresh로 두고 그 뒤에는 ETag 재검증 동안 이전 응답을 쓸 수 있게 한다
+HTTP_CACHE_MAX_AGE = 60
+HTTP_CACHE_STALE_WHILE_REVALIDATE = 3600
@@ -1,7 +1,21 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
-from app.config import DATABASE_URL, DATA_DIR
+from app.config import DATABASE_URL, DATA_DIR, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_SECONDS, DB_POOL_SIZE
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+_POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+    "pool_pre_ping": True,
+}
 
 # SQLite 사용 시에만 디렉토리 생성
 if DATABASE_URL.startswith("sqlite"):
@@ -9,11 +23,44 @@ if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 else:
     # PostgreSQL 사용 시
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(DATABASE_URL, **_POOL_OPTIONS)
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
+def async_database_url(url: str) -> str:
+    """동기 URL을 async driver URL로 바꾼다 (aiosqlite / asyncpg)."""
+    scheme, sep, rest = url.partition("://")
+    driver = {
+        "sqlite": "sqlite+aiosqlite",
+        "postgres": "postgresql+asyncpg",
+        "postgresql": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+    }.get(scheme, scheme)
+    return f"{driver}{sep}{rest}"
+
+
+# async engine은 처음 사용할 때 만든다 (import도 여기서) — sync_and_push.py처럼 동기
+# 경로만 쓰는 곳은 greenlet/aiosqlite/asyncpg 없이도 동작한다
+_async_engine: AsyncEngine | None = None
+_async_session: async_sessionmaker[AsyncSession] | None = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine, _async_session
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        _async_engine = create_async_engine(async_database_url(DATABASE_URL), **_POOL_OPTIONS)
+        _async_session = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_session()
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -24,3 +71,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_session = None
@@ -0,0 +1,122 @@
+"""HTTP caching for the read-only ETF endpoints, tied to the snapshot data version.
+
+`/api/etfs`, `/api/etfs/filters`, `/api/etfs/{ticker}`의 응답은 모두 같은 ETF snapshot에서
+만들어지므로 snapshot 내용 hash를 ETag로, 내용이 마지막으로 바뀐 시각을 Last-Modified로
+쓴다. 압축된 응답은 표현이 다르므로 ETag에 "-br"/"-gzip"을 붙인다.
+
+snapshot의 외부 변경 확인 주기 안이면 If-None-Match / If-Modified-Since를 handler 호출
+없이 304로 응답하고, 그 밖에는 handler가 snapshot을 확인한 뒤 같은 검사를 한다.
+"""
+import re
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import HTTP_CACHE_MAX_AGE, HTTP_CACHE_STALE_WHILE_REVALIDATE
+from app.services.etf_snapshot import ETFSnapshot, current_snapshot
+
+# /api/etfs/compare는 snapshot이 아니라 price store에서 계산하므로 제외
+_CACHED_PATHS = re.compile(r"^/api/etfs(/(?!compare$)[^/]+)?$")
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+
+CACHE_CONTROL = f"public, max-age={HTTP_CACHE_MAX_AGE}, stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+
+
+def _etag(snapshot: ETFSnapshot, encoding: str | None = None) -> str:
+    return f'"{snapshot.etag}-{encoding}"' if encoding else f'"{snapshot.etag}"'
+
+
+def _last_modified(snapshot: ETFSnapshot) -> datetime:
+    # HTTP-date는 초 단위
+    return snapshot.modified_at.replace(microsecond=0)
+
+
+def _matching_etag(headers: Headers, snapshot: ETFSnapshot) -> str | None:
+    """If-None-Match 중 현재 data version과 같은 tag (없으면 None)."""
+    current = snapshot.etag
+    for tag in headers.get("if-none-match", "").split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == "*":
+            return _etag(snapshot)
+        value = tag.strip('"')
+        for suffix in _ENCODING_SUFFIXES:
+            value = value.removesuffix(suffix)
+        if value == current:
+            return tag
+    return None
+
+
+def _not_modified(headers: Headers, snapshot: ETFSnapshot) -> str | None:
+    """304로 응답할 수 있으면 돌려줄 ETag. If-None-Match가 있으면 If-Modified-Since는 무시."""
+    if "if-none-match" in headers:
+        return _matching_etag(headers, snapshot)
+    since = headers.get("if-modified-since")
+    if not since:
+        return None
+    try:
+        if _last_modified(snapshot) <= parsedate_to_datetime(since):
+            return _etag(snapshot)
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _set_validators(headers: MutableHeaders, snapshot: ETFSnapshot, etag: str) -> None:
+    headers["ETag"] = etag
+    headers["Last-Modified"] = format_datetime(_last_modified(snapshot), usegmt=True)
+    headers["Cache-Control"] = CACHE_CONTROL
+    if "accept-encoding" not in headers.get("vary", "").lower():
+        headers.add_vary_header("Accept-Encoding")
+
+
+class HTTPCacheMiddleware:
+    """ETF 읽기 endpoint에 ETag/Last-Modified/Cache-Control을 붙이고 조건부 GET에 304로 응답."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or not _CACHED_PATHS.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        snapshot = current_snapshot()
+        if snapshot is not None:
+            etag = _not_modified(request_headers, snapshot)
+            if etag is not None:
+                await self._send_not_modified(send, snapshot, etag)
+                return
+
+        before = current_snapshot(fresh_only=False)
+        not_modified = False
+
+        async def send_with_validators(message: Message) -> None:
+            nonlocal not_modified
+            if message["type"] == "http.response.start":
+                after = current_snapshot(fresh_only=False)
+                # 요청 도중 snapshot이 바뀌었으면 본문이 어느 version인지 알 수 없으므로 생략
+                if message["status"] != 200 or after is None or (before is not None and after is not before):
+                    await send(message)
+                    return
+                headers = MutableHeaders(scope=message)
+                matched = _not_modified(request_headers, after)
+                if matched is not None:
+                    not_modified = True
+                    await self._send_not_modified(send, after, matched)
+                    return
+                _set_validators(headers, after, _etag(after, headers.get("content-encoding")))
+                await send(message)
+            elif not not_modified:
+                await send(message)
+
+        await self.app(scope, receive, send_with_validators)
+
+    @staticmethod
+    async def _send_not_modified(send: Send, snapshot: ETFSnapshot, etag: str) -> None:
+        message: Message = {"type": "http.response.start", "status": 304, "headers": []}
+        _set_validators(MutableHeaders(scope=message), snapshot, etag)
+        await send(message)
+        await send({"type": "http.response.body", "body": b""})
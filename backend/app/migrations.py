@@ -0,0 +1,143 @@
+"""Minimal versioned schema migrations.
+
+create_all()은 없는 테이블만 만들고 기존 테이블의 index나 데이터는 바꾸지 않으므로,
+그런 변경은 여기에 버전 순서대로 추가한다. 적용된 버전은 schema_migrations 테이블에
+기록되고 시작 시 run_migrations()가 아직 적용되지 않은 것만 실행한다. 새 DB는
+create_all()이 모델 정의대로 만들기 때문에 각 migration은 이미 반영된 상태에서
+실행해도 안전해야 한다 (IF NOT EXISTS 등).
+"""
+import logging
+import warnings
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import (
+    Column, Connection, DateTime, Engine, Integer, MetaData, String, Table, delete, func, insert, inspect, select,
+    text, update,
+)
+from sqlalchemy.exc import IntegrityError, SAWarning
+from sqlalchemy.schema import CreateIndex
+
+from app.models.etf import ETF, FILTER_SORT_KEYS
+from app.models.sync import TickerSyncState
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(128), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, name: str):
+    def register(fn: Callable[[Connection], None]):
+        MIGRATIONS.append(Migration(version, name, fn))
+        return fn
+    return register
+
+
+def _create_index(conn: Connection, table: Table, name: str) -> None:
+    index = next(i for i in table.indexes if i.name == name)
+    # checkfirst는 식 index를 인식하지 못하므로 IF NOT EXISTS 사용 (SQLite/Postgres 모두 지원)
+    conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _normalize_ticker_rows(conn: Connection) -> None:
+    """etfs.ticker를 normalize_ticker와 같은 upper(trim(ticker))로 맞춘다 (다시 실행해도 안전).
+
+    정규화하면 같아지는 중복 row는 하나로 합친다. 이미 정규화된 row(없으면 id가 가장 작은
+    row)를 남기고, 컬럼마다 data_updated_at이 가장 최근인 row부터 NULL이 아닌 값을 쓴다
+    (etf_upsert의 COALESCE와 같은 규칙).
+    """
+    with warnings.catch_warnings():
+        # ix_etfs_ticker_upper 같은 식 index는 반영하지 못한다는 경고 (컬럼만 필요)
+        warnings.simplefilter("ignore", SAWarning)
+        etfs = Table("etfs", MetaData(), autoload_with=conn)
+    key = func.upper(func.trim(etfs.c.ticker))
+    merged_columns = [c for c in etfs.c if c.name not in ("id", "ticker", "created_at")]
+    duplicated = conn.scalars(select(key).group_by(key).having(func.count() > 1)).all()
+    for normalized in duplicated:
+        rows = conn.execute(select(etfs).where(key == normalized)).mappings().all()
+        keeper = min(rows, key=lambda r: (r["ticker"] != normalized, r["id"]))
+        newest_first = sorted(
+            sorted(rows, key=lambda r: r["id"]),
+            key=lambda r: (r["data_updated_at"] is not None, r["data_updated_at"]),
+            reverse=True,
+        )
+        values = {
+            c.name: next((r[c.name] for r in newest_first if r[c.name] is not None), None)
+            for c in merged_columns
+        }
+        conn.execute(delete(etfs).where(key == normalized, etfs.c.id != keeper["id"]))
+        conn.execute(update(etfs).where(etfs.c.id == keeper["id"]).values(**values))
+    conn.execute(update(etfs).where(etfs.c.ticker != key).values(ticker=key))
+    # freshness 기록은 다음 sync에서 다시 쌓이므로 정규화 대신 지운다
+    if inspect(conn).has_table(TickerSyncState.__tablename__):
+        conn.execute(text("DELETE FROM ticker_sync_state WHERE ticker <> upper(trim(ticker))"))
+
+
+@migration(1, "normalize tickers to upper case, index upper(ticker)")
+def _normalize_tickers(conn: Connection) -> None:
+    _normalize_ticker_rows(conn)
+    _create_index(conn, ETF.__table__, "ix_etfs_ticker_upper")
+
+
+@migration(2, "composite indexes for category/issuer filters and market_cap")
+def _filter_sort_indexes(conn: Connection) -> None:
+    names = [f"ix_etfs_{f}_{key}" for f in ("category", "issuer") for key in FILTER_SORT_KEYS]
+    for name in names + ["ix_etfs_market_cap_desc"]:
+        _create_index(conn, ETF.__table__, name)
+
+
+@migration(3, "etfs.delisted_at")
+def _add_delisted_at(conn: Connection) -> None:
+    if "delisted_at" not in {c["name"] for c in inspect(conn).get_columns("etfs")}:
+        conn.execute(text("ALTER TABLE etfs ADD COLUMN delisted_at TIMESTAMP"))
+
+
+@migration(4, "etfs.checked_at")
+def _add_checked_at(conn: Connection) -> None:
+    if "checked_at" not in {c["name"] for c in inspect(conn).get_columns("etfs")}:
+        conn.execute(text("ALTER TABLE etfs ADD COLUMN checked_at TIMESTAMP"))
+    # 지금까지는 data_updated_at이 확인 시각이었다
+    conn.execute(text("UPDATE etfs SET checked_at = data_updated_at WHERE checked_at IS NULL"))
+
+
+def run_migrations(bind: Engine) -> list[int]:
+    """아직 적용되지 않은 migration을 버전 순서대로 각각 한 트랜잭션으로 적용."""
+    _metadata.create_all(bind)
+    with bind.connect() as conn:
+        applied = set(conn.scalars(select(schema_migrations.c.version)))
+
+    done = []
+    for m in sorted(MIGRATIONS, key=lambda m: m.version):
+        if m.version in applied:
+            continue
+        try:
+            with bind.begin() as conn:
+                m.apply(conn)
+                conn.execute(insert(schema_migrations).values(
+                    version=m.version, name=m.name, applied_at=datetime.now(timezone.utc),
+                ))
+        except IntegrityError:
+            # 동시에 시작한 다른 프로세스가 먼저 적용
+            logger.info("Migration %d already applied by another process", m.version)
+            continue
+        logger.info("Applied migration %d: %s", m.version, m.name)
+        done.append(m.version)
+    return done
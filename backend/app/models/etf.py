@@ -1,11 +1,16 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import BigInteger, DateTime, Float, String
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, DateTime, Float, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
 from app.database import Base
 
 
+def normalize_ticker(ticker: str) -> str:
+    """저장되는 ticker는 항상 공백 없는 대문자."""
+    return ticker.strip().upper()
+
+
 class ETF(Base):
     __tablename__ = "etfs"
 
@@ -31,5 +36,27 @@ class ETF(Base):
     return_3y_avg: Mapped[float | None] = mapped_column(Float)
     return_5y: Mapped[float | None] = mapped_column(Float)
     return_5y_avg: Mapped[float | None] = mapped_column(Float)
+    # 마지막으로 값이 바뀐 시각 (sync는 바뀐 필드가 있는 row만 쓴다)
     data_updated_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # sync가 마지막으로 이 row를 확인한 시각 — 값이 그대로여도 갱신 (migration 4)
+    checked_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # ticker 목록에서 빠진 시각 (migration 3). 다시 나타나면 None으로 돌린다
+    delisted_at: Mapped[datetime | None] = mapped_column(DateTime)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    @validates("ticker")
+    def _normalize_ticker(self, key, value):
+        return normalize_ticker(value) if value else value
+
+
+# 정규화 이전 데이터나 외부 도구의 대소문자 무시 조회용 (migration 1)
+Index("ix_etfs_ticker_upper", func.upper(ETF.ticker))
+
+# category/issuer 필터 + 자주 쓰는 정렬 키 (migration 2). B-tree는 역방향으로도
+# 읽으므로 asc/desc 모두 같은 index를 쓴다.
+FILTER_SORT_KEYS = ("ticker", "market_cap", "expense_ratio", "dividend_yield", "return_1y")
+for _filter in ("category", "issuer"):
+    for _key in FILTER_SORT_KEYS:
+        Index(f"ix_etfs_{_filter}_{_key}", getattr(ETF, _filter), getattr(ETF, _key))
+# AUM 상위 ETF 조회 (챗봇 기본 context 등)
+Index("ix_etfs_market_cap_desc", ETF.market_cap.desc())
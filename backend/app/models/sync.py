@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, String, Text, case
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class SyncRun(Base):
+    """sync 실행 한 번의 상태. cursor까지 처리한 뒤 중단되면 다음 실행이 이어서 진행."""
+
+    __tablename__ = "sync_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    status: Mapped[str] = mapped_column(String(16), index=True, nullable=False)
+    # 이번 실행에서 처리할 ticker 목록 (JSON 배열, 처리 순서대로)
+    tickers: Mapped[str] = mapped_column(Text, nullable=False)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    cursor: Mapped[int] = mapped_column(Integer, default=0)
+    updated: Mapped[int] = mapped_column(Integer, default=0)
+    error_count: Mapped[int] = mapped_column(Integer, default=0)
+    message: Mapped[str | None] = mapped_column(String(256))
+    started_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    checkpoint_at: Mapped[datetime | None] = mapped_column(DateTime)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+
+class TickerSyncState(Base):
+    """ticker별 마지막 성공/실패 시각 — freshness 판단과 stalest-first 정렬에 사용."""
+
+    __tablename__ = "ticker_sync_state"
+
+    ticker: Mapped[str] = mapped_column(String(16), primary_key=True)
+    last_success_at: Mapped[datetime | None] = mapped_column(DateTime)
+    last_failure_at: Mapped[datetime | None] = mapped_column(DateTime)
+    failure_count: Mapped[int] = mapped_column(Integer, default=0)
+
+    @hybrid_property
+    def last_attempt_at(self) -> datetime | None:
+        attempts = [t for t in (self.last_success_at, self.last_failure_at) if t is not None]
+        return max(attempts) if attempts else None
+
+    @last_attempt_at.inplace.expression
+    @classmethod
+    def _last_attempt_at_expression(cls):
+        # greatest()는 SQLite에 없으므로 CASE로 (NULL이 아닌 쪽, 둘 다 있으면 큰 쪽)
+        return case(
+            (cls.last_failure_at.is_(None), cls.last_success_at),
+            (cls.last_success_at.is_(None), cls.last_failure_at),
+            (cls.last_success_at >= cls.last_failure_at, cls.last_success_at),
+            else_=cls.last_failure_at,
+        )
@@ -1,66 +1,116 @@
+import heapq
+import json
 import logging
+import time
+from dataclasses import dataclass, field
 
 from fastapi import APIRouter, Depends, HTTPException
-from openai import OpenAI
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.config import OPENAI_API_KEY
-from app.database import get_db
-from app.models.etf import ETF
-from app.schemas.chat import ChatRequest, ChatResponse
+from app.config import CHAT_CONTEXT_TOP_K, OPENAI_API_KEY, OPENAI_MODEL
+from app.database import get_async_db
+from app.schemas.chat import ChatMessage, ChatRequest, ChatResponse
+from app.services.etf_search_index import ensure_index, query_terms
+from app.services.etf_snapshot import get_snapshot_async
+from app.services.llm_client import get_client
+from app.services.metrics import API_SECONDS
 
 router = APIRouter(prefix="/api", tags=["chat"])
 logger = logging.getLogger(__name__)
 
 
-def _build_etf_context(db: Session) -> str:
-    """AUM 기준 상위 100개 ETF 데이터를 텍스트로 반환."""
-    etfs = (
-        db.query(ETF)
-        .filter(ETF.market_cap.isnot(None))
-        .order_by(ETF.market_cap.desc())
-        .limit(100)
-        .all()
-    )
-    if not etfs:
-        etfs = db.query(ETF).limit(100).all()
-
-    lines = []
-    for etf in etfs:
-        parts = [f"[{etf.ticker}]"]
-        if etf.name:
-            parts.append(etf.name)
-        if etf.category:
-            parts.append(f"카테고리:{etf.category}")
-        if etf.issuer:
-            parts.append(f"운용사:{etf.issuer}")
-        if etf.expense_ratio is not None:
-            parts.append(f"보수:{etf.expense_ratio:.2f}%")
-        if etf.dividend_yield is not None:
-            parts.append(f"배당:{etf.dividend_yield:.2f}%")
-        if etf.market_cap:
-            parts.append(f"AUM:${etf.market_cap // 1_000_000:,}M")
-        if etf.return_1y is not None:
-            parts.append(f"1Y:{etf.return_1y:+.1f}%")
-        if etf.return_3y_avg is not None:
-            parts.append(f"3Y연평균:{etf.return_3y_avg:+.1f}%")
-        lines.append(" | ".join(parts))
-
-    return "\n".join(lines)
+def _format_etf(etf: Row) -> str:
+    # etf는 snapshot의 Core row (ETFResponse와 같은 이름의 속성)
+    parts = [f"[{etf.ticker}]"]
+    if etf.name:
+        parts.append(etf.name)
+    if etf.category:
+        parts.append(f"카테고리:{etf.category}")
+    if etf.issuer:
+        parts.append(f"운용사:{etf.issuer}")
+    if etf.expense_ratio is not None:
+        parts.append(f"보수:{etf.expense_ratio:.2f}%")
+    if etf.dividend_yield is not None:
+        parts.append(f"배당:{etf.dividend_yield:.2f}%")
+    if etf.market_cap:
+        parts.append(f"AUM:${etf.market_cap // 1_000_000:,}M")
+    if etf.return_1y is not None:
+        parts.append(f"1Y:{etf.return_1y:+.1f}%")
+    if etf.return_3y_avg is not None:
+        parts.append(f"3Y연평균:{etf.return_3y_avg:+.1f}%")
+    return " | ".join(parts)
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, db: Session = Depends(get_db)):
-    if not OPENAI_API_KEY:
-        raise HTTPException(
-            status_code=500,
-            detail="OPENAI_API_KEY 환경변수가 설정되지 않았습니다.",
+@dataclass
+class _ContextCache:
+    """snapshot version별로 재사용하는 ticker 조회표, AUM 순위, 포맷된 줄."""
+
+    version: int
+    by_ticker: dict[str, Row]
+    largest: list[Row]
+    lines: dict[str, str] = field(default_factory=dict)
+
+    def line(self, etf: Row) -> str:
+        line = self.lines.get(etf.ticker)
+        if line is None:
+            line = self.lines[etf.ticker] = _format_etf(etf)
+        return line
+
+
+_context_cache: _ContextCache | None = None
+
+
+def _context_for(snapshot) -> _ContextCache:
+    global _context_cache
+    cache = _context_cache
+    if cache is None or cache.version != snapshot.version:
+        # 상장 폐지로 표시된 ETF는 추천 대상이 아니다
+        items = snapshot.listed
+        largest = heapq.nlargest(
+            CHAT_CONTEXT_TOP_K,
+            (e for e in items if e.market_cap is not None),
+            key=lambda e: e.market_cap,
+        )
+        cache = _ContextCache(
+            version=snapshot.version,
+            by_ticker={e.ticker: e for e in items},
+            largest=largest or items[:CHAT_CONTEXT_TOP_K],
         )
+        _context_cache = cache
+    return cache
+
+
+def _conversation_terms(messages: list[ChatMessage]) -> dict[str, float]:
+    """최근 사용자 메시지의 검색어 가중치. 마지막 질문을 이전 질문보다 두 배로 본다."""
+    weights: dict[str, float] = {}
+    user_messages = [m.content for m in messages if m.role == "user"]
+    for i, text in enumerate(reversed(user_messages[-3:])):
+        for term in query_terms(text):
+            weights[term] = weights.get(term, 0.0) + (1.0 if i == 0 else 0.5)
+    return weights
+
+
+def _build_etf_context(snapshot, messages: list[ChatMessage]) -> str:
+    """대화와 관련된 상위 CHAT_CONTEXT_TOP_K개 ETF 데이터를 텍스트로 반환.
 
-    etf_context = _build_etf_context(db)
+    관련 ETF가 부족하면 AUM 상위 ETF로 채운다.
+    """
+    cache = _context_for(snapshot)
+    index = ensure_index(snapshot)
+    found = index.search(_conversation_terms(messages), CHAT_CONTEXT_TOP_K)
+    selected = [cache.by_ticker[t] for t in found]
+    if len(selected) < CHAT_CONTEXT_TOP_K:
+        seen = set(found)
+        selected += [e for e in cache.largest if e.ticker not in seen][: CHAT_CONTEXT_TOP_K - len(selected)]
+    return "\n".join(cache.line(e) for e in selected)
 
-    system_prompt = f"""당신은 ETF Master 서비스의 미국 ETF 전문 투자 어드바이저입니다.
-아래는 현재 데이터베이스에서 자산 규모(AUM) 기준 상위 100개 ETF의 실시간 정보입니다.
+
+def _render_system_prompt(etf_context: str) -> str:
+    return f"""당신은 ETF Master 서비스의 미국 ETF 전문 투자 어드바이저입니다.
+아래는 현재 데이터베이스에서 사용자의 질문과 관련된 ETF(부족하면 자산 규모 상위 ETF)의 실시간 정보입니다.
 
 {etf_context}
 
@@ -71,19 +121,87 @@ async def chat(request: ChatRequest, db: Session = Depends(get_db)):
 - 한국어로 간결하게 답변하세요.
 - 데이터에 없는 ETF를 언급할 때는 "현재 DB에 해당 ETF 정보가 없을 수 있습니다"라고 안내하세요."""
 
+
+def _system_prompt(snapshot, messages: list[ChatMessage]) -> str:
+    return _render_system_prompt(_build_etf_context(snapshot, messages))
+
+
+async def _build_messages(request: ChatRequest, db: AsyncSession) -> list[dict]:
+    if not OPENAI_API_KEY:
+        raise HTTPException(
+            status_code=500,
+            detail="OPENAI_API_KEY 환경변수가 설정되지 않았습니다.",
+        )
+
+    with API_SECONDS.time(endpoint="chat", phase="context"):
+        snapshot = await get_snapshot_async(db)
+        # 검색 색인을 처음 만들거나 디스크에서 읽을 수 있으므로 thread에서 실행
+        system_prompt = await run_in_threadpool(_system_prompt, snapshot, request.messages)
+
     messages = [{"role": "system", "content": system_prompt}]
     for msg in request.messages:
         messages.append({"role": msg.role, "content": msg.content})
+    return messages
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
+    messages = await _build_messages(request, db)
+    try:
+        with API_SECONDS.time(endpoint="chat", phase="llm"):
+            response = await get_client().chat.completions.create(
+                model=OPENAI_MODEL,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=1000,
+            )
+        return ChatResponse(message=response.choices[0].message.content)
+    except Exception as e:
+        logger.error("OpenAI API 오류: %s", e)
+        raise HTTPException(status_code=500, detail=f"AI 응답 오류: {e}")
+
+
+def _sse(data: dict, event: str | None = None) -> str:
+    payload = json.dumps(data, ensure_ascii=False)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
 
+async def _stream_reply(messages: list[dict]):
+    """token 단위 `data: {"delta": ...}` 이벤트, 끝나면 `event: done`, 실패 시 `event: error`."""
+    started = time.perf_counter()
+    first_token = True
     try:
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
+        stream = await get_client().chat.completions.create(
+            model=OPENAI_MODEL,
             messages=messages,
             temperature=0.7,
             max_tokens=1000,
+            stream=True,
         )
-        return ChatResponse(message=response.choices[0].message.content)
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            if first_token:
+                API_SECONDS.observe(time.perf_counter() - started, endpoint="chat_stream", phase="first_token")
+                first_token = False
+            yield _sse({"delta": delta})
     except Exception as e:
         logger.error("OpenAI API 오류: %s", e)
-        raise HTTPException(status_code=500, detail=f"AI 응답 오류: {e}")
+        yield _sse({"detail": f"AI 응답 오류: {e}"}, event="error")
+        return
+    API_SECONDS.observe(time.perf_counter() - started, endpoint="chat_stream", phase="llm")
+    yield _sse({}, event="done")
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, db: AsyncSession = Depends(get_async_db)):
+    """/api/chat의 Server-Sent Events 버전. 생성되는 대로 token을 보낸다."""
+    messages = await _build_messages(request, db)
+    return StreamingResponse(
+        _stream_reply(messages),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
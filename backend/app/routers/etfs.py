@@ -2,17 +2,25 @@ import asyncio
 from datetime import datetime
 from typing import Any, Literal
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.config import ADMIN_API_KEY
-from app.database import get_db
-from app.models.etf import ETF
-from app.schemas.etf import ETFListResponse, ETFResponse, FilterOptions, SyncStatus
-from app.services.etf_sync_service import run_full_sync
-
-_ETF_FIELDS = {c.key for c in ETF.__table__.columns} - {"id", "created_at"}
+from app.config import ADMIN_API_KEY, COMPARE_MAX_TICKERS, HTTP_CACHE_MAX_AGE, SIMILAR_LOOKBACK_DAYS, SIMILAR_TOP_K
+from app.database import get_async_db, get_db
+from app.models.etf import ETF, normalize_ticker
+from app.schemas.etf import (
+    CompareResponse, ETFColumnarResponse, ETFListResponse, ETFResponse, FilterOptions, PriceHistoryResponse,
+    SimilarETF, SimilarResponse, SyncProgress, SyncStatus,
+)
+from app.services.etf_compare import render_comparison, similarity_build_error, similarity_index
+from app.services.etf_snapshot import LIST_FIELDS, EncodedBody, get_snapshot_async, refresh_snapshot
+from app.services.etf_sync_service import run_full_sync, sync_status
+from app.services.etf_screen import InvalidScreen, parse_where
+from app.services.etf_table import InvalidCursor
+from app.services.etf_upsert import bulk_upsert_etfs
+from app.services.metrics import API_SECONDS
+from app.services.price_history import render_history
 
 router = APIRouter(prefix="/api")
 
@@ -39,8 +47,50 @@ SORT_COLUMNS = {
 }
 
 
-@router.get("/etfs", response_model=ETFListResponse)
-def list_etfs(
+def _accepted_encodings(request: Request) -> set[str]:
+    accepted = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        name, _, q = params.strip().partition("=")
+        try:
+            if name.strip() == "q" and float(q) == 0:
+                continue
+        except ValueError:
+            pass
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...] | None:
+    """쉼표로 구분한 필드 목록 (요청 순서 유지, 중복 제거). 알 수 없는 필드는 400."""
+    if not fields:
+        return None
+    names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in names if f not in LIST_FIELDS]
+    if unknown or not names:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown) or fields}")
+    return names
+
+
+def _encoded_response(request: Request, body: EncodedBody) -> Response:
+    """미리 직렬화/압축된 응답 (ETag/304는 HTTPCacheMiddleware가 처리)."""
+    headers = {"Vary": "Accept-Encoding"}
+    accepted = _accepted_encodings(request)
+    if body.br is not None and "br" in accepted:
+        headers["Content-Encoding"] = "br"
+        content = body.br
+    elif "gzip" in accepted:
+        headers["Content-Encoding"] = "gzip"
+        content = body.gzip
+    else:
+        content = body.identity
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+@router.get("/etfs", response_model=ETFListResponse | ETFColumnarResponse)
+async def list_etfs(
+    request: Request,
     sort_by: str = Query("ticker", enum=list(SORT_COLUMNS.keys())),
     sort_dir: Literal["asc", "desc"] = Query("asc"),
     search: str | None = Query(None),
@@ -48,51 +98,189 @@ def list_etfs(
     issuer: str | None = Query(None),
     page: int = Query(1, ge=1),
     per_page: int = Query(0, ge=0, le=5000),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None, description="cursor 페이지 모드. 첫 페이지는 빈 값, 이후 next_cursor"),
+    fields: str | None = Query(None, description="응답에 담을 필드 (쉼표로 구분). 기본은 전체"),
+    format: Literal["json", "columnar"] = Query("json", description="columnar: {columns, rows, total}"),
+    where: list[str] | None = Query(
+        None, description="숫자 범위 조건. 여러 번 주면 AND, 값 안의 `,`는 AND, `|`는 OR (예: expense_ratio<0.2,market_cap>1B)",
+    ),
+    include_delisted: bool = Query(False, description="상장 폐지로 표시된 ETF도 포함"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    q = db.query(ETF)
+    selected = _parse_fields(fields)
+    try:
+        screen = parse_where(where)
+    except InvalidScreen as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    columnar = format == "columnar"
+    projected = selected is not None or columnar
+    selected = selected or LIST_FIELDS
 
-    if search:
-        term = f"%{search}%"
-        q = q.filter((ETF.ticker.ilike(term)) | (ETF.name.ilike(term)))
+    with API_SECONDS.time(endpoint="list_etfs", phase="query"):
+        snapshot = await get_snapshot_async(db)
 
-    if category:
-        q = q.filter(ETF.category == category)
-    if issuer:
-        q = q.filter(ETF.issuer == issuer)
+        if cursor is not None:
+            try:
+                rows, total, next_cursor = snapshot.table.query_after(
+                    sort_by=sort_by,
+                    sort_dir=sort_dir,
+                    cursor=cursor,
+                    search=search,
+                    category=category,
+                    issuer=issuer,
+                    limit=per_page or 100,
+                    screen=screen,
+                    include_delisted=include_delisted,
+                )
+            except InvalidCursor:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            if projected:
+                content = snapshot.render_projection(rows, total, selected, columnar, next_cursor, cursor_mode=True)
+            else:
+                content = snapshot.render_list(rows, total, next_cursor, cursor_mode=True)
+            return Response(content=content, media_type="application/json")
 
-    total = q.count()
+        # 프론트엔드의 전체 목록 요청은 미리 압축된 응답을 그대로 반환
+        if (
+            per_page == 0 and not (search or category or issuer or screen or include_delisted)
+            and sort_by == "ticker" and sort_dir == "asc"
+        ):
+            if not projected:
+                return _encoded_response(request, snapshot.full_list)
+            # 필드 조합별 첫 요청만 직렬화/압축 (event loop를 막지 않도록 thread에서)
+            body = await asyncio.to_thread(snapshot.projected_full_list, selected, columnar)
+            return _encoded_response(request, body)
 
-    col = SORT_COLUMNS.get(sort_by, ETF.ticker)
-    order = col.desc() if sort_dir == "desc" else col.asc()
-    q = q.order_by(order)
+        rows, total = snapshot.table.query(
+            sort_by=sort_by,
+            sort_dir=sort_dir,
+            search=search,
+            category=category,
+            issuer=issuer,
+            offset=(page - 1) * per_page if per_page > 0 else 0,
+            limit=per_page if per_page > 0 else None,
+            screen=screen,
+            include_delisted=include_delisted,
+        )
+    with API_SECONDS.time(endpoint="list_etfs", phase="serialize"):
+        if projected:
+            content = snapshot.render_projection(rows, total, selected, columnar)
+        else:
+            content = snapshot.render_list(rows, total)
+    return Response(content=content, media_type="application/json")
 
-    if per_page > 0:
-        q = q.offset((page - 1) * per_page).limit(per_page)
 
-    items = [ETFResponse.model_validate(e) for e in q.all()]
-    return ETFListResponse(items=items, total=total)
+@router.get("/etfs/filters", response_model=FilterOptions)
+async def get_filters(
+    request: Request,
+    search: str | None = Query(None),
+    category: str | None = Query(None),
+    issuer: str | None = Query(None),
+    include_delisted: bool = Query(False, description="상장 폐지로 표시된 ETF도 포함"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """category/issuer 목록과 값별 ETF 수. snapshot의 facet index에서 응답 (DB 조회 없음).
 
+    search/category/issuer를 주면 건수를 그 조건으로 센다. 각 facet에는 자기 자신의
+    선택은 적용하지 않으므로 category를 골라도 다른 category들의 건수가 남는다.
+    """
+    snapshot = await get_snapshot_async(db)
+    if not (search or category or issuer or include_delisted):
+        return _encoded_response(request, snapshot.filters)
+    content = snapshot.render_filters(search, category, issuer, include_delisted)
+    return Response(content=content, media_type="application/json")
 
-@router.get("/etfs/filters", response_model=FilterOptions)
-def get_filters(db: Session = Depends(get_db)):
-    categories = [
-        r[0]
-        for r in db.query(ETF.category).filter(ETF.category.isnot(None)).distinct().order_by(ETF.category).all()
-    ]
-    issuers = [
-        r[0]
-        for r in db.query(ETF.issuer).filter(ETF.issuer.isnot(None)).distinct().order_by(ETF.issuer).all()
-    ]
-    return FilterOptions(categories=categories, issuers=issuers)
+
+@router.get("/etfs/compare", response_model=CompareResponse)
+def compare_etfs(
+    tickers: str = Query(..., description=f"비교할 ticker (쉼표로 구분, 최대 {COMPARE_MAX_TICKERS}개)"),
+    benchmark: str = Query("SPY"),
+    range_: Literal["1m", "3m", "6m", "ytd", "1y", "3y", "5y", "max"] = Query("1y", alias="range"),
+    points: int = Query(300, ge=10, le=2000, description="누적 수익률 series의 최대 점 수"),
+):
+    """누적 수익률 series, 상관계수 행렬, benchmark 대비 beta/tracking difference/tracking error.
+
+    로컬 price store에서 계산하며 yfinance는 호출하지 않는다.
+    """
+    names = list(dict.fromkeys(normalize_ticker(t) for t in tickers.split(",") if t.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="No tickers")
+    if len(names) > COMPARE_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"Too many tickers (max {COMPARE_MAX_TICKERS})")
+    with API_SECONDS.time(endpoint="compare", phase="query"):
+        content = render_comparison(names, normalize_ticker(benchmark), range_, points)
+    if content is None:
+        raise HTTPException(status_code=404, detail="No price history")
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}"},
+    )
 
 
 @router.get("/etfs/{ticker}", response_model=ETFResponse | None)
-def get_etf(ticker: str, db: Session = Depends(get_db)):
-    etf = db.query(ETF).filter(func.upper(ETF.ticker) == ticker.upper()).first()
-    if not etf:
-        return None
-    return ETFResponse.model_validate(etf)
+async def get_etf(ticker: str, db: AsyncSession = Depends(get_async_db)):
+    """snapshot의 ticker 조회표에서 미리 직렬화된 row를 바로 반환 (DB 조회 없음)."""
+    snapshot = await get_snapshot_async(db)
+    row = snapshot.by_ticker.get(normalize_ticker(ticker))
+    content = snapshot.rows_json[row] if row is not None else b"null"
+    return Response(content=content, media_type="application/json")
+
+
+@router.get("/etfs/{ticker}/history", response_model=PriceHistoryResponse)
+def get_history(
+    ticker: str,
+    range_: Literal["1m", "3m", "6m", "ytd", "1y", "3y", "5y", "max"] = Query("1y", alias="range"),
+    resolution: Literal["auto", "1d", "1w", "1mo"] = Query("auto", description="auto: points개로 줄임"),
+    kind: Literal["line", "ohlc"] = Query("line"),
+    points: int = Query(300, ge=10, le=2000, description="resolution=auto일 때 최대 점 수"),
+):
+    """로컬 price store의 일봉을 서버에서 줄여 반환 (yfinance 호출 없음).
+
+    line은 LTTB로 모양을 유지하며 점을 고르고, ohlc는 구간별 open/high/low/close/volume.
+    """
+    with API_SECONDS.time(endpoint="history", phase="query"):
+        content = render_history(normalize_ticker(ticker), range_, resolution, kind, points)
+    if content is None:
+        raise HTTPException(status_code=404, detail="No price history")
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}"},
+    )
+
+
+@router.get("/etfs/{ticker}/similar", response_model=SimilarResponse)
+async def get_similar(
+    ticker: str,
+    limit: int = Query(10, ge=1, le=SIMILAR_TOP_K),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """최근 일별 수익률 상관계수가 가장 높은 ETF (미리 계산한 색인에서 조회).
+
+    색인은 sync 후 또는 백그라운드에서 만든다. 아직 없으면 503 (build가 실패했으면 그 이유).
+    """
+    snapshot = await get_snapshot_async(db)
+    with API_SECONDS.time(endpoint="similar", phase="query"):
+        index = similarity_index(snapshot)
+        if index is None:
+            error = similarity_build_error()
+            detail = f"Similarity index build failed: {error}" if error else "Similarity index is being built"
+            raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "30"})
+        similar = index.similar(normalize_ticker(ticker), limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Not enough price history")
+    items = []
+    for t, correlation in similar:
+        row = snapshot.by_ticker.get(t)
+        e = snapshot.items[row] if row is not None else None
+        items.append(SimilarETF(
+            ticker=t,
+            name=e.name if e else None,
+            category=e.category if e else None,
+            correlation=round(correlation, 4),
+        ))
+    return SimilarResponse(ticker=normalize_ticker(ticker), lookback_days=SIMILAR_LOOKBACK_DAYS, items=items)
 
 
 @router.post("/admin/sync", response_model=SyncStatus)
@@ -101,6 +289,11 @@ async def trigger_sync():
     return SyncStatus(status="started", message="Sync started in background")
 
 
+@router.get("/admin/sync/status", response_model=SyncProgress)
+def get_sync_status():
+    return sync_status()
+
+
 @router.post("/admin/bulk-update")
 def bulk_update_etfs(
     payload: list[dict[str, Any]],
@@ -110,24 +303,21 @@ def bulk_update_etfs(
     if not ADMIN_API_KEY or x_admin_key != ADMIN_API_KEY:
         raise HTTPException(status_code=403, detail="Invalid admin key")
 
-    updated = 0
-    for raw in payload:
-        # 허용된 컬럼만 추출
-        data = {k: v for k, v in raw.items() if k in _ETF_FIELDS}
-        if "ticker" not in data:
-            continue
+    records = []
+    for i, raw in enumerate(payload):
+        ticker = raw.get("ticker")
+        if not isinstance(ticker, str) or not ticker.strip():
+            raise HTTPException(status_code=422, detail=f"Item {i}: ticker must be a non-empty string")
         # datetime 문자열 파싱
-        if isinstance(data.get("data_updated_at"), str):
-            data["data_updated_at"] = datetime.fromisoformat(data["data_updated_at"])
-
-        etf = db.query(ETF).filter(ETF.ticker == data["ticker"]).first()
-        if etf:
-            for k, v in data.items():
-                if v is not None:
-                    setattr(etf, k, v)
-        else:
-            db.add(ETF(**data))
-        updated += 1
+        if isinstance(raw.get("data_updated_at"), str):
+            try:
+                raw = {**raw, "data_updated_at": datetime.fromisoformat(raw["data_updated_at"])}
+            except ValueError:
+                raise HTTPException(status_code=422, detail=f"Item {i}: invalid data_updated_at") from None
+        records.append(raw)
 
+    result = bulk_upsert_etfs(db, records)
     db.commit()
-    return {"updated": updated}
+    refresh_snapshot(db)
+    # "updated"는 기존 클라이언트 호환을 위해 처리 건수 전체를 의미
+    return {"updated": result.total, "inserted": result.inserted, "existing": result.updated}
@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from typing import Any
 
 from pydantic import BaseModel, field_serializer
 
@@ -42,13 +43,95 @@ class ETFResponse(BaseModel):
 class ETFListResponse(BaseModel):
     items: list[ETFResponse]
     total: int
+    # cursor 모드(`cursor` 파라미터 사용)에서만 포함. 마지막 페이지면 null
+    next_cursor: str | None = None
+
+
+class ETFColumnarResponse(BaseModel):
+    """`format=columnar` 목록 응답. rows의 각 값은 columns와 같은 순서."""
+
+    columns: list[str]
+    rows: list[list[Any]]
+    total: int
+    next_cursor: str | None = None
+
+
+class PriceHistoryResponse(BaseModel):
+    """`/api/etfs/{ticker}/history`. 값 배열은 dates와 같은 길이 (ohlc가 아니면 close만)."""
+
+    ticker: str
+    range: str
+    resolution: str
+    kind: str
+    bars: int  # 기간 안의 일봉 수 (줄이기 전)
+    dates: list[str]
+    open: list[float | None] | None = None
+    high: list[float | None] | None = None
+    low: list[float | None] | None = None
+    close: list[float | None]
+    volume: list[int | None] | None = None
+
+
+class CompareResponse(BaseModel):
+    """`/api/etfs/compare`. 목록 값은 모두 tickers 순서 (correlation은 tickers × tickers)."""
+
+    tickers: list[str]  # 가격 기록이 있는 ticker (benchmark 포함)
+    missing: list[str]
+    benchmark: str | None = None  # 가격 기록이 없으면 null
+    range: str
+    dates: list[str]
+    series: list[list[float | None]]  # 누적 수익률 (%), dates와 같은 길이
+    total_return: list[float | None]
+    correlation: list[list[float | None]]  # 일별 수익률 상관계수
+    beta: list[float | None]
+    tracking_difference: list[float | None]  # benchmark 대비 총수익률 차이 (%p)
+    tracking_error: list[float | None]  # 연율화한 일별 수익률 차이의 표준편차 (%)
+
+
+class SimilarETF(BaseModel):
+    ticker: str
+    name: str | None = None
+    category: str | None = None
+    correlation: float
+
+
+class SimilarResponse(BaseModel):
+    ticker: str
+    lookback_days: int
+    items: list[SimilarETF]
 
 
 class FilterOptions(BaseModel):
     categories: list[str]
     issuers: list[str]
+    # 값별 ETF 수 (0건인 값은 생략). search/category/issuer 조건이 있으면 그 조건 기준
+    category_counts: dict[str, int] = {}
+    issuer_counts: dict[str, int] = {}
 
 
 class SyncStatus(BaseModel):
     status: str
     message: str
+
+
+class SyncRunInfo(BaseModel):
+    model_config = {"from_attributes": True}
+
+    id: int
+    status: str
+    total: int
+    cursor: int
+    updated: int
+    error_count: int
+    message: str | None = None
+    started_at: datetime
+    checkpoint_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class SyncProgress(BaseModel):
+    running: bool
+    current: SyncRunInfo | None = None
+    last: SyncRunInfo | None = None
+    pipeline: list[dict] | None = None
+    fetch: dict | None = None
@@ -0,0 +1,401 @@
+"""Cross-ETF comparison and "similar ETFs" from the local price store.
+
+`/api/etfs/compare`: 요청한 ticker와 benchmark의 종가를 dates × tickers 행렬로 맞추고,
+쌍마다 그 두 ticker가 모두 값이 있는 날짜만으로 낸 수익률의 관측 수/공분산/분산을 구한다
+(대부분의 쌍은 ticker별 직전 bar 대비 수익률 행렬의 행렬곱 한 번, 거래일이 어긋나는 쌍만
+따로 계산). 그래서 쌍별 통계는 함께 요청한 다른 ticker와 무관하고, (기간, a, b와 두
+가격 파일의 price_store.stamp())로 LRU 캐시해 이미 본 쌍만으로 이루어진 비교는 계산을 생략한다. 상관계수,
+benchmark 대비 beta와 tracking error는 이 쌍별 통계에서 나온다.
+
+`/api/etfs/{ticker}/similar`: 전체 ETF의 최근 SIMILAR_LOOKBACK_DAYS 일별 수익률을
+표준화한 행렬에서 블록 단위 행렬곱으로 ticker마다 상관계수 상위 SIMILAR_TOP_K개를 미리
+계산해 둔다. 색인은 (가격 파일 stamp, 상장 중인 ticker 목록)이 바뀌었을 때만 다시
+만들며 (sync 후 미리 생성), 요청 경로에서는 만들지 않고 백그라운드로 넘긴다. 요청
+경로의 stamp 확인은 SNAPSHOT_PROBE_SECONDS마다 한 번이다.
+"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.config import SIMILAR_LOOKBACK_DAYS, SIMILAR_TOP_K, SNAPSHOT_PROBE_SECONDS
+from app.services import price_store
+from app.services.etf_encoder import render_json_fast
+from app.services.price_history import range_start
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+# 상관계수/beta를 내는 최소 공통 관측 수
+MIN_OVERLAP = 20
+# 유사도 색인에 넣을 최소 수익률 관측 비율 (상장한 지 얼마 안 된 ETF 제외)
+SIMILAR_MIN_COVERAGE = 0.8
+
+_PAIR_CACHE_SIZE = 50_000
+_BLOCK = 512
+
+_pairs: OrderedDict[tuple, tuple[float, float, float, float]] = OrderedDict()
+_pairs_lock = threading.Lock()
+
+
+def _aligned_closes(tickers: list[str], range_: str | None) -> tuple[np.ndarray, np.ndarray]:
+    """(days, closes): ticker들의 날짜 합집합 × tickers 종가 행렬 (없는 값은 NaN).
+
+    range_가 있으면 가장 최근 bar 날짜를 기준으로 자른다.
+    """
+    bars = []
+    for t in tickers:
+        b = price_store.load(t)
+        bars.append(b[np.isfinite(b["close"])])
+    present = [b for b in bars if len(b)]
+    if not present:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(tickers)))
+    start = range_start(max(int(b["date"][-1]) for b in present), range_) if range_ else None
+    if start is not None:
+        bars = [b[np.searchsorted(b["date"], start, side="left"):] for b in bars]
+    days = np.unique(np.concatenate([b["date"] for b in bars])).astype(np.int64)
+    closes = np.full((len(days), len(tickers)), np.nan)
+    for j, b in enumerate(bars):
+        closes[np.searchsorted(days, b["date"]), j] = b["close"]
+    return days, closes
+
+
+def _daily_returns(closes: np.ndarray) -> np.ndarray:
+    # 전날 또는 당일 값이 없으면 NaN
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return closes[1:] / closes[:-1] - 1
+
+
+def _pair_moments(returns: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(n, cov, var). 모두 tickers × tickers이고 [i, j]는 i와 j가 모두 값이 있는 날 기준.
+
+    var[i, j]는 그 날들에서 i의 분산 (var[j, i]가 j의 분산).
+    """
+    valid = np.isfinite(returns)
+    x = np.where(valid, returns, 0.0)
+    m = valid.astype(np.float64)
+    n = m.T @ m
+    sx = x.T @ m  # [i, j] = Σ x_i (j도 값이 있는 날)
+    sxx = (x * x).T @ m
+    sxy = x.T @ x
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = (sxy - sx * sx.T / n) / (n - 1)
+        var = (sxx - sx * sx / n) / (n - 1)
+    return n, cov, var
+
+
+def _aligned_moments(closes: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_pair_moments와 같은 형태지만 쌍마다 두 ticker가 모두 값이 있는 날짜만으로 수익률을 낸다.
+
+    각 ticker의 직전 bar 대비 수익률로 행렬곱을 한 뒤, 어떤 공통 날짜에서 두 ticker의 직전
+    bar가 다른 쌍(거래일이 어긋남)만 그 쌍의 공통 날짜로 다시 계산한다.
+    """
+    size = closes.shape[1]
+    valid = np.isfinite(closes)
+    rows = np.arange(len(closes))[:, None]
+    last = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    prev = np.vstack([np.full((1, size), -1), last[:-1]])
+    has_return = valid & (prev >= 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.where(has_return, closes / closes[np.maximum(prev, 0), np.arange(size)] - 1, np.nan)
+    n, cov, var = _pair_moments(returns)
+
+    skewed = np.zeros((size, size), dtype=bool)
+    for i in range(size):
+        both = has_return[:, i:i + 1] & has_return[:, i + 1:]
+        skewed[i, i + 1:] = (both & (prev[:, i:i + 1] != prev[:, i + 1:])).any(axis=0)
+    skewed |= skewed.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # 한쪽(k)의 날짜에 다른 쪽 값이 모두 있으면 공통 날짜 = k의 날짜 → k마다 한 번에 계산
+        for k in np.flatnonzero(skewed.any(axis=1)):
+            on_k = np.flatnonzero(valid[:, k])
+            others = np.flatnonzero(skewed[k])
+            others = others[valid[np.ix_(on_k, others)].all(axis=0)]
+            if not len(others) or len(on_k) < 3:
+                continue
+            sub = closes[np.ix_(on_k, np.append(k, others))]
+            r = sub[1:] / sub[:-1] - 1
+            r -= r.mean(axis=0)
+            moments = r[:, 0] @ r / (len(r) - 1)
+            n[k, others] = n[others, k] = len(r)
+            cov[k, others] = cov[others, k] = moments[1:]
+            var[k, others] = moments[0]
+            var[others, k] = (r[:, 1:] * r[:, 1:]).sum(axis=0) / (len(r) - 1)
+            skewed[k, others] = skewed[others, k] = False
+        # 둘 다 상대에게 없는 날짜가 있는 쌍
+        for i, j in zip(*np.nonzero(np.triu(skewed))):
+            common = np.flatnonzero(valid[:, i] & valid[:, j])
+            if len(common) < 3:
+                n[i, j] = n[j, i] = max(len(common) - 1, 0)  # MIN_OVERLAP 미만 → 통계 없음
+                continue
+            sub = closes[np.ix_(common, [i, j])]
+            r = sub[1:] / sub[:-1] - 1
+            r -= r.mean(axis=0)
+            moments = r.T @ r / (len(r) - 1)
+            n[i, j] = n[j, i] = len(r)
+            cov[i, j] = cov[j, i] = moments[0, 1]
+            var[i, j], var[j, i] = moments[0, 0], moments[1, 1]
+    return n, cov, var
+
+
+def _pair_stats(tickers: list[str], closes: np.ndarray, window: tuple[int, int]) -> dict[tuple[str, str], tuple]:
+    """모든 쌍의 (n, cov, var_a, var_b). 캐시에 없는 쌍이 있으면 전체를 한 번에 계산.
+
+    값은 두 ticker의 window 안 종가로만 정해지므로 (window, a, b, 두 파일의 stamp)가 key다.
+    """
+    stamps = {t: price_store.stamp(t) for t in tickers}
+    keys = {}
+    for i, a in enumerate(tickers):
+        for b in tickers[i:]:
+            lo, hi = sorted((a, b))
+            keys[(a, b)] = (window, lo, hi, stamps[lo], stamps[hi])
+    stats: dict[tuple[str, str], tuple] = {}
+    with _pairs_lock:
+        for pair, key in keys.items():
+            if key in _pairs:
+                _pairs.move_to_end(key)
+                stats[pair] = _pairs[key]
+    if len(stats) < len(keys):
+        n, cov, var = _aligned_moments(closes)
+        computed = {}
+        for i, a in enumerate(tickers):
+            for j in range(i, len(tickers)):
+                b = tickers[j]
+                lo, hi = (i, j) if a <= b else (j, i)
+                computed[keys[(a, b)]] = (float(n[lo, hi]), float(cov[lo, hi]), float(var[lo, hi]), float(var[hi, lo]))
+        with _pairs_lock:
+            for key, value in computed.items():
+                _pairs[key] = value
+                _pairs.move_to_end(key)
+            while len(_pairs) > _PAIR_CACHE_SIZE:
+                _pairs.popitem(last=False)
+        stats = {pair: computed[key] for pair, key in keys.items()}
+    return stats
+
+
+def _lookup(stats: dict, a: str, b: str) -> tuple[float, float, float, float]:
+    """(n, cov, var_a, var_b) — 캐시는 정렬된 순서로 저장되어 있으므로 방향을 맞춘다."""
+    n, cov, var_lo, var_hi = stats[(a, b)] if (a, b) in stats else stats[(b, a)]
+    return (n, cov, var_lo, var_hi) if a <= b else (n, cov, var_hi, var_lo)
+
+
+def _number(value: float, digits: int = 4) -> float | None:
+    value = float(value)
+    return round(value, digits) if math.isfinite(value) else None
+
+
+def _numbers(values: np.ndarray) -> list[float | None]:
+    return [v if v == v else None for v in np.round(values, 4).tolist()]
+
+
+def render_comparison(tickers: list[str], benchmark: str, range_: str, points: int) -> bytes | None:
+    """CompareResponse JSON. 가격이 있는 ticker가 하나도 없으면 None.
+
+    benchmark는 tickers에 없으면 마지막에 추가된다. 누적 수익률 series는 points개 이하로
+    줄이지만 통계는 일별 수익률 전체로 계산한다.
+    """
+    requested = list(dict.fromkeys([*tickers, benchmark]))
+    days, closes = _aligned_closes(requested, range_)
+    found = [j for j, t in enumerate(requested) if len(days) and np.isfinite(closes[:, j]).any()]
+    if not found:
+        return None
+    names = [requested[j] for j in found]
+    missing = [t for t in requested if t not in names]
+    closes = closes[:, found]
+    has_benchmark = benchmark in names
+
+    valid = np.isfinite(closes)
+    # 누적 수익률: 각 ticker의 첫 종가 대비, 빈 날은 직전 값으로 채운다
+    first = valid.argmax(axis=0)
+    filled_at = np.maximum.accumulate(np.where(valid, np.arange(len(days))[:, None], 0), axis=0)
+    filled = closes[filled_at, np.arange(len(names))]
+    base = closes[first, np.arange(len(names))]
+    with np.errstate(invalid="ignore"):
+        cumulative = (filled / base - 1) * 100
+    cumulative[np.arange(len(days))[:, None] < first] = np.nan
+
+    stats = _pair_stats(names, closes, (int(days[0]), int(days[-1])))
+    size = len(names)
+    correlation = [[None] * size for _ in range(size)]
+    for i, a in enumerate(names):
+        for j in range(i, size):
+            n, cov, var_a, var_b = _lookup(stats, a, names[j])
+            value = cov / np.sqrt(var_a * var_b) if n >= MIN_OVERLAP and var_a > 0 and var_b > 0 else np.nan
+            correlation[i][j] = correlation[j][i] = _number(value)
+
+    beta, tracking_error, tracking_difference = [], [], []
+    b_col = names.index(benchmark) if has_benchmark else None
+    for i, a in enumerate(names):
+        if b_col is None:
+            beta.append(None)
+            tracking_error.append(None)
+            tracking_difference.append(None)
+            continue
+        n, cov, var_a, var_b = _lookup(stats, a, benchmark)
+        ok = n >= MIN_OVERLAP and var_b > 0
+        beta.append(_number(cov / var_b) if ok else None)
+        diff_var = var_a + var_b - 2 * cov
+        tracking_error.append(_number(np.sqrt(max(diff_var, 0.0) * TRADING_DAYS) * 100) if ok else None)
+        # 둘 다 값이 있는 첫날~마지막 날 총수익률 차이 (%p)
+        both = np.flatnonzero(valid[:, i] & valid[:, b_col])
+        if len(both) >= 2:
+            f, last = both[0], both[-1]
+            td = (closes[last, i] / closes[f, i] - closes[last, b_col] / closes[f, b_col]) * 100
+            tracking_difference.append(_number(td))
+        else:
+            tracking_difference.append(None)
+
+    sample = np.arange(len(days))
+    if len(days) > points:
+        sample = np.unique(np.linspace(0, len(days) - 1, points).round().astype(np.int64))
+    return render_json_fast({
+        "tickers": names,
+        "missing": missing,
+        "benchmark": benchmark if has_benchmark else None,
+        "range": range_,
+        "dates": days[sample].astype("datetime64[D]").astype(str).tolist(),
+        "series": [_numbers(column) for column in cumulative[sample].T],
+        "total_return": _numbers(cumulative[-1]),
+        "correlation": correlation,
+        "beta": beta,
+        "tracking_difference": tracking_difference,
+        "tracking_error": tracking_error,
+    })
+
+
+@dataclass(frozen=True)
+class SimilarityIndex:
+    key: tuple  # (ticker별 price_store.stamp() tuple, 상장 중인 ticker tuple)
+    tickers: list[str]
+    position: dict[str, int]
+    neighbours: np.ndarray  # (N, K) row 번호, 상관계수 내림차순
+    scores: np.ndarray  # (N, K)
+
+    def similar(self, ticker: str, limit: int) -> list[tuple[str, float]] | None:
+        """상관계수가 높은 순 (ticker, 상관계수). 색인에 없으면 None."""
+        i = self.position.get(ticker)
+        if i is None:
+            return None
+        return [(self.tickers[j], float(s)) for j, s in zip(self.neighbours[i, :limit], self.scores[i, :limit])]
+
+
+_index: SimilarityIndex | None = None
+_index_lock = threading.Lock()
+_build_task: asyncio.Task | None = None
+_build_error: tuple[float, str] | None = None  # 마지막 백그라운드 build 실패 (monotonic 시각, 예외)
+_BUILD_RETRY_SECONDS = 60
+_active: tuple[int, tuple[str, ...]] = (-1, ())  # (snapshot.version, 상장 중인 ticker)
+_stamps: tuple[float, tuple[str, ...], tuple] = (-math.inf, (), ())  # (확인 시각, ticker, 파일 stamp)
+
+
+def _similarity_key(snapshot, fresh: bool = False) -> tuple:
+    """(ticker별 가격 파일 stamp, 상장 중인 ticker). quote refresh로 snapshot만 바뀌면 그대로.
+
+    stamp는 fresh가 아니면 SNAPSHOT_PROBE_SECONDS마다 다시 확인한다 (ticker 수만큼 stat).
+    """
+    global _active, _stamps
+    version, tickers = _active
+    if version != snapshot.version:
+        tickers = tuple(sorted(e.ticker for e in snapshot.listed))
+        _active = (snapshot.version, tickers)
+    checked, stamped, stamps = _stamps
+    if fresh or stamped != tickers or time.monotonic() - checked >= SNAPSHOT_PROBE_SECONDS:
+        stamps = tuple(price_store.stamp(t) for t in tickers)
+        _stamps = (time.monotonic(), tickers, stamps)
+    return stamps, tickers
+
+
+def _build_index(key: tuple, tickers: list[str]) -> SimilarityIndex:
+    started = time.perf_counter()
+    since = price_store.to_day(datetime.utcnow().date() - timedelta(days=SIMILAR_LOOKBACK_DAYS))
+    bars = [price_store.load(t) for t in tickers]
+    days = np.unique(np.concatenate([b["date"][b["date"] >= since] for b in bars] or [np.empty(0, np.int32)]))
+    closes = np.full((len(days), len(tickers)), np.nan)
+    for j, b in enumerate(bars):
+        b = b[np.searchsorted(b["date"], since, side="left"):]
+        closes[np.searchsorted(days, b["date"]), j] = b["close"]
+    returns = _daily_returns(closes)
+
+    valid = np.isfinite(returns)
+    count = valid.sum(axis=0)
+    x = np.where(valid, returns, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = x.sum(axis=0) / count
+        centered = np.where(valid, returns - mean, 0.0)
+        norm = np.sqrt((centered * centered).sum(axis=0))
+        keep = np.flatnonzero((count >= SIMILAR_MIN_COVERAGE * len(returns)) & (count >= MIN_OVERLAP) & (norm > 0))
+    # 단위 벡터로 만들면 내적이 (빈 날을 평균으로 채운) 상관계수
+    z = (centered[:, keep] / norm[keep]).astype(np.float32)
+    names = [tickers[j] for j in keep]
+
+    size, k = len(names), min(SIMILAR_TOP_K, max(len(names) - 1, 0))
+    neighbours = np.empty((size, k), dtype=np.int32)
+    scores = np.empty((size, k), dtype=np.float32)
+    for lo in range(0, size, _BLOCK):
+        hi = min(lo + _BLOCK, size)
+        sim = z[:, lo:hi].T @ z
+        sim[np.arange(hi - lo), np.arange(lo, hi)] = -np.inf  # 자기 자신 제외
+        if not k:
+            continue
+        top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sim, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        neighbours[lo:hi] = np.take_along_axis(top, order, axis=1)
+        scores[lo:hi] = np.take_along_axis(top_scores, order, axis=1)
+
+    logger.info(
+        "Similarity index built: %d/%d tickers, %d days in %.0fms",
+        size, len(tickers), len(returns), (time.perf_counter() - started) * 1000,
+    )
+    return SimilarityIndex(key, names, {t: i for i, t in enumerate(names)}, neighbours, scores)
+
+
+def ensure_similarity_index(snapshot) -> SimilarityIndex:
+    """snapshot과 가격 저장소에 맞는 유사도 색인. 바뀌었을 때만 다시 만든다 (blocking)."""
+    global _index
+    key = _similarity_key(snapshot, fresh=True)
+    if _index is not None and _index.key == key:
+        return _index
+    with _index_lock:
+        if _index is None or _index.key != key:
+            _index = _build_index(key, list(key[1]))
+        return _index
+
+
+def _build_done(task: asyncio.Task) -> None:
+    global _build_error
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is None:
+        _build_error = None
+        return
+    logger.error("Similarity index build failed", exc_info=error)
+    _build_error = (time.monotonic(), f"{type(error).__name__}: {error}")
+
+
+def similarity_index(snapshot) -> SimilarityIndex | None:
+    """요청 경로용: 마지막으로 만든 색인을 바로 반환 (없으면 None, 오래됐을 수 있음).
+
+    색인이 없거나 key가 바뀌었으면 event loop의 백그라운드 task로 다시 만든다. build가
+    실패하면 로그를 남기고 _BUILD_RETRY_SECONDS 뒤의 요청에서 다시 시도한다.
+    """
+    global _build_task
+    if _index is None or _index.key != _similarity_key(snapshot):
+        idle = _build_task is None or _build_task.done()
+        backing_off = _build_error is not None and time.monotonic() - _build_error[0] < _BUILD_RETRY_SECONDS
+        if idle and not backing_off:
+            _build_task = asyncio.get_running_loop().create_task(asyncio.to_thread(ensure_similarity_index, snapshot))
+            _build_task.add_done_callback(_build_done)
+    return _index
+
+
+def similarity_build_error() -> str | None:
+    """마지막 백그라운드 색인 build가 실패했으면 그 예외 (이후 성공하면 None)."""
+    return _build_error[1] if _build_error is not None else None
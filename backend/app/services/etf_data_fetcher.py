@@ -1,62 +1,82 @@
 import logging
-import time
 from datetime import datetime, timedelta
 
 import yfinance as yf
-import pandas as pd
 
-logger = logging.getLogger(__name__)
-
-_DOWNLOAD_SUB_BATCH = 10  # yf.download()에 한 번에 넘길 최대 ticker 수
+from app.config import FETCH_COOLDOWN_SECONDS, FETCH_RATE_LIMIT_PER_SEC, FETCH_WORKERS, PRICE_HISTORY_DAYS
+from app.services import info_cache, price_store
+from app.services.metrics import FETCH_FAILURES, INFO_SKIPPED, INFO_TIER_CHANGES
+from app.services.returns import horizon_returns
+from app.services.fetch_engine import (
+    AdaptiveTokenBucket,
+    FetchStats,
+    RateLimited,
+    fetch_concurrently,
+    is_rate_limited_error,
+)
 
+logger = logging.getLogger(__name__)
 
-def fetch_etf_batch(tickers: list[str]) -> list[dict]:
-    """Fetch ETF data for a batch of tickers using yfinance."""
-    results = []
-    for ticker in tickers:
-        try:
-            data = _fetch_single(ticker)
-            if data:
-                results.append(data)
-        except Exception:
-            logger.warning("Failed to fetch data for %s", ticker, exc_info=True)
-        time.sleep(0.5)  # 개별 ticker 간 딜레이 (429 방지)
-    return results
+# 모든 yfinance 요청(.info, download)이 공유하는 전역 rate limiter
+limiter = AdaptiveTokenBucket(
+    max_rate=FETCH_RATE_LIMIT_PER_SEC,
+    cooldown_seconds=FETCH_COOLDOWN_SECONDS,
+)
+
+
+def fetch_etf_batch(
+    tickers: list[str], stats: FetchStats | None = None, known: set[str] = frozenset(),
+) -> list[dict]:
+    """Fetch ETF data for a batch of tickers using yfinance (FETCH_WORKERS개 동시 요청).
+
+    최근에 ETF가 아니라고 확인된 ticker는 요청하지 않는다 (info_cache). known(이미 DB에
+    row가 있는 ticker) 중 `.info` tier가 모두 아직 유효한 ticker도 요청하지 않고
+    {"ticker", "data_updated_at"}만 반환한다 — 수익률만 갱신된다.
+    """
+    skipped = {t for t in tickers if info_cache.known_non_etf(t)}
+    if skipped:
+        FETCH_FAILURES.inc(len(skipped), reason="not_etf_cached")
+    fresh = {t for t in tickers if t in known and t not in skipped and not info_cache.info_due(t)}
+    if fresh:
+        INFO_SKIPPED.inc(len(fresh))
+    now = datetime.utcnow()
+    records = [{"ticker": t, "data_updated_at": now} for t in tickers if t in fresh]
+    tickers = [t for t in tickers if t not in skipped and t not in fresh]
+    results = fetch_concurrently(tickers, _fetch_single, limiter, FETCH_WORKERS, stats)
+    return records + [r for r in results if r]
 
 
 def _fetch_single(ticker: str) -> dict | None:
-    """단일 ticker 정보 조회. 429 발생 시 최대 2회 재시도."""
-    info = None
-    for attempt in range(3):
-        try:
-            t = yf.Ticker(ticker)
-            info = t.info
-            break  # 성공 시 루프 종료
-        except Exception as e:
-            err = str(e)
-            if "429" in err or "Too Many Requests" in err:
-                wait = 60 * (attempt + 1)  # 60s, 120s, 180s
-                logger.warning("429 for %s (attempt %d), waiting %ds", ticker, attempt + 1, wait)
-                time.sleep(wait)
-            elif "Expecting value" in err or "char 0" in err:
-                # 빈 응답 (일시적 차단) - 짧게 기다리고 1회 재시도
-                if attempt == 0:
-                    time.sleep(10)
-                else:
-                    logger.warning("Empty response for %s, skipping", ticker)
-                    return None
-            else:
-                logger.warning("Could not get info for %s: %s", ticker, err)
-                return None
+    """단일 ticker 정보 조회. 429/빈 응답은 RateLimited로 올려 engine이 재시도한다."""
+    try:
+        info = yf.Ticker(ticker).info
+    except Exception as e:
+        err = str(e)
+        if is_rate_limited_error(err):
+            raise RateLimited(err) from e
+        logger.warning("Could not get info for %s: %s", ticker, err)
+        FETCH_FAILURES.inc(reason="info_error")
+        return None
 
     if not info:
+        FETCH_FAILURES.inc(reason="empty_info")
         return None
 
     quote_type = info.get("quoteType")
-    if quote_type not in ["ETF", "MUTUALFUND"]:
+    if quote_type not in info_cache.ETF_QUOTE_TYPES:
         logger.debug("Skipping %s - not an ETF (quoteType=%s)", ticker, quote_type)
+        FETCH_FAILURES.inc(reason="not_etf")
+        info_cache.store(ticker, info, None)
         return None
 
+    record = _parse_info(ticker, info)
+    for tier in info_cache.store(ticker, info, record):
+        INFO_TIER_CHANGES.inc(tier=tier)
+    return record
+
+
+def _parse_info(ticker: str, info: dict) -> dict:
+    """.info payload → etfs 컬럼 dict."""
     name = info.get("longName") or info.get("shortName")
     description = info.get("longBusinessSummary")
     exchange = info.get("exchange")
@@ -116,55 +136,14 @@ def _fetch_single(ticker: str) -> dict | None:
 
 
 def compute_returns(tickers: list[str]) -> dict[str, dict]:
-    """Compute 1m, 1y, 3y, 5y returns. 10개씩 소분할하여 rate limit 완화."""
+    """Compute 1m, 1y, 3y, 5y returns from the local price store.
+
+    저장소를 먼저 증분 갱신(마지막 저장일 이후 bar만 다운로드)한 뒤 계산한다.
+    """
     if not tickers:
         return {}
 
-    end = datetime.utcnow()
-    start_5y = end - timedelta(days=365 * 5 + 30)
-    all_results = {}
-
-    for i in range(0, len(tickers), _DOWNLOAD_SUB_BATCH):
-        sub = tickers[i: i + _DOWNLOAD_SUB_BATCH]
-        try:
-            df = yf.download(
-                sub,
-                start=start_5y.strftime("%Y-%m-%d"),
-                end=end.strftime("%Y-%m-%d"),
-                progress=False,
-                threads=False,
-            )
-        except Exception:
-            logger.warning("Bulk download failed for sub-batch %s", sub)
-            df = pd.DataFrame()
-
-        if not df.empty:
-            close = df["Close"] if "Close" in df.columns else df.get("Adj Close", pd.DataFrame())
-            if isinstance(close, pd.Series):
-                close = close.to_frame(name=sub[0])
-
-            if not close.empty:
-                now = close.index[-1]
-                for t in sub:
-                    if t not in close.columns:
-                        continue
-                    series = close[t].dropna()
-                    if len(series) < 2:
-                        continue
-                    current = series.iloc[-1]
-                    r = {}
-
-                    for days, key in [(35, "return_1m"), (370, "return_1y"),
-                                      (365 * 3 + 30, "return_3y"), (365 * 5 + 30, "return_5y")]:
-                        idx = series.index[series.index >= now - pd.Timedelta(days=days)]
-                        if len(idx) > 0:
-                            p = series.loc[idx[0]]
-                            r[key] = round(float(((current - p) / p) * 100), 2)
-
-                    if r:
-                        all_results[t] = r
-
-        if i + _DOWNLOAD_SUB_BATCH < len(tickers):
-            time.sleep(2)  # 서브 배치 간 딜레이
-
-    return all_results
+    price_store.update_prices(tickers, limiter)
+    since = price_store.to_day(datetime.utcnow().date() - timedelta(days=PRICE_HISTORY_DAYS))
+    close = price_store.close_matrix(tickers, since_day=since)
+    return horizon_returns(close)
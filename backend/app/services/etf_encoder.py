@@ -0,0 +1,107 @@
+"""Core row tuple → ETFResponse JSON bytes, without per-row Pydantic validation.
+
+snapshot 생성 시 ORM 객체 hydrate + model_validate + model_dump 대신 Core select의
+row를 그대로 orjson으로 직렬화한다. 결과는 ETFResponse.model_dump(mode="json")을
+Starlette JSONResponse처럼 렌더링한 것과 바이트 단위로 같아야 한다.
+
+orjson은 지수 표기 float(1e-05, 1e+16)을 Python json과 다르게 쓰고 NaN을 null로
+바꾸므로, 그런 값이 있는 row만 표준 json으로 직렬화한다.
+"""
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import DateTime, Float, Row, select
+
+from app.models.etf import ETF
+from app.schemas.etf import ETFResponse
+
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json만 사용
+    orjson = None
+
+LIST_FIELDS = tuple(ETFResponse.model_fields)
+
+_COLUMNS = [ETF.__table__.c[f] for f in LIST_FIELDS]
+ROWS_QUERY = select(*_COLUMNS)
+
+_FLOAT_INDEXES = [i for i, c in enumerate(_COLUMNS) if isinstance(c.type, Float)]
+_DATETIME_INDEXES = [i for i, c in enumerate(_COLUMNS) if isinstance(c.type, DateTime)]
+
+# Python repr이 고정 소수점으로 쓰는 범위 (이 밖은 지수 표기)
+_REPR_MIN = 1e-4
+_REPR_MAX = 1e16
+
+
+def render_json(content) -> bytes:
+    """Starlette JSONResponse.render()와 동일한 바이트를 만든다."""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def render_json_fast(content) -> bytes:
+    """숫자가 많은 새 응답용. orjson이 있으면 orjson (지수 표기 등 float 표기가 render_json과
+    다를 수 있으므로 기존 응답과 바이트가 같아야 하는 곳에는 쓰지 않는다)."""
+    if orjson is None:
+        return render_json(content)
+    return orjson.dumps(content)
+
+
+def _iso_utc(dt: datetime | None) -> str | None:
+    """ETFResponse.serialize_datetime과 동일: naive는 UTC로 간주."""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.isoformat()
+
+
+def _fallback_rows(columns: list[list]) -> set[int]:
+    """orjson 결과가 표준 json과 달라지는 float(지수 표기, NaN/inf)이 있는 row 번호."""
+    bad: set[int] = set()
+    for i in _FLOAT_INDEXES:
+        column = columns[i]
+        # None은 NaN이 되므로 실제 NaN과 구분해 둔다
+        values = np.array(column, dtype=np.float64)
+        present = np.fromiter((v is not None for v in column), dtype=bool, count=len(column))
+        magnitude = np.abs(values)
+        with np.errstate(invalid="ignore"):
+            out_of_range = (magnitude != 0) & ((magnitude < _REPR_MIN) | (magnitude >= _REPR_MAX))
+        bad.update(np.flatnonzero(present & (out_of_range | ~np.isfinite(values))).tolist())
+    return bad
+
+
+def encode_rows(rows: list[Row]) -> tuple[list[bytes], list[tuple]]:
+    """row별 JSON 바이트와 JSON 값 tuple(LIST_FIELDS 순서)을 반환.
+
+    변환은 컬럼 단위로 한 번에 한다: float 컬럼의 int → float(ETFResponse 검증과
+    동일), datetime → ISO 문자열, orjson으로 쓸 수 없는 row 찾기.
+    """
+    if not rows:
+        return [], []
+    columns = [list(c) for c in zip(*rows)]
+    for i in _FLOAT_INDEXES:
+        if any(type(v) is int for v in columns[i]):
+            columns[i] = [float(v) if type(v) is int else v for v in columns[i]]
+    for i in _DATETIME_INDEXES:
+        columns[i] = [_iso_utc(v) for v in columns[i]]
+
+    values = list(zip(*columns))
+    fallback = _fallback_rows(columns) if orjson is not None else None
+    rows_json: list[bytes] = []
+    for n, row in enumerate(values):
+        data = dict(zip(LIST_FIELDS, row))
+        if fallback is None or n in fallback:
+            rows_json.append(render_json(data))
+            continue
+        try:
+            rows_json.append(orjson.dumps(data))
+        except orjson.JSONEncodeError:  # 64bit 밖 정수 등
+            rows_json.append(render_json(data))
+    return rows_json, values
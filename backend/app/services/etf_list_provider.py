@@ -1,74 +1,157 @@
+"""ETF ticker universe: NASDAQ screener → Alpha Vantage → local CSV.
+
+받은 목록은 TICKER_UNIVERSE_PATH에 source, 조회 시각, 응답의 ETag/Last-Modified와 함께
+저장한다. TTL 안에는 다시 요청하지 않고, TTL이 지나면 조건부 요청을 보내 304면 저장된
+목록을 그대로 쓴다. 모든 요청은 keep-alive(h2가 있으면 HTTP/2) client 하나를 공유한다.
+"""
 import csv
 import io
 import json
 import logging
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
 
 import httpx
 
-from app.config import ALPHA_VANTAGE_API_KEY, DATA_DIR
+from app.config import ALPHA_VANTAGE_API_KEY, DATA_DIR, TICKER_UNIVERSE_PATH, TICKER_UNIVERSE_TTL_HOURS
+from app.models.etf import normalize_ticker
+from app.services.metrics import DOWNLOAD_BYTES
+
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:  # h2 미설치 시 HTTP/1.1 keep-alive
+    _HTTP2 = False
 
 logger = logging.getLogger(__name__)
 
 FALLBACK_CSV = DATA_DIR / "etf_master_list.csv"
+PRIMARY_SOURCE = "nasdaq"
 
+_client: httpx.AsyncClient | None = None
 
-async def _fetch_from_nasdaq() -> list[str]:
-    """Fetch ETF list from NASDAQ screener API."""
-    url = "https://api.nasdaq.com/api/screener/etf?download=true"
-    headers = {"User-Agent": "Mozilla/5.0"}
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.get(url, headers=headers)
-        resp.raise_for_status()
+@dataclass(frozen=True)
+class TickerUniverse:
+    tickers: list[str]  # 정규화, 정렬됨
+    source: str  # nasdaq | alpha_vantage | csv
+    fetched_at: datetime
+    etag: str | None = None
+    last_modified: str | None = None
 
-    data = resp.json()
-    if "data" not in data or "data" not in data["data"]:
-        return []
+    @property
+    def authoritative(self) -> bool:
+        """상장 폐지 판단에 쓸 수 있는 목록인지 (대체 source는 포함 범위가 달라 제외)."""
+        return self.source == PRIMARY_SOURCE
 
-    rows = data["data"]["data"]["rows"]
-    tickers = [row["symbol"] for row in rows if row.get("symbol")]
-    return tickers
 
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=httpx.Timeout(30, connect=10),
+            headers={"User-Agent": "Mozilla/5.0"},
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
-async def fetch_etf_tickers() -> list[str]:
-    """Fetch ETF ticker list from NASDAQ. Falls back to Alpha Vantage, then local CSV."""
-    try:
-        tickers = await _fetch_from_nasdaq()
-        if tickers:
-            logger.info("Fetched %d ETF tickers from NASDAQ", len(tickers))
-            return tickers
-    except Exception:
-        logger.exception("NASDAQ fetch failed, trying Alpha Vantage")
 
+def _normalized(tickers: list[str]) -> list[str]:
+    """대문자로 정규화하고 중복을 없앤 정렬된 목록."""
+    return sorted({normalize_ticker(t) for t in tickers if t.strip()})
+
+
+def _load_cached() -> TickerUniverse | None:
     try:
-        tickers = await _fetch_from_alpha_vantage()
-        if tickers:
-            logger.info("Fetched %d ETF tickers from Alpha Vantage", len(tickers))
-            return tickers
-    except Exception:
-        logger.exception("Alpha Vantage fetch failed, using fallback")
+        data = json.loads(TICKER_UNIVERSE_PATH.read_text())
+        return TickerUniverse(
+            tickers=data["tickers"],
+            source=data["source"],
+            fetched_at=datetime.fromisoformat(data["fetched_at"]),
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+        )
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError):
+        logger.warning("Ignoring unreadable ticker universe cache at %s", TICKER_UNIVERSE_PATH)
+        return None
+
+
+def _save(universe: TickerUniverse) -> None:
+    TICKER_UNIVERSE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = TICKER_UNIVERSE_PATH.with_suffix(".tmp")
+    tmp.write_text(json.dumps({
+        "tickers": universe.tickers,
+        "source": universe.source,
+        "fetched_at": universe.fetched_at.isoformat(),
+        "etag": universe.etag,
+        "last_modified": universe.last_modified,
+    }))
+    tmp.replace(TICKER_UNIVERSE_PATH)
+
+
+async def _conditional_get(url: str, source: str, cached: TickerUniverse | None, **kwargs) -> httpx.Response | None:
+    """같은 source의 저장된 목록이 있으면 조건부 요청. 304면 None."""
+    headers = {}
+    if cached is not None and cached.source == source:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    resp = await get_http_client().get(url, headers=headers, **kwargs)
+    if resp.status_code == 304:
+        return None
+    resp.raise_for_status()
+    DOWNLOAD_BYTES.inc(len(resp.content), source=source)
+    return resp
+
+
+def _universe(tickers: list[str], source: str, resp: httpx.Response) -> TickerUniverse:
+    return TickerUniverse(
+        tickers=_normalized(tickers),
+        source=source,
+        fetched_at=datetime.now(timezone.utc),
+        etag=resp.headers.get("etag"),
+        last_modified=resp.headers.get("last-modified"),
+    )
+
+
+async def _fetch_from_nasdaq(cached: TickerUniverse | None) -> TickerUniverse | None:
+    """Fetch ETF list from NASDAQ screener API."""
+    resp = await _conditional_get("https://api.nasdaq.com/api/screener/etf?download=true", "nasdaq", cached)
+    if resp is None:
+        return replace(cached, fetched_at=datetime.now(timezone.utc))
 
-    tickers = _load_fallback_csv()
-    logger.info("Loaded %d ETF tickers from fallback CSV", len(tickers))
-    return tickers
+    data = resp.json()
+    if "data" not in data or "data" not in data["data"]:
+        return None
+    rows = data["data"]["data"]["rows"]
+    return _universe([row["symbol"] for row in rows if row.get("symbol")], "nasdaq", resp)
 
 
-async def _fetch_from_alpha_vantage() -> list[str]:
-    url = "https://www.alphavantage.co/query"
+async def _fetch_from_alpha_vantage(cached: TickerUniverse | None) -> TickerUniverse | None:
     params = {
         "function": "LISTING_STATUS",
         "apikey": ALPHA_VANTAGE_API_KEY,
     }
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.get(url, params=params)
-        resp.raise_for_status()
+    resp = await _conditional_get("https://www.alphavantage.co/query", "alpha_vantage", cached, params=params)
+    if resp is None:
+        return replace(cached, fetched_at=datetime.now(timezone.utc))
 
     reader = csv.DictReader(io.StringIO(resp.text))
     tickers = []
     for row in reader:
         if row.get("assetType") == "ETF" and row.get("status") == "Active":
             tickers.append(row["symbol"])
-    return tickers
+    return _universe(tickers, "alpha_vantage", resp)
 
 
 def _load_fallback_csv() -> list[str]:
@@ -78,3 +161,42 @@ def _load_fallback_csv() -> list[str]:
     with open(FALLBACK_CSV) as f:
         reader = csv.DictReader(f)
         return [row["ticker"] for row in reader if row.get("ticker")]
+
+
+async def load_universe(max_age_hours: float = TICKER_UNIVERSE_TTL_HOURS) -> TickerUniverse:
+    """ETF ticker 목록. 저장된 목록이 max_age_hours 안이면 요청 없이 반환.
+
+    NASDAQ → Alpha Vantage 순으로 시도하고, 모두 실패하면 오래된 저장 목록, 그것도
+    없으면 로컬 CSV를 쓴다.
+    """
+    cached = _load_cached()
+    if cached is not None and datetime.now(timezone.utc) - cached.fetched_at < timedelta(hours=max_age_hours):
+        logger.info("Using cached ticker universe (%d tickers from %s)", len(cached.tickers), cached.source)
+        return cached
+
+    for source, fetch in (("NASDAQ", _fetch_from_nasdaq), ("Alpha Vantage", _fetch_from_alpha_vantage)):
+        try:
+            universe = await fetch(cached)
+        except Exception:
+            logger.exception("%s fetch failed", source)
+            continue
+        if universe is not None and universe.tickers:
+            revalidated = cached is not None and universe.tickers is cached.tickers
+            logger.info(
+                "%s ticker universe from %s: %d tickers",
+                "Revalidated" if revalidated else "Fetched", source, len(universe.tickers),
+            )
+            _save(universe)
+            return universe
+
+    if cached is not None:
+        logger.warning("Using stale cached ticker universe from %s", cached.fetched_at)
+        return cached
+    universe = TickerUniverse(_normalized(_load_fallback_csv()), "csv", datetime.now(timezone.utc))
+    logger.info("Loaded %d ETF tickers from fallback CSV", len(universe.tickers))
+    return universe
+
+
+async def fetch_etf_tickers() -> list[str]:
+    """Fetch ETF ticker list (캐시/조건부 요청 포함). 정렬된 대문자 ticker."""
+    return (await load_universe()).tickers
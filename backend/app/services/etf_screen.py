@@ -0,0 +1,76 @@
+"""Numeric screener expressions for `/api/etfs?where=...`.
+
+`where`는 여러 번 줄 수 있고 모두 AND로 묶인다. 한 값 안에서는 `,`가 AND, `|`가 OR이다
+(`,`가 `|`보다 먼저 나뉜다 → AND of OR, 즉 CNF).
+
+    where=expense_ratio<0.2,dividend_yield>3
+    where=market_cap>=1B
+    where=return_3y_avg>8|return_5y_avg>8
+
+비교 연산자는 `<`, `<=`, `>`, `>=`, `=`이고 값 뒤에 K/M/B/T(1e3..1e12)를 붙일 수 있다.
+NULL 값은 어떤 조건에도 맞지 않는다. 평가는 ETFTable.screen_rows가 한다.
+"""
+import re
+from dataclasses import dataclass
+
+from sqlalchemy import BigInteger, Float
+
+from app.models.etf import ETF
+from app.schemas.etf import ETFResponse
+
+SCREEN_FIELDS = tuple(
+    f for f in ETFResponse.model_fields
+    if f in ETF.__table__.c and isinstance(ETF.__table__.c[f].type, (Float, BigInteger))
+)
+MAX_PREDICATES = 32
+
+_PREDICATE = re.compile(r"^\s*([a-z0-9_]+)\s*(<=|>=|<|>|=)\s*([-+]?[0-9.]+(?:e[-+]?[0-9]+)?)\s*([kmbt]?)\s*$", re.I)
+_SUFFIXES = {"": 1, "k": 1e3, "m": 1e6, "b": 1e9, "t": 1e12}
+
+
+class InvalidScreen(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """low <(=) field <(=) high. 한쪽이 None이면 그쪽은 열려 있다."""
+
+    field: str
+    low: float | None = None
+    high: float | None = None
+    low_inclusive: bool = True
+    high_inclusive: bool = True
+
+
+Screen = tuple[tuple[Predicate, ...], ...]  # AND of (OR of predicates)
+
+
+def parse_predicate(text: str) -> Predicate:
+    m = _PREDICATE.match(text)
+    if not m:
+        raise InvalidScreen(f"Invalid condition: {text.strip()!r}")
+    field, op, number, suffix = m.groups()
+    if field not in SCREEN_FIELDS:
+        raise InvalidScreen(f"Unknown numeric field: {field}")
+    try:
+        value = float(number) * _SUFFIXES[suffix.lower()]
+    except ValueError:
+        raise InvalidScreen(f"Invalid number: {number}") from None
+    if op == "=":
+        return Predicate(field, value, value)
+    if op in ("<", "<="):
+        return Predicate(field, high=value, high_inclusive=op == "<=")
+    return Predicate(field, low=value, low_inclusive=op == ">=")
+
+
+def parse_where(where: list[str] | None) -> Screen:
+    """`where` 파라미터들을 CNF로. 조건이 없으면 빈 tuple."""
+    clauses = []
+    for value in where or ():
+        for clause in value.split(","):
+            if clause.strip():
+                clauses.append(tuple(parse_predicate(p) for p in clause.split("|")))
+    if sum(map(len, clauses)) > MAX_PREDICATES:
+        raise InvalidScreen(f"Too many conditions (max {MAX_PREDICATES})")
+    return tuple(clauses)
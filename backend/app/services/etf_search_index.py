@@ -0,0 +1,308 @@
+"""BM25 keyword index over ETF text fields for chat retrieval.
+
+ticker/name/category/underlying_index/issuer/description을 토큰화해 term별
+posting(문서 번호, BM25 가중치)을 CSR 배열로 저장한다. 가중치는 문서 길이
+정규화까지 미리 계산해 두므로 질의는 posting 구간을 np.bincount로 더하기만 하면
+된다. 배열은 SEARCH_INDEX_DIR에 .npy로 저장하고 mmap으로 읽으므로 재시작 후에도
+텍스트가 바뀌지 않았으면 다시 만들지 않는다.
+"""
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import Row
+
+from app.config import SEARCH_INDEX_DIR
+
+logger = logging.getLogger(__name__)
+
+_K1 = 1.2
+_B = 0.75
+# 필드별 term 빈도 가중치 (BM25F 근사)
+_FIELD_BOOSTS = {
+    "ticker": 3.0,
+    "name": 3.0,
+    "category": 2.0,
+    "underlying_index": 2.0,
+    "issuer": 1.0,
+    "description": 1.0,
+}
+# 같은 점수대에서는 AUM이 큰 ETF를 앞에 둔다 (최대 +20%, 색인 생성 시점의 AUM)
+_AUM_PRIOR = 0.2
+
+_TOKEN = re.compile(r"[0-9a-z가-힣]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it its of on or that the this to with "
+    "etf etfs fund funds".split()
+)
+
+# 한국어 질문을 영어 설명과 맞추기 위한 금융 용어 사전 (토큰에 포함되면 확장)
+_KO_TERMS = {
+    "배당": "dividend income yield",
+    "고배당": "high dividend yield",
+    "채권": "bond fixed income",
+    "국채": "treasury government bond",
+    "회사채": "corporate bond",
+    "하이일드": "high yield",
+    "단기": "short term",
+    "장기": "long term",
+    "물가": "inflation tips",
+    "금리": "rate floating",
+    "주식": "equity stock",
+    "성장": "growth",
+    "가치": "value",
+    "소형": "small cap",
+    "중형": "mid cap",
+    "대형": "large cap",
+    "기술": "technology tech",
+    "반도체": "semiconductor",
+    "헬스케어": "health healthcare",
+    "바이오": "biotech biotechnology",
+    "금융": "financial financials",
+    "에너지": "energy",
+    "원유": "oil crude",
+    "천연가스": "natural gas",
+    "금": "gold",
+    "은": "silver",
+    "원자재": "commodity commodities",
+    "부동산": "real estate reit",
+    "리츠": "reit real estate",
+    "인프라": "infrastructure",
+    "유틸리티": "utilities",
+    "소비재": "consumer",
+    "산업재": "industrials",
+    "통신": "communication",
+    "신흥국": "emerging markets",
+    "선진국": "developed international",
+    "해외": "international global",
+    "미국": "us",
+    "중국": "china",
+    "일본": "japan",
+    "인도": "india",
+    "한국": "korea",
+    "유럽": "europe",
+    "나스닥": "nasdaq",
+    "다우": "dow jones",
+    "레버리지": "leveraged 2x 3x",
+    "인버스": "inverse short bear",
+    "변동성": "volatility",
+    "저변동": "low volatility minimum",
+    "배당성장": "dividend growth appreciation",
+    "커버드콜": "covered call option income",
+    "친환경": "clean esg",
+    "클린에너지": "clean energy solar wind",
+    "인공지능": "artificial intelligence ai",
+    "로봇": "robotics automation",
+    "사이버보안": "cybersecurity",
+    "암호화폐": "bitcoin crypto blockchain",
+    "비트코인": "bitcoin",
+    "지수": "index",
+    "채권혼합": "allocation",
+}
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+# 한 글자 용어("금", "은")는 조사만 붙은 경우에만 맞춘다 ("금융", "좋은" 제외)
+_PARTICLES = frozenset(["", "에", "은", "는", "이", "가", "을", "를", "과", "와", "도", "에서", "으로", "이나"])
+
+
+def _ko_matches(ko: str, token: str) -> bool:
+    if len(ko) == 1:
+        return token[:1] == ko and token[1:] in _PARTICLES
+    return ko in token
+
+
+def query_terms(text: str) -> list[str]:
+    """질의 토큰. 한국어 토큰은 _KO_TERMS로 영어 term을 덧붙인다 ("배당주" → dividend ...)."""
+    terms = []
+    for token in tokenize(text):
+        terms.append(token)
+        if token[0] >= "가":
+            for ko, en in _KO_TERMS.items():
+                if _ko_matches(ko, token):
+                    terms.extend(en.split())
+    return terms
+
+
+def _doc_fields(item: Row) -> dict[str, str | None]:
+    return {field: getattr(item, field) for field in _FIELD_BOOSTS}
+
+
+def text_hash(items: list[Row]) -> str:
+    """색인 대상 텍스트의 해시. 시세만 바뀐 sync 후에는 색인을 다시 만들지 않는다."""
+    h = hashlib.sha256()
+    for item in items:
+        for value in _doc_fields(item).values():
+            h.update((value or "").encode())
+            h.update(b"\0")
+    return h.hexdigest()[:32]
+
+
+@dataclass
+class SearchIndex:
+    text_hash: str
+    tickers: list[str]
+    vocab: dict[str, int]
+    offsets: np.ndarray  # (V+1,) int64, term별 posting 구간
+    docs: np.ndarray  # (nnz,) int32
+    weights: np.ndarray  # (nnz,) float32, idf · 정규화된 tf
+    prior: np.ndarray  # (N,) float32, AUM 기반 점수 배율
+
+    def search(self, weighted_terms: dict[str, float], k: int) -> list[str]:
+        """질의 term 가중치 합으로 BM25 점수를 매겨 상위 k개 ticker를 반환 (점수 0 제외)."""
+        n = len(self.tickers)
+        scores = np.zeros(n, dtype=np.float64)
+        for term, qw in weighted_terms.items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            lo, hi = self.offsets[term_id], self.offsets[term_id + 1]
+            scores += np.bincount(self.docs[lo:hi], weights=self.weights[lo:hi] * qw, minlength=n)
+
+        matched = np.flatnonzero(scores)
+        if matched.size == 0:
+            return []
+        scores = scores[matched] * self.prior[matched]
+        if matched.size > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            matched, scores = matched[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [self.tickers[i] for i in matched[order]]
+
+
+def build_index(items: list[Row], digest: str | None = None) -> SearchIndex:
+    doc_tfs: list[Counter] = []
+    lengths = np.empty(len(items), dtype=np.float64)
+    df: Counter = Counter()
+    for i, item in enumerate(items):
+        tf: Counter = Counter()
+        for field, value in _doc_fields(item).items():
+            boost = _FIELD_BOOSTS[field]
+            for token in tokenize(value):
+                tf[token] += boost
+        doc_tfs.append(tf)
+        lengths[i] = sum(tf.values())
+        df.update(tf.keys())
+
+    n = len(items)
+    avgdl = lengths.mean() if n else 1.0
+    terms = sorted(df)
+    vocab = {t: i for i, t in enumerate(terms)}
+    idf = np.array([math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in terms])
+
+    # term 순서로 정렬된 posting 배열
+    nnz = sum(df.values())
+    term_ids = np.empty(nnz, dtype=np.int64)
+    docs = np.empty(nnz, dtype=np.int32)
+    tfs = np.empty(nnz, dtype=np.float64)
+    pos = 0
+    for i, tf in enumerate(doc_tfs):
+        m = len(tf)
+        term_ids[pos : pos + m] = [vocab[t] for t in tf]
+        docs[pos : pos + m] = i
+        tfs[pos : pos + m] = list(tf.values())
+        pos += m
+    order = np.lexsort((docs, term_ids))
+    term_ids, docs, tfs = term_ids[order], docs[order], tfs[order]
+
+    norm = _K1 * (1 - _B + _B * lengths[docs] / max(avgdl, 1e-9))
+    weights = (idf[term_ids] * tfs * (_K1 + 1) / (tfs + norm)).astype(np.float32)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+
+    caps = np.array([math.log1p(item.market_cap or 0) for item in items], dtype=np.float64)
+    prior = (1 + _AUM_PRIOR * caps / caps.max() if n and caps.max() > 0 else np.ones(n)).astype(np.float32)
+
+    return SearchIndex(
+        text_hash=digest or text_hash(items),
+        tickers=[item.ticker for item in items],
+        vocab=vocab,
+        offsets=offsets,
+        docs=docs,
+        weights=weights,
+        prior=prior,
+    )
+
+
+_ARRAYS = ("offsets", "docs", "weights", "prior")
+
+
+def save_index(index: SearchIndex) -> None:
+    SEARCH_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    for name in _ARRAYS:
+        tmp = SEARCH_INDEX_DIR / f"{name}.npy.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, getattr(index, name))
+        tmp.replace(SEARCH_INDEX_DIR / f"{name}.npy")
+    # meta.json을 마지막에 바꾸므로 중간에 중단되면 해시가 맞지 않아 다시 만든다
+    meta = {
+        "text_hash": index.text_hash,
+        "tickers": index.tickers,
+        "terms": sorted(index.vocab, key=index.vocab.__getitem__),
+        "nnz": int(index.docs.size),
+    }
+    tmp = SEARCH_INDEX_DIR / "meta.json.tmp"
+    tmp.write_text(json.dumps(meta, ensure_ascii=False))
+    tmp.replace(SEARCH_INDEX_DIR / "meta.json")
+
+
+def load_index(expected_hash: str) -> SearchIndex | None:
+    """디스크의 색인이 같은 텍스트로 만들어졌으면 mmap으로 연다."""
+    try:
+        meta = json.loads((SEARCH_INDEX_DIR / "meta.json").read_text())
+        if meta["text_hash"] != expected_hash:
+            return None
+        arrays = {name: np.load(SEARCH_INDEX_DIR / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+    except (OSError, ValueError, KeyError):
+        return None
+    if arrays["docs"].size != meta["nnz"] or arrays["offsets"][-1] != meta["nnz"]:
+        return None
+    return SearchIndex(
+        text_hash=meta["text_hash"],
+        tickers=meta["tickers"],
+        vocab={t: i for i, t in enumerate(meta["terms"])},
+        **arrays,
+    )
+
+
+_index: SearchIndex | None = None
+_index_version: int | None = None
+_lock = threading.Lock()
+
+
+def ensure_index(snapshot) -> SearchIndex:
+    """snapshot의 상장 중인 ETF 색인을 반환. 텍스트가 바뀌었을 때만 다시 만들어 저장한다."""
+    global _index, _index_version
+    if _index is not None and _index_version == snapshot.version:
+        return _index
+    with _lock:
+        if _index is not None and _index_version == snapshot.version:
+            return _index
+        started = time.perf_counter()
+        digest = text_hash(snapshot.listed)
+        index = _index if _index is not None and _index.text_hash == digest else load_index(digest)
+        if index is None:
+            index = build_index(snapshot.listed, digest)
+            try:
+                save_index(index)
+            except OSError as e:
+                logger.warning("Could not persist search index: %s", e)
+            logger.info(
+                "Search index built: %d docs, %d terms, %d postings in %.0fms",
+                len(index.tickers), len(index.vocab), index.docs.size,
+                (time.perf_counter() - started) * 1000,
+            )
+        _index, _index_version = index, snapshot.version
+        return index
@@ -0,0 +1,283 @@
+"""Process-wide in-memory snapshot of the etfs table.
+
+`/api/etfs?per_page=0` 응답(상장 폐지로 표시된 ETF 제외)을 미리 직렬화/압축해 두고, sync 또는 bulk-update
+커밋 시에만 다시 만든다. 필터/정렬/페이지 요청은 같은 snapshot의 ETFTable과
+row 단위로 미리 직렬화된 JSON을 이어 붙여 응답한다. `fields=` projection과
+columnar 형식은 row별 JSON 값 tuple(`values`)에서 만들고, 전체 목록은 필드 조합별로
+압축본을 snapshot 수명 동안 캐시한다.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import Row, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import SNAPSHOT_PROBE_SECONDS
+from app.database import SessionLocal
+from app.models.etf import ETF
+from app.services.etf_encoder import LIST_FIELDS, ROWS_QUERY, encode_rows, render_json
+from app.services.etf_table import ETFTable
+
+try:
+    import brotli
+except ImportError:  # brotli 미설치 시 gzip만 제공
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_BROTLI_QUALITY = 9
+_GZIP_LEVEL = 9
+
+# projection/columnar 응답에서 고를 수 있는 필드는 LIST_FIELDS (values tuple의 순서)
+_FIELD_INDEX = {f: i for i, f in enumerate(LIST_FIELDS)}
+# 필드 조합은 클라이언트가 정하므로 캐시할 전체 목록 개수를 제한
+_PROJECTED_CACHE_SIZE = 8
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    identity: bytes
+    gzip: bytes
+    br: bytes | None
+
+
+@dataclass(frozen=True)
+class ETFSnapshot:
+    version: int  # data version: 내용(etag)이 바뀐 rebuild에서만 증가
+    etag: str
+    built_at: datetime
+    modified_at: datetime  # 내용이 마지막으로 바뀐 시각 (Last-Modified)
+    signature: tuple
+    items: list[Row]  # ETFResponse와 같은 이름의 속성을 가진 Core row (상장 폐지 포함)
+    listed: list[Row]  # 그중 상장 폐지로 표시되지 않은 row (기본 목록/facet/chat 대상)
+    by_ticker: dict[str, int]  # 대문자 ticker → row 번호
+    table: ETFTable
+    rows_json: list[bytes]
+    values: list[tuple]  # row별 JSON 값 (LIST_FIELDS 순서)
+    full_list: EncodedBody
+    filters: EncodedBody  # 조건 없는 /api/etfs/filters 응답
+    _projected: dict = field(default_factory=dict, repr=False, compare=False)
+    # projected_full_list는 asyncio.to_thread worker에서 동시에 불린다
+    _projected_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def render_list(self, rows, total: int, next_cursor: str | None = None, cursor_mode: bool = False) -> bytes:
+        """ETFListResponse와 동일한 JSON을 row 조각을 이어 붙여 만든다.
+
+        cursor 모드일 때만 next_cursor를 붙인다 (기존 응답과 바이트 단위로 동일하게 유지).
+        """
+        rows_json = self.rows_json
+        body = b'{"items":[%s],"total":%d' % (b",".join([rows_json[i] for i in rows]), total)
+        if cursor_mode:
+            body += b',"next_cursor":%s' % (json.dumps(next_cursor).encode())
+        return body + b"}"
+
+    def render_filters(
+        self, search: str | None = None, category: str | None = None, issuer: str | None = None,
+        include_delisted: bool = False,
+    ) -> bytes:
+        return _render_filters(self.table, search, category, issuer, include_delisted)
+
+    def render_projection(
+        self,
+        rows,
+        total: int,
+        fields: tuple[str, ...],
+        columnar: bool = False,
+        next_cursor: str | None = None,
+        cursor_mode: bool = False,
+    ) -> bytes:
+        """선택한 필드만 담은 목록 JSON.
+
+        columnar이면 `{"columns":[...],"rows":[[...]],"total":N}` 형식으로 필드 이름을
+        row마다 반복하지 않는다.
+        """
+        idx = [_FIELD_INDEX[f] for f in fields]
+        values = self.values
+        if columnar:
+            content = {"columns": list(fields), "rows": [[values[r][i] for i in idx] for r in rows], "total": total}
+        else:
+            content = {"items": [{f: values[r][i] for f, i in zip(fields, idx)} for r in rows], "total": total}
+        if cursor_mode:
+            content["next_cursor"] = next_cursor
+        return render_json(content)
+
+    def projected_full_list(self, fields: tuple[str, ...], columnar: bool) -> EncodedBody:
+        """전체 목록의 projection 응답 압축본. 처음 요청될 때 만들어 캐시."""
+        key = (fields, columnar)
+        with self._projected_lock:
+            cached = self._projected.get(key)
+        if cached is not None:
+            return cached
+        # 직렬화/압축은 lock 밖에서 (같은 조합이 동시에 오면 중복으로 만들 수 있지만 결과는 같다)
+        rows = self.table.listed_rows
+        cached = _encode(self.render_projection(rows, len(rows), fields, columnar))
+        with self._projected_lock:
+            if key not in self._projected and len(self._projected) >= _PROJECTED_CACHE_SIZE:
+                self._projected.pop(next(iter(self._projected)))
+            return self._projected.setdefault(key, cached)
+
+
+_lock = threading.Lock()
+_snapshot: ETFSnapshot | None = None
+_last_probe = 0.0
+
+
+def _render_filters(
+    table: ETFTable, search: str | None, category: str | None, issuer: str | None, include_delisted: bool = False,
+) -> bytes:
+    """FilterOptions JSON. 값 목록은 항상 전체, 건수는 조건을 반영."""
+    counts = table.facet_counts(search, category, issuer, include_delisted)
+    return render_json({
+        "categories": table.facet_values("category", include_delisted),
+        "issuers": table.facet_values("issuer", include_delisted),
+        "category_counts": counts["category"],
+        "issuer_counts": counts["issuer"],
+    })
+
+
+def _encode(body: bytes) -> EncodedBody:
+    return EncodedBody(
+        identity=body,
+        gzip=gzip.compress(body, compresslevel=_GZIP_LEVEL, mtime=0),
+        br=brotli.compress(body, quality=_BROTLI_QUALITY) if brotli else None,
+    )
+
+
+_SIGNATURE_QUERY = select(func.count(ETF.id), func.max(ETF.data_updated_at), func.count(ETF.delisted_at))
+
+
+def _data_signature(db: Session) -> tuple:
+    """테이블 변경 여부를 싸게 판단하기 위한 (row 수, 최신 갱신 시각, 상장 폐지 수)."""
+    return tuple(db.execute(_SIGNATURE_QUERY).one())
+
+
+def _build(db: Session) -> ETFSnapshot:
+    started = time.perf_counter()
+    signature = _data_signature(db)
+    # ORM 객체/Pydantic 검증 없이 Core row를 바로 직렬화 (scripts/bench_serialization.py)
+    items = sorted(db.execute(ROWS_QUERY).all(), key=lambda e: e.ticker)
+    delisted = frozenset(db.scalars(select(ETF.ticker).where(ETF.delisted_at.is_not(None))))
+    rows_json, values = encode_rows(items)
+    table = ETFTable(items, delisted)
+    listed_rows = table.listed_rows
+    body = b'{"items":[%s],"total":%d}' % (b",".join([rows_json[i] for i in listed_rows]), len(listed_rows))
+    filters = _render_filters(table, None, None, None)
+
+    prev = _snapshot
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    now = datetime.now(timezone.utc)
+    unchanged = prev is not None and prev.etag == etag
+    snapshot = ETFSnapshot(
+        version=prev.version + (not unchanged) if prev else 1,
+        etag=etag,
+        built_at=now,
+        modified_at=prev.modified_at if unchanged else now,
+        signature=signature,
+        items=items,
+        listed=[items[i] for i in listed_rows],
+        by_ticker={e.ticker.upper(): i for i, e in enumerate(items)},
+        table=table,
+        rows_json=rows_json,
+        values=values,
+        full_list=_encode(body),
+        filters=_encode(filters),
+    )
+    logger.info(
+        "ETF snapshot v%d built: %d rows, %d bytes (gzip %d, br %s) in %.0fms",
+        snapshot.version, len(items), len(body), len(snapshot.full_list.gzip),
+        len(snapshot.full_list.br) if snapshot.full_list.br else "-",
+        (time.perf_counter() - started) * 1000,
+    )
+    return snapshot
+
+
+def refresh_snapshot(db: Session | None = None) -> ETFSnapshot:
+    """DB에서 snapshot을 다시 만든다. 커밋 직후 호출."""
+    global _snapshot, _last_probe
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    try:
+        with _lock:
+            _snapshot = _build(db)
+            _last_probe = time.monotonic()
+            return _snapshot
+    finally:
+        if own_session:
+            db.close()
+
+
+def get_snapshot(db: Session) -> ETFSnapshot:
+    """현재 snapshot을 반환. 없으면 만들고, 주기적으로 외부 변경 여부를 확인한다.
+
+    GitHub Actions의 sync_and_push.py처럼 앱을 거치지 않고 DB에 직접 쓰는 경우를
+    위해 SNAPSHOT_PROBE_SECONDS마다 (count, max(data_updated_at), count(delisted_at))를 비교한다.
+    """
+    global _snapshot, _last_probe
+    snapshot = _snapshot
+    if snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                _snapshot = _build(db)
+                _last_probe = time.monotonic()
+            return _snapshot
+
+    if time.monotonic() - _last_probe < SNAPSHOT_PROBE_SECONDS:
+        return snapshot
+
+    # 다른 요청이 이미 확인/재생성 중이면 기존 snapshot을 그대로 사용
+    if not _lock.acquire(blocking=False):
+        return snapshot
+    try:
+        _last_probe = time.monotonic()
+        if _data_signature(db) != _snapshot.signature:
+            logger.info("ETF table changed outside of the app, rebuilding snapshot")
+            _snapshot = _build(db)
+        return _snapshot
+    finally:
+        _lock.release()
+
+
+def current_snapshot(fresh_only: bool = True) -> ETFSnapshot | None:
+    """DB를 보지 않고 현재 snapshot을 반환 (HTTP 캐시 검사용).
+
+    fresh_only이면 외부 변경 확인 주기가 지난 경우 None을 돌려주어, 호출한 쪽이
+    get_snapshot*을 거치는 요청으로 확인하게 한다.
+    """
+    snapshot = _snapshot
+    if fresh_only and time.monotonic() - _last_probe >= SNAPSHOT_PROBE_SECONDS:
+        return None
+    return snapshot
+
+
+def _load_snapshot() -> ETFSnapshot:
+    db = SessionLocal()
+    try:
+        return get_snapshot(db)
+    finally:
+        db.close()
+
+
+async def get_snapshot_async(db: AsyncSession) -> ETFSnapshot:
+    """get_snapshot의 async 버전. 변경 확인 쿼리는 async session으로, 재생성은 thread에서."""
+    global _last_probe
+    snapshot = _snapshot
+    if snapshot is None:
+        return await asyncio.to_thread(_load_snapshot)
+    if time.monotonic() - _last_probe < SNAPSHOT_PROBE_SECONDS:
+        return snapshot
+
+    # event loop 안에서는 먼저 시각을 갱신해 다른 요청이 중복으로 확인하지 않게 한다
+    _last_probe = time.monotonic()
+    if tuple((await db.execute(_SIGNATURE_QUERY)).one()) != snapshot.signature:
+        logger.info("ETF table changed outside of the app, rebuilding snapshot")
+        return await asyncio.to_thread(refresh_snapshot)
+    return snapshot
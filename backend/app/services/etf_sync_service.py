@@ -1,18 +1,27 @@
 import asyncio
 import logging
-from datetime import datetime, timezone
+from dataclasses import dataclass, field
 
-from sqlalchemy.orm import Session
-
-from app.config import BATCH_SIZE, BATCH_DELAY_SECONDS
+from app.config import BATCH_SIZE, SYNC_QUEUE_SIZE
 from app.database import SessionLocal
-from app.models.etf import ETF
+from app.models.sync import SyncRun
+from app.schemas.etf import SyncRunInfo
+from app.services import sync_state
+from app.services.etf_compare import ensure_similarity_index
 from app.services.etf_data_fetcher import compute_returns, fetch_etf_batch
-from app.services.etf_list_provider import fetch_etf_tickers
+from app.services.etf_list_provider import TickerUniverse, load_universe
+from app.services.etf_search_index import ensure_index
+from app.services.etf_snapshot import refresh_snapshot
+from app.services.etf_upsert import bulk_upsert_etfs, existing_tickers, mark_checked
+from app.services.fetch_engine import FetchStats
+from app.services.metrics import ROWS_UPSERTED
+from app.services.sync_pipeline import Pipeline
 
 logger = logging.getLogger(__name__)
 
 _sync_running = False
+_pipeline: Pipeline | None = None
+_fetch_stats: FetchStats | None = None
 
 
 async def run_full_sync() -> str:
@@ -27,53 +36,197 @@ async def run_full_sync() -> str:
         _sync_running = False
 
 
+def _prepare_run(universe: TickerUniverse | None):
+    """중단된 실행이 있으면 이어서, 없으면 오래된 ticker만으로 새 실행을 만든다.
+
+    새 실행은 ticker 목록 diff를 먼저 반영한다: 상장 폐지 표시, 새 ticker 우선.
+    """
+    db = SessionLocal()
+    try:
+        run = sync_state.find_resumable_run(db)
+        if run is not None:
+            logger.info("Resuming sync run #%d at %d/%d", run.id, run.cursor, run.total)
+            return run.id, sync_state.run_tickers(run), run.cursor
+        if universe is None or not universe.tickers:
+            return None, [], 0
+        diff = sync_state.apply_universe(db, universe.tickers, universe.authoritative)
+        if diff.delisted or diff.relisted:
+            refresh_snapshot(db)
+        planned = sync_state.plan_stale_tickers(db, universe.tickers, first=diff.added)
+        if not planned:
+            return None, [], 0
+        run = sync_state.start_run(db, planned)
+        return run.id, planned, 0
+    finally:
+        db.close()
+
+
+def _has_resumable_run() -> bool:
+    with SessionLocal() as db:
+        return sync_state.find_resumable_run(db) is not None
+
+
 async def _do_sync() -> str:
-    tickers = await fetch_etf_tickers()
-    if not tickers:
-        return "No tickers found"
+    global _pipeline, _fetch_stats
+    resumable = await asyncio.to_thread(_has_resumable_run)
 
-    logger.info("Starting sync for %d tickers", len(tickers))
-    total_updated = 0
+    # 이어서 진행할 실행이 있으면 ticker 목록을 다시 받을 필요가 없다
+    universe = None if resumable else await load_universe()
+    if not resumable and not universe.tickers:
+        return "No tickers found"
 
-    for i in range(0, len(tickers), BATCH_SIZE):
+    run_id, tickers, start = await asyncio.to_thread(_prepare_run, universe)
+    if run_id is None:
+        msg = "All tickers are fresh — nothing to sync"
+        logger.info(msg)
+        return msg
+
+    logger.info("Sync run #%d: %d stale tickers (starting at %d)", run_id, len(tickers), start)
+    stats = FetchStats()
+    pipeline = _build_pipeline(run_id, stats)
+    batches = []
+    for i in range(start, len(tickers), BATCH_SIZE):
         batch = tickers[i : i + BATCH_SIZE]
-        logger.info("Processing batch %d-%d of %d", i, i + len(batch), len(tickers))
+        batches.append(_Batch(cursor=i + len(batch), tickers=batch))
 
-        etf_data_list = await asyncio.to_thread(fetch_etf_batch, batch)
-        returns = await asyncio.to_thread(compute_returns, batch)
+    _pipeline = pipeline
+    _fetch_stats = stats
+    try:
+        total_updated = sum(await pipeline.run(batches))
+    except BaseException:
+        # 다음 실행(재시작 포함)이 마지막 checkpoint부터 이어서 진행
+        await asyncio.to_thread(_finish, run_id, "interrupted", "Interrupted")
+        raise
+    finally:
+        logger.info("Pipeline stages: %s", pipeline.summary())
 
-        for data in etf_data_list:
-            t = data["ticker"]
-            if t in returns:
-                data.update(returns[t])
+    if total_updated:
+        snapshot = await asyncio.to_thread(refresh_snapshot)
+        # 챗봇 검색 색인도 미리 갱신 (텍스트가 바뀐 경우에만 다시 만든다)
+        await asyncio.to_thread(ensure_index, snapshot)
+        # "비슷한 ETF" 색인도 새 가격으로 미리 만든다
+        await asyncio.to_thread(ensure_similarity_index, snapshot)
 
-        db = SessionLocal()
+    msg = f"Sync complete: {total_updated}/{len(tickers)} ETFs updated"
+    failed_batches = sum(s.failed for s in pipeline.stats)
+    if failed_batches:
+        msg += f", {failed_batches} batches failed"
+    await asyncio.to_thread(_finish, run_id, "completed", msg)
+    logger.info(msg)
+    logger.info("Fetch stats: %s", stats.summary())
+    return msg
+
+
+@dataclass
+class _Batch:
+    cursor: int  # 이 배치까지 처리하면 run.cursor가 될 값
+    tickers: list[str]
+    records: list[dict] = field(default_factory=list)
+    returns: dict[str, dict] = field(default_factory=dict)
+    error: str | None = None  # 실패한 stage와 예외. 이후 stage는 건너뛰고 write가 전부 실패로 기록
+
+    @property
+    def succeeded(self) -> set[str]:
+        return {data["ticker"] for data in self.records}
+
+
+def _build_pipeline(run_id: int, stats: FetchStats) -> Pipeline:
+    """ticker 배치 → info 조회 → 가격/수익률 → 병합 → DB 쓰기."""
+
+    def skip_failed(fn):
+        return lambda batch: batch if batch.error else fn(batch)
+
+    def fetch_info(batch: _Batch) -> _Batch:
+        logger.info("Fetching info for batch ending %d", batch.cursor)
+        with SessionLocal() as db:
+            known = existing_tickers(db, batch.tickers)
+        batch.records = fetch_etf_batch(batch.tickers, stats, known)
+        return batch
+
+    def fetch_prices(batch: _Batch) -> _Batch:
+        # info 조회에 실패했거나 ETF가 아닌 ticker는 가격을 받을 필요가 없다
+        batch.returns = compute_returns(sorted(batch.succeeded))
+        return batch
+
+    def merge(batch: _Batch) -> _Batch:
+        for data in batch.records:
+            data.update(batch.returns.get(data["ticker"], {}))
+        return batch
+
+    def write(batch: _Batch) -> int:
+        return _write_batch(run_id, batch)
+
+    def on_error(stage: str, batch: _Batch, exc: Exception):
+        # 한 배치의 실패가 sync 전체를 멈추지 않도록 배치에 기록하고 계속 진행
+        logger.error("Stage %s failed on batch ending %d", stage, batch.cursor, exc_info=exc)
+        batch.error = f"{stage}: {exc}"
+        batch.records = []
+        # write에서 실패했으면 (checkpoint 기록도 실패한 경우) 0건으로 센다
+        return 0 if stage == "write" else batch
+
+    return Pipeline(
+        [
+            ("info", skip_failed(fetch_info)),
+            ("prices", skip_failed(fetch_prices)),
+            ("merge", skip_failed(merge)),
+            ("write", write),
+        ],
+        queue_size=SYNC_QUEUE_SIZE,
+        on_error=on_error,
+    )
+
+
+def sync_status() -> dict:
+    """현재/마지막 sync 실행 상태와 pipeline stage별 처리량, 요청 통계."""
+    with SessionLocal() as db:
+        runs = db.query(SyncRun).order_by(SyncRun.id.desc())
+        current = runs.filter(SyncRun.status.in_(sync_state.RESUMABLE)).first()
+        last = runs.filter(SyncRun.finished_at.isnot(None)).first()
+        return {
+            "running": _sync_running,
+            "current": SyncRunInfo.model_validate(current) if current else None,
+            "last": SyncRunInfo.model_validate(last) if last else None,
+            # 현재 실행이 없으면 마지막 실행의 값
+            "pipeline": _pipeline.status() if _pipeline is not None else None,
+            "fetch": _fetch_stats.as_dict() if _fetch_stats is not None else None,
+        }
+
+
+def _write_batch(run_id: int, batch: _Batch) -> int:
+    """ETF upsert와 checkpoint를 한 트랜잭션으로 커밋. 앞 stage에서 실패한 배치는 전부 실패로 기록."""
+    succeeded = batch.succeeded
+    failed = set(batch.tickers) - succeeded
+    db = SessionLocal()
+    try:
+        run = db.get(SyncRun, run_id)
         try:
-            for data in etf_data_list:
-                _upsert_etf(db, data)
+            # 값이 바뀐 row/필드만 쓴다 (data_updated_at은 실제 변경 시각, checked_at은 확인 시각)
+            result = bulk_upsert_etfs(db, batch.records, changed_only=True)
+            mark_checked(db, succeeded)
+            sync_state.record_batch(db, run, batch.cursor, succeeded, failed, result.total)
             db.commit()
-            total_updated += len(etf_data_list)
+            ROWS_UPSERTED.inc(result.inserted, kind="inserted")
+            ROWS_UPSERTED.inc(result.updated, kind="updated")
+            ROWS_UPSERTED.inc(result.unchanged, kind="unchanged")
+            logger.info(
+                "Batch ending %d: %d inserted, %d updated, %d unchanged",
+                batch.cursor, result.inserted, result.updated, result.unchanged,
+            )
+            return result.total
         except Exception:
             db.rollback()
-            logger.exception("DB error on batch %d", i)
-        finally:
-            db.close()
-
-        if i + BATCH_SIZE < len(tickers):
-            await asyncio.sleep(BATCH_DELAY_SECONDS)
-
-    msg = f"Sync complete: {total_updated}/{len(tickers)} ETFs updated"
-    logger.info(msg)
-    return msg
+            logger.exception("DB error on batch ending %d", batch.cursor)
+            run = db.get(SyncRun, run_id)
+            sync_state.record_batch(db, run, batch.cursor, set(), set(batch.tickers), 0)
+            db.commit()
+            return 0
+    finally:
+        db.close()
 
 
-def _upsert_etf(db: Session, data: dict) -> None:
-    etf = db.query(ETF).filter(ETF.ticker == data["ticker"]).first()
-    if etf:
-        for k, v in data.items():
-            if v is not None:
-                setattr(etf, k, v)
-        etf.data_updated_at = datetime.now(timezone.utc)
-    else:
-        etf = ETF(**data)
-        db.add(etf)
+def _finish(run_id: int, status: str, message: str) -> None:
+    db = SessionLocal()
+    try:
+        sync_state.finish_run(db, db.get(SyncRun, run_id), status, message)
+    finally:
+        db.close()
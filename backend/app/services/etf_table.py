@@ -0,0 +1,352 @@
+"""Columnar in-memory copy of the etfs table for list_etfs.
+
+검색(ticker/name 부분일치), category/issuer 필터, 숫자 범위 screen(`where=`), 정렬,
+offset/limit 또는 cursor 페이지를 DB 대신 NumPy 배열 위에서 처리한다. 상장 폐지로
+표시된 row는 include_delisted를 주지 않으면 결과와 facet에서 빠진다. snapshot이
+다시 만들어질 때만 갱신되므로 필터 조합별 건수 캐시도 sync 후 자연히 무효화된다.
+"""
+import base64
+import bisect
+import json
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+from sqlalchemy import Row
+
+from app.schemas.etf import ETFResponse
+from app.services.etf_screen import SCREEN_FIELDS, Predicate, Screen
+
+# description은 정렬 대상이 아님
+SORTABLE_FIELDS = tuple(f for f in ETFResponse.model_fields if f != "description")
+FACET_FIELDS = ("category", "issuer")
+
+_EMPTY = np.empty(0, dtype=np.intp)
+# screen의 가장 작은 clause가 전체의 1/_SPARSE_RATIO보다 크면 bitmap으로 평가
+_SPARSE_RATIO = 32
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_by: str, sort_dir: str, value, ticker: str) -> str:
+    """(정렬 필드, 방향, 마지막 row의 정렬 값, ticker)를 담은 불투명 토큰."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort_by, sort_dir, value, ticker], separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[str, str, object, str]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        sort_by, sort_dir, value, ticker = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(token) from e
+    if not isinstance(ticker, str):
+        raise InvalidCursor(token)
+    return sort_by, sort_dir, value, ticker
+
+
+class _SortColumn:
+    """컬럼 값을 float64 정렬 키와 NULL 여부로 바꾼 것. 문자열은 순위로 치환."""
+
+    def __init__(self, values: list):
+        self.nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+        present = [v for v in values if v is not None]
+        self.kind = "num"
+        self.ranks: list[str] = []
+        if present and isinstance(present[0], str):
+            self.kind = "str"
+            self.ranks = sorted(set(present))
+            rank = {v: i for i, v in enumerate(self.ranks)}
+            keys = [rank[v] if v is not None else 0 for v in values]
+        elif present and isinstance(present[0], datetime):
+            self.kind = "datetime"
+            keys = [v.timestamp() if v is not None else 0 for v in values]
+        else:
+            keys = [v if v is not None else 0 for v in values]
+        self.keys = np.asarray(keys, dtype=np.float64)
+
+    def key_of(self, value) -> float:
+        """cursor에 담긴 값의 정렬 키. 지금은 없는 문자열 값도 순서상 위치로 환산."""
+        if self.kind == "str":
+            if not isinstance(value, str):
+                raise InvalidCursor(value)
+            i = bisect.bisect_left(self.ranks, value)
+            return float(i) if i < len(self.ranks) and self.ranks[i] == value else i - 0.5
+        if self.kind == "datetime":
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except (TypeError, ValueError) as e:
+                raise InvalidCursor(value) from e
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise InvalidCursor(value)
+        return float(value)
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class ETFTable:
+    """ticker 오름차순으로 정렬된 ETF 목록 위의 필터/정렬/페이지 엔진.
+
+    - 정렬: 컬럼마다 asc/desc argsort를 미리 계산. NULL은 SQLite의 ORDER BY와 같이
+      가장 작은 값으로 취급 (asc는 맨 앞, desc는 맨 뒤), 같은 값은 ticker 순.
+    - 검색: 소문자 "ticker\\0name" 문자열의 trigram → row index 역색인으로 후보를
+      좁힌 뒤 부분일치로 확인 (ILIKE '%term%'와 동일한 결과).
+    - screen: asc 정렬 키에서 이진 탐색으로 조건별 정렬 위치 구간을 구하고, row별
+      정렬 위치(rank)로 다른 조건을 확인한다. 건수가 가장 적은 clause의 row만 훑으므로
+      전체 row 수가 아니라 결과 크기에 비례한다.
+    """
+
+    def __init__(self, items: list[Row], delisted: frozenset[str] = frozenset()):
+        self.items = items
+        self.size = len(items)
+
+        self._tickers = [e.ticker for e in items]
+        hidden = np.fromiter((t in delisted for t in self._tickers), dtype=bool, count=self.size)
+        self.listed_rows = np.flatnonzero(~hidden)
+        # 상장 폐지 row가 없으면 기본 조회에 필터를 걸 필요가 없다
+        self._listed_only = self.listed_rows if hidden.any() else None
+        self._columns: dict[str, _SortColumn] = {}
+        self._orders: dict[tuple[str, str], np.ndarray] = {}
+        # cursor 위치 탐색용: 정렬 순서대로 늘어놓은 (방향 반영) 키와 NULL이 아닌 row의 위치 구간
+        self._sorted_keys: dict[tuple[str, str], np.ndarray] = {}
+        self._non_null: dict[tuple[str, str], tuple[int, int]] = {}
+        for field in SORTABLE_FIELDS:
+            column = self._columns[field] = _SortColumn([getattr(e, field) for e in items])
+            keys, nulls = column.keys, column.nulls
+            null_count = int(nulls.sum())
+            # np.lexsort는 안정 정렬이므로 동률이면 원래 순서(ticker 순)가 유지된다
+            for direction, directed, nulls_key, span in (
+                ("asc", keys, ~nulls, (null_count, self.size)),
+                ("desc", -keys, nulls, (0, self.size - null_count)),
+            ):
+                order = np.lexsort((directed, nulls_key))
+                self._orders[(field, direction)] = order
+                self._sorted_keys[(field, direction)] = directed[order]
+                self._non_null[(field, direction)] = span
+        # screen용: row → asc 정렬 위치. NULL은 맨 앞 위치라 어떤 구간에도 들지 않는다
+        self._ranks: dict[str, np.ndarray] = {}
+        for field in SCREEN_FIELDS:
+            rank = np.empty(self.size, dtype=np.int32)
+            rank[self._orders[(field, "asc")]] = np.arange(self.size, dtype=np.int32)
+            self._ranks[field] = rank
+
+        self._category_rows = self._group_rows("category")
+        self._issuer_rows = self._group_rows("issuer")
+        # facet: 정렬된 값 목록과 row별 값 번호 (NULL은 -1), 상장 중인 row에 있는 값 목록
+        self._facets: dict[str, tuple[list[str], np.ndarray]] = {}
+        self._listed_facets: dict[str, list[str]] = {}
+        for field, groups in (("category", self._category_rows), ("issuer", self._issuer_rows)):
+            names = sorted(groups)
+            codes = np.full(self.size, -1, dtype=np.intp)
+            for code, name in enumerate(names):
+                codes[groups[name]] = code
+            self._facets[field] = (names, codes)
+            listed_codes = np.unique(codes[self.listed_rows])
+            self._listed_facets[field] = [names[c] for c in listed_codes if c >= 0]
+
+        self._haystack = [f"{e.ticker}\0{e.name or ''}".lower() for e in items]
+        postings: dict[str, list[int]] = {}
+        for i, text in enumerate(self._haystack):
+            for gram in _trigrams(text):
+                postings.setdefault(gram, []).append(i)
+        self._trigram_rows = {g: np.asarray(rows, dtype=np.intp) for g, rows in postings.items()}
+        # 같은 검색어/필터 조합이 반복되므로 결과와 건수를 table 수명 동안 캐시
+        self._search_rows = lru_cache(maxsize=512)(self._find_rows)
+        self._filtered = lru_cache(maxsize=256)(self._filter_mask)
+        self._facet_counts = lru_cache(maxsize=256)(self._count_facets)
+
+    def _group_rows(self, field: str) -> dict[str, np.ndarray]:
+        groups: dict[str, list[int]] = {}
+        for i, e in enumerate(self.items):
+            value = getattr(e, field)
+            if value is not None:
+                groups.setdefault(value, []).append(i)
+        return {k: np.asarray(v, dtype=np.intp) for k, v in groups.items()}
+
+    def _find_rows(self, search: str) -> np.ndarray:
+        term = search.lower()
+        if len(term) < 3:
+            candidates = range(self.size)
+        else:
+            grams = sorted((self._trigram_rows.get(g, _EMPTY) for g in _trigrams(term)), key=len)
+            candidates = grams[0]
+            for rows in grams[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, rows, assume_unique=True)
+        haystack = self._haystack
+        return np.fromiter((i for i in candidates if term in haystack[i]), dtype=np.intp)
+
+    def _span(self, predicate: Predicate) -> tuple[int, int]:
+        """조건에 맞는 row들의 asc 정렬 위치 구간 [lo, hi)."""
+        start, end = self._non_null[(predicate.field, "asc")]
+        keys = self._sorted_keys[(predicate.field, "asc")][start:end]
+        lo, hi = 0, len(keys)
+        if predicate.low is not None:
+            lo = int(np.searchsorted(keys, predicate.low, side="left" if predicate.low_inclusive else "right"))
+        if predicate.high is not None:
+            hi = int(np.searchsorted(keys, predicate.high, side="right" if predicate.high_inclusive else "left"))
+        return start + lo, start + max(lo, hi)
+
+    def screen_rows(self, screen: Screen) -> np.ndarray:
+        """CNF screen(clause끼리 AND, clause 안은 OR)에 맞는 row index (오름차순)."""
+        clauses = [[(p.field, *self._span(p)) for p in clause] for clause in screen]
+        clauses.sort(key=lambda c: sum(hi - lo for _, lo, hi in c))
+        if sum(hi - lo for _, lo, hi in clauses[0]) * _SPARSE_RATIO > self.size:
+            # 후보가 많으면 전체 row의 rank 비교(bitmap AND/OR)가 정렬보다 싸다
+            mask = np.ones(self.size, dtype=bool)
+            for clause in clauses:
+                hit = np.zeros(self.size, dtype=bool)
+                for f, lo, hi in clause:
+                    rank = self._ranks[f]
+                    hit |= (rank >= lo) & (rank < hi)
+                mask &= hit
+            return np.flatnonzero(mask)
+        # 가장 작은 clause의 row를 후보로 삼고 나머지 clause는 rank 비교로 거른다
+        first = [self._orders[(f, "asc")][lo:hi] for f, lo, hi in clauses[0]]
+        rows = np.sort(first[0]) if len(first) == 1 else np.unique(np.concatenate(first))
+        for clause in clauses[1:]:
+            if not len(rows):
+                break
+            keep = np.zeros(len(rows), dtype=bool)
+            for f, lo, hi in clause:
+                rank = self._ranks[f][rows]
+                keep |= (rank >= lo) & (rank < hi)
+            rows = rows[keep]
+        return rows
+
+    def _filter_mask(
+        self, search: str | None, category: str | None, issuer: str | None, screen: Screen = (),
+        include_delisted: bool = False,
+    ):
+        """(조건에 맞는 row mask 또는 필터 없음이면 None, 건수)."""
+        mask = None
+        for rows in (
+            None if include_delisted else self._listed_only,
+            self._search_rows(search) if search else None,
+            self._category_rows.get(category, _EMPTY) if category else None,
+            self._issuer_rows.get(issuer, _EMPTY) if issuer else None,
+            self.screen_rows(screen) if screen else None,
+        ):
+            if rows is None:
+                continue
+            selected = np.zeros(self.size, dtype=bool)
+            selected[rows] = True
+            mask = selected if mask is None else mask & selected
+        return mask, self.size if mask is None else int(mask.sum())
+
+    def facet_values(self, field: str, include_delisted: bool = False) -> list[str]:
+        return self._facets[field][0] if include_delisted else self._listed_facets[field]
+
+    def _count_facets(
+        self, search: str | None, category: str | None, issuer: str | None, include_delisted: bool,
+    ) -> dict[str, dict[str, int]]:
+        result = {}
+        for field in FACET_FIELDS:
+            names, codes = self._facets[field]
+            # 각 facet은 자기 자신의 선택을 뺀 조건으로 센다 (다른 값으로 바꿨을 때의 건수)
+            mask, _ = self._filtered(
+                search, None if field == "category" else category, None if field == "issuer" else issuer,
+                (), include_delisted,
+            )
+            selected = codes if mask is None else codes[mask]
+            counts = np.bincount(selected[selected >= 0], minlength=len(names))
+            result[field] = {names[i]: int(n) for i, n in enumerate(counts) if n}
+        return result
+
+    def facet_counts(
+        self, search: str | None = None, category: str | None = None, issuer: str | None = None,
+        include_delisted: bool = False,
+    ) -> dict[str, dict[str, int]]:
+        """facet 필드별 {값: 건수}. 건수가 0인 값은 빠진다. 결과는 캐시되므로 수정하지 말 것."""
+        return self._facet_counts(search or None, category or None, issuer or None, include_delisted)
+
+    def query(
+        self,
+        sort_by: str = "ticker",
+        sort_dir: str = "asc",
+        search: str | None = None,
+        category: str | None = None,
+        issuer: str | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        screen: Screen = (),
+        include_delisted: bool = False,
+    ) -> tuple[np.ndarray, int]:
+        """조건에 맞는 row index(정렬/페이지 적용)와 전체 건수를 반환."""
+        mask, total = self._filtered(search or None, category or None, issuer or None, screen, include_delisted)
+        order = self._orders[(sort_by, sort_dir)]
+        if mask is not None:
+            order = order[mask[order]]
+
+        end = None if limit is None else offset + limit
+        return order[offset:end], total
+
+    def _position_after(self, sort_by: str, sort_dir: str, value, ticker: str) -> int:
+        """정렬 순서에서 (value, ticker) 바로 다음 row의 위치 (이진 탐색)."""
+        order = self._orders[(sort_by, sort_dir)]
+        start, end = self._non_null[(sort_by, sort_dir)]
+        # ticker 순 = row 번호 순이므로 동률 구간에서는 row 번호로 비교
+        after_row = bisect.bisect_right(self._tickers, ticker)
+        if value is None:
+            # NULL 구간: asc면 [0, start), desc면 [end, size)
+            lo, hi = (0, start) if sort_dir == "asc" else (end, self.size)
+            return lo + int(np.searchsorted(order[lo:hi], after_row))
+
+        key = self._columns[sort_by].key_of(value)
+        if sort_dir == "desc":
+            key = -key
+        keys = self._sorted_keys[(sort_by, sort_dir)][start:end]
+        lo = start + int(np.searchsorted(keys, key, side="left"))
+        hi = start + int(np.searchsorted(keys, key, side="right"))
+        return lo + int(np.searchsorted(order[lo:hi], after_row))
+
+    def query_after(
+        self,
+        sort_by: str = "ticker",
+        sort_dir: str = "asc",
+        cursor: str | None = None,
+        search: str | None = None,
+        category: str | None = None,
+        issuer: str | None = None,
+        limit: int = 100,
+        screen: Screen = (),
+        include_delisted: bool = False,
+    ) -> tuple[np.ndarray, int, str | None]:
+        """cursor 다음부터 limit개 row, 전체 건수, 다음 페이지 cursor(없으면 None).
+
+        시작 위치는 이진 탐색으로 찾고, 필터가 있으면 그 위치부터 필요한 만큼만
+        확인하므로 페이지 깊이와 무관하게 일정한 비용이 든다.
+        """
+        start = 0
+        if cursor:
+            c_sort_by, c_sort_dir, value, ticker = decode_cursor(cursor)
+            if (c_sort_by, c_sort_dir) != (sort_by, sort_dir):
+                raise InvalidCursor(cursor)
+            start = self._position_after(sort_by, sort_dir, value, ticker)
+
+        mask, total = self._filtered(search or None, category or None, issuer or None, screen, include_delisted)
+        order = self._orders[(sort_by, sort_dir)]
+        if mask is None:
+            rows = order[start : start + limit + 1]
+        else:
+            picked, pos, chunk = [], start, max(limit * 4, 256)
+            while pos < self.size and sum(map(len, picked)) <= limit:
+                window = order[pos : pos + chunk]
+                picked.append(window[mask[window]])
+                pos += chunk
+                chunk *= 2
+            rows = np.concatenate(picked)[: limit + 1] if picked else _EMPTY
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = self.items[rows[-1]]
+            next_cursor = encode_cursor(sort_by, sort_dir, getattr(last, sort_by), last.ticker)
+        return rows, total, next_cursor
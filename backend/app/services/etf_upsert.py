@@ -0,0 +1,154 @@
+"""Batched ETF upsert shared by the sync service, bulk-update API and sync script.
+
+배치 전체를 `INSERT ... ON CONFLICT (ticker) DO UPDATE` 한 문장으로 쓴다.
+기존 값은 None으로 덮어쓰지 않는다 (COALESCE(excluded.col, etfs.col)).
+changed_only이면 현재 DB 값과 같은 필드는 빼고, 바뀐 필드가 없는 row는 쓰지 않는다
+(data_updated_at = 마지막으로 값이 바뀐 시각). sync가 확인했다는 기록은 mark_checked가
+checked_at에 따로 남긴다.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.etf import ETF, normalize_ticker
+
+_TABLE = ETF.__table__
+ETF_COLUMNS = tuple(c.key for c in _TABLE.columns if c.key not in ("id", "created_at"))
+
+_DIALECT_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert,
+}
+# 한 문장에 넣을 수 있는 bind parameter 수 (SQLite 구버전 999, Postgres 65535)
+_MAX_PARAMS = {
+    "postgresql": 30000,
+    "sqlite": 999,
+}
+
+
+@dataclass
+class UpsertResult:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0  # changed_only에서 바뀐 값이 없어 건너뛴 row
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated
+
+
+def _merge_records(records: list[dict]) -> dict[str, dict]:
+    """허용 컬럼만 남기고 대문자 ticker 기준으로 합친다 (나중 값 우선, None은 무시)."""
+    merged: dict[str, dict] = {}
+    for data in records:
+        ticker = data.get("ticker")
+        if not isinstance(ticker, str) or not ticker.strip():
+            continue
+        ticker = normalize_ticker(ticker)
+        row = merged.setdefault(ticker, {})
+        for k, v in data.items():
+            if k in ETF_COLUMNS and (v is not None or k not in row):
+                row[k] = v
+        row["ticker"] = ticker
+    return merged
+
+
+def _drop_unchanged(db: Session, merged: dict[str, dict]) -> int:
+    """현재 값과 같은 필드를 지우고, 남는 필드가 없는 row는 merged에서 뺀다. 뺀 row 수를 반환.
+
+    data_updated_at은 비교하지 않고 다른 필드가 바뀐 경우에만 함께 쓴다.
+    """
+    columns = [_TABLE.c[c] for c in ETF_COLUMNS]
+    current = {
+        row.ticker: row._mapping
+        for row in db.execute(select(*columns).where(_TABLE.c.ticker.in_(list(merged))))
+    }
+    dropped = 0
+    for ticker in list(merged):
+        row = current.get(ticker)
+        if row is None:
+            continue
+        data = merged[ticker]
+        changed = {
+            k: v for k, v in data.items()
+            if k not in ("ticker", "data_updated_at") and v is not None and v != row[k]
+        }
+        if not changed:
+            del merged[ticker]
+            dropped += 1
+            continue
+        changed["ticker"] = ticker
+        if "data_updated_at" in data:
+            changed["data_updated_at"] = data["data_updated_at"]
+        merged[ticker] = changed
+    return dropped
+
+
+def bulk_upsert_etfs(db: Session, records: list[dict], changed_only: bool = False) -> UpsertResult:
+    """records를 etfs 테이블에 upsert. 커밋은 호출자가 한다."""
+    merged = _merge_records(records)
+    unchanged = _drop_unchanged(db, merged) if changed_only and merged else 0
+    if not merged:
+        return UpsertResult(unchanged=unchanged)
+
+    existing = set(
+        db.scalars(select(ETF.ticker).where(ETF.ticker.in_(list(merged)))).all()
+    )
+    result = UpsertResult(inserted=len(merged) - len(existing), updated=len(existing), unchanged=unchanged)
+
+    dialect = db.get_bind().dialect.name
+    insert = _DIALECT_INSERTS.get(dialect)
+    if insert is None:
+        _upsert_rowwise(db, merged)
+        return result
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {**{c: data.get(c) for c in ETF_COLUMNS}, "created_at": now}
+        for data in merged.values()
+    ]
+    chunk = max(1, _MAX_PARAMS[dialect] // (len(ETF_COLUMNS) + 1))
+    for i in range(0, len(rows), chunk):
+        stmt = insert(_TABLE).values(rows[i : i + chunk])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_TABLE.c.ticker],
+            set_={
+                c: func.coalesce(stmt.excluded[c], _TABLE.c[c])
+                for c in ETF_COLUMNS
+                if c != "ticker"
+            },
+        )
+        db.execute(stmt)
+    return result
+
+
+def _upsert_rowwise(db: Session, merged: dict[str, dict]) -> None:
+    """ON CONFLICT를 지원하지 않는 DB용 (기존 방식)."""
+    for ticker, data in merged.items():
+        etf = db.query(ETF).filter(ETF.ticker == ticker).first()
+        if etf:
+            for k, v in data.items():
+                if v is not None:
+                    setattr(etf, k, v)
+        else:
+            db.add(ETF(**data))
+
+
+def existing_tickers(db: Session, tickers: list[str]) -> set[str]:
+    """tickers 중 이름까지 채워진 row가 이미 있는 ticker."""
+    if not tickers:
+        return set()
+    return set(db.scalars(select(ETF.ticker).where(ETF.ticker.in_(list(tickers)), ETF.name.isnot(None))))
+
+
+def mark_checked(db: Session, tickers: set[str] | list[str], at: datetime | None = None) -> None:
+    """sync가 확인한 ticker의 checked_at을 갱신 (값이 바뀌지 않은 row 포함). 커밋은 호출자가 한다."""
+    at = at or datetime.now(timezone.utc)
+    names = sorted(tickers)
+    chunk = _MAX_PARAMS["sqlite"] - 1
+    for i in range(0, len(names), chunk):
+        db.execute(update(_TABLE).where(_TABLE.c.ticker.in_(names[i : i + chunk])).values(checked_at=at))
@@ -0,0 +1,180 @@
+"""Concurrent fetch engine behind a shared, adaptive token-bucket rate limiter.
+
+여러 worker thread가 하나의 전역 token bucket을 공유한다. 429가 나오면 속도를
+절반으로 줄이고 잠시 전체를 멈추며, 429 없이 성공이 이어지면 설정된 상한까지
+조금씩 속도를 올린다 (AIMD).
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, TypeVar
+
+from app.services.metrics import FETCH_FAILURES, FETCH_RATE_LIMITED, FETCH_REQUESTS, FETCH_RETRIES, FETCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class RateLimited(Exception):
+    """Upstream이 요청을 거절함 (HTTP 429 또는 빈 응답)."""
+
+
+def is_rate_limited_error(err: str) -> bool:
+    # 빈 응답(JSON 파싱 실패)도 Yahoo의 일시적 차단이므로 429와 같이 취급
+    return any(s in err for s in ("429", "Too Many Requests", "Rate limited", "Expecting value", "char 0"))
+
+
+class AdaptiveTokenBucket:
+    """Thread-safe token bucket. 429 시 감속 + cooldown, 성공 시 점진적 가속."""
+
+    def __init__(
+        self,
+        max_rate: float,
+        min_rate: float = 0.1,
+        cooldown_seconds: float = 30.0,
+        increase_per_success: float = 0.05,
+    ):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.increase_per_success = increase_per_success
+        self.rate = max_rate
+        self._capacity = max(1.0, max_rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """토큰 하나를 얻을 때까지 대기."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_per_success)
+
+    def on_rate_limited(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, now + self.cooldown_seconds)
+        logger.warning("Rate limited — slowing down to %.2f req/s for the next requests", self.rate)
+
+
+@dataclass
+class FetchStats:
+    """sync 실행 단위의 요청 통계."""
+
+    requests: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    rate_limited: int = 0
+    retries: int = 0
+    started: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for k, v in counts.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """초당 처리한 ticker 수."""
+        elapsed = self.elapsed
+        return (self.succeeded + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def rate_limited_ratio(self) -> float:
+        return self.rate_limited / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "elapsed_seconds": round(self.elapsed, 1),
+            "tickers_per_second": round(self.throughput, 3),
+            "rate_limited_ratio": round(self.rate_limited_ratio, 4),
+        }
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests in {self.elapsed:.0f}s "
+            f"({self.throughput:.2f} tickers/s), {self.succeeded} ok, {self.failed} failed, "
+            f"{self.rate_limited} rate-limited ({self.rate_limited_ratio:.1%}), {self.retries} retries"
+        )
+
+
+def fetch_concurrently(
+    items: list[T],
+    fn: Callable[[T], R],
+    limiter: AdaptiveTokenBucket,
+    workers: int,
+    stats: FetchStats | None = None,
+    max_attempts: int = 3,
+) -> list[R | None]:
+    """items 각각에 fn을 동시에 적용. 요청마다 limiter 토큰을 하나 소비한다.
+
+    fn이 RateLimited를 던지면 limiter를 감속시키고 max_attempts까지 재시도한다.
+    그 밖의 예외는 실패로 집계하고 None을 돌려준다. 결과 순서는 items 순서와 같다.
+    """
+    stats = stats if stats is not None else FetchStats()
+
+    def run(item: T) -> R | None:
+        for attempt in range(max_attempts):
+            limiter.acquire()
+            stats.add(requests=1, retries=1 if attempt else 0)
+            FETCH_REQUESTS.inc(kind="info")
+            if attempt:
+                FETCH_RETRIES.inc(kind="info")
+            try:
+                with FETCH_SECONDS.time(kind="info"):
+                    result = fn(item)
+            except RateLimited:
+                stats.add(rate_limited=1)
+                FETCH_RATE_LIMITED.inc(kind="info")
+                limiter.on_rate_limited()
+                continue
+            except Exception:
+                logger.warning("Failed to fetch %s", item, exc_info=True)
+                stats.add(failed=1)
+                FETCH_FAILURES.inc(reason="error")
+                return None
+            limiter.on_success()
+            stats.add(succeeded=1)
+            return result
+        logger.warning("Giving up on %s after %d rate-limited attempts", item, max_attempts)
+        stats.add(failed=1)
+        FETCH_FAILURES.inc(reason="rate_limited")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fetch") as pool:
+        return list(pool.map(run, items))
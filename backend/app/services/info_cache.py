@@ -0,0 +1,153 @@
+"""Per-ticker `.info` tier schedule: last check time, refresh interval and content hash.
+
+ticker마다 `INFO_CACHE_DIR/<TICKER>.json.gz`에 마지막 조회 시각과 quoteType, 그리고
+`.info`에서 오는 tier별로 (값 hash, 확인 시각, 다음 조회까지의 간격)을 저장한다.
+
+    static        이름/설명/발행사/분류/벤치마크 등 — 기본 STATIC_TTL_HOURS (매주)
+    fundamentals  AUM, 보수, 배당, 평균 수익률 — 기본 FUNDAMENTALS_TTL_HOURS (매일)
+    quote         가격/거래량 — `.info`가 아니라 장중 quote refresh가 묶음으로 갱신
+
+조회했는데 tier 값이 그대로면 그 tier의 간격을 두 배로 늘리고 (기본값의
+INFO_TTL_MAX_FACTOR배까지), 바뀌었으면 기본값으로 되돌린다. sync는 어느 tier의 간격도
+지나지 않은 ticker는 `.info`를 조회하지 않고 가격에서 나오는 수익률만 갱신한다
+(info_due). ETF가 아니라고 확인된 ticker는 NON_ETF_RECHECK_HOURS 동안 다시 조회하지 않는다.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from app.config import (
+    FUNDAMENTALS_TTL_HOURS, INFO_CACHE_DIR, INFO_TTL_MAX_FACTOR, NON_ETF_RECHECK_HOURS, STATIC_TTL_HOURS,
+)
+
+logger = logging.getLogger(__name__)
+
+# `.info`에서 오는 tier (quote tier는 quote_refresher가 담당)
+TIERS: dict[str, tuple[str, ...]] = {
+    "static": ("name", "description", "issuer", "category", "underlying_index", "exchange", "inception_date"),
+    "fundamentals": (
+        "market_cap", "net_assets", "expense_ratio", "dividend_yield", "ex_dividend_date",
+        "return_3y_avg", "return_5y_avg",
+    ),
+}
+TIER_TTL_HOURS = {"static": STATIC_TTL_HOURS, "fundamentals": FUNDAMENTALS_TTL_HOURS}
+ETF_QUOTE_TYPES = ("ETF", "MUTUALFUND")
+
+_SAFE_NAME = re.compile(r"[^A-Z0-9.\-^=]")
+
+
+@dataclass(frozen=True)
+class TierState:
+    hash: str
+    checked_at: datetime
+    ttl_hours: float
+
+    @property
+    def expires_at(self) -> datetime:
+        return self.checked_at + timedelta(hours=self.ttl_hours)
+
+
+@dataclass(frozen=True)
+class CachedInfo:
+    fetched_at: datetime
+    quote_type: str | None
+    tiers: dict[str, TierState]
+
+
+def _path(ticker: str):
+    return INFO_CACHE_DIR / f"{_SAFE_NAME.sub('_', ticker.upper())}.json.gz"
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def tier_hashes(record: dict) -> dict[str, str]:
+    """파싱한 record의 tier별 값 hash."""
+    return {
+        tier: hashlib.sha256(
+            json.dumps([record.get(f) for f in fields], default=str).encode()
+        ).hexdigest()[:16]
+        for tier, fields in TIERS.items()
+    }
+
+
+def load(ticker: str) -> CachedInfo | None:
+    try:
+        with gzip.open(_path(ticker), "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return CachedInfo(
+            fetched_at=_utc(datetime.fromisoformat(data["fetched_at"])),
+            quote_type=data.get("quote_type"),
+            tiers={
+                tier: TierState(t["hash"], _utc(datetime.fromisoformat(t["checked_at"])), float(t["ttl_hours"]))
+                for tier, t in data.get("tiers", {}).items()
+            },
+        )
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError):
+        logger.warning("Ignoring unreadable info cache for %s", ticker)
+        return None
+
+
+def _next_tiers(previous: CachedInfo | None, hashes: dict[str, str], now: datetime) -> dict[str, TierState]:
+    tiers = {}
+    for tier, h in hashes.items():
+        base = TIER_TTL_HOURS[tier]
+        old = previous.tiers.get(tier) if previous is not None else None
+        ttl = min(old.ttl_hours * 2, base * INFO_TTL_MAX_FACTOR) if old is not None and old.hash == h else base
+        tiers[tier] = TierState(h, now, ttl)
+    return tiers
+
+
+def store(ticker: str, info: dict, record: dict | None) -> set[str]:
+    """quoteType과 tier 상태를 저장하고, 이전 조회 대비 바뀐 tier를 반환.
+
+    record가 None이면 (ETF가 아님 등) quoteType만 의미가 있다.
+    """
+    previous = load(ticker)
+    now = datetime.now(timezone.utc)
+    hashes = tier_hashes(record) if record is not None else {}
+    tiers = _next_tiers(previous, hashes, now)
+    changed = {t for t, s in tiers.items() if previous is None or t not in previous.tiers or previous.tiers[t].hash != s.hash}
+
+    path = _path(ticker)
+    tmp = path.with_suffix(".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump({
+                "fetched_at": now.isoformat(),
+                "quote_type": info.get("quoteType"),
+                "tiers": {
+                    t: {"hash": s.hash, "checked_at": s.checked_at.isoformat(), "ttl_hours": s.ttl_hours}
+                    for t, s in tiers.items()
+                },
+            }, f)
+        tmp.replace(path)
+    except OSError:
+        # 캐시는 최적화일 뿐이므로 실패해도 sync는 계속
+        logger.warning("Could not write info cache for %s", ticker, exc_info=True)
+    return changed
+
+
+def info_due(ticker: str) -> bool:
+    """`.info`를 다시 조회해야 하는지: 기록이 없거나 어느 tier든 간격이 지났으면 True."""
+    cached = load(ticker)
+    if cached is None or set(cached.tiers) != set(TIERS):
+        return True
+    now = datetime.now(timezone.utc)
+    return any(s.expires_at <= now for s in cached.tiers.values())
+
+
+def known_non_etf(ticker: str) -> bool:
+    """NON_ETF_RECHECK_HOURS 안에 ETF가 아니라고 확인된 ticker (다시 조회하지 않는다)."""
+    cached = load(ticker)
+    if cached is None or cached.quote_type in ETF_QUOTE_TYPES or cached.quote_type is None:
+        return False
+    return datetime.now(timezone.utc) - cached.fetched_at < timedelta(hours=NON_ETF_RECHECK_HOURS)
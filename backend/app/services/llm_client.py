@@ -0,0 +1,36 @@
+"""Process-wide AsyncOpenAI client.
+
+요청마다 client를 만들면 매번 TCP/TLS 연결을 새로 맺으므로, 연결 pool을 가진
+client 하나를 공유한다. 앱 종료 시 close_client()로 정리.
+"""
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import LLM_MAX_CONNECTIONS, LLM_TIMEOUT_SECONDS, OPENAI_API_KEY, OPENAI_BASE_URL
+
+_client: AsyncOpenAI | None = None
+
+
+def get_client() -> AsyncOpenAI:
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL or None,
+            max_retries=1,
+            http_client=httpx.AsyncClient(
+                timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10),
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                ),
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,150 @@
+"""Minimal in-process metrics registry with Prometheus text exposition.
+
+Counter와 Summary(최근 관측값 reservoir로 p50/p95 계산)만 제공한다. 값은 프로세스
+단위이며 재시작 시 초기화된다.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_RESERVOIR_SIZE = 1024
+_QUANTILES = (0.5, 0.95)
+
+
+def _label_key(labels: dict[str, str]) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value:.15g}")
+        return lines
+
+
+class _Series:
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples: deque[float] = deque(maxlen=_RESERVOIR_SIZE)
+
+
+class Summary:
+    """관측 횟수/합계와 최근 _RESERVOIR_SIZE개 관측값의 p50/p95."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._series: dict[tuple, _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.count += 1
+            series.total += value
+            series.samples.append(value)
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> dict[tuple, dict]:
+        out = {}
+        with self._lock:
+            for key, series in self._series.items():
+                ordered = sorted(series.samples)
+                quantiles = {
+                    q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+                    for q in _QUANTILES
+                }
+                out[key] = {"count": series.count, "sum": series.total, "quantiles": quantiles}
+        return out
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} summary"]
+        for key, data in sorted(self.snapshot().items()):
+            for q, value in data["quantiles"].items():
+                lines.append(f"{self.name}{_format_labels(key, (('quantile', q),))} {value:.6g}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {data['sum']:.6g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {data['count']}")
+        return lines
+
+
+_registry: dict[str, Counter | Summary] = {}
+_registry_lock = threading.Lock()
+
+
+def counter(name: str, help: str) -> Counter:
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Counter(name, help)
+        return metric
+
+
+def summary(name: str, help: str) -> Summary:
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Summary(name, help)
+        return metric
+
+
+def render_prometheus() -> str:
+    lines: list[str] = []
+    for name in sorted(_registry):
+        lines.extend(_registry[name].render())
+    return "\n".join(lines) + "\n"
+
+
+# ── 공용 지표 ──
+FETCH_REQUESTS = counter("etf_fetch_requests_total", "yfinance requests made by the fetch engine")
+FETCH_RATE_LIMITED = counter("etf_fetch_rate_limited_total", "Requests rejected with 429 or an empty response")
+FETCH_RETRIES = counter("etf_fetch_retries_total", "Requests retried after being rate limited")
+FETCH_FAILURES = counter("etf_fetch_failures_total", "Tickers that could not be fetched, by reason")
+FETCH_SECONDS = summary("etf_fetch_request_seconds", "Latency of single yfinance requests")
+DOWNLOAD_BYTES = counter("etf_download_bytes_total", "Response bytes downloaded from ticker list providers")
+PRICE_BARS = counter("etf_price_bars_downloaded_total", "Daily bars appended to the price store")
+SYNC_STAGE_SECONDS = summary("etf_sync_stage_seconds", "Time spent per batch in each sync pipeline stage")
+ROWS_UPSERTED = counter("etf_rows_upserted_total", "ETF rows handled by bulk upserts, by kind (inserted/updated/unchanged)")
+INFO_TIER_CHANGES = counter("etf_info_tier_changes_total", "Fetched .info payloads whose parsed fields changed, by tier")
+INFO_SKIPPED = counter("etf_info_skipped_total", "Synced tickers whose .info tiers were all still fresh (no request)")
+API_SECONDS = summary("etf_api_seconds", "API hot-path timings by endpoint and phase")
@@ -0,0 +1,148 @@
+"""Chart series from the local price store, downsampled on the server.
+
+`/api/etfs/{ticker}/history`용. price_store의 memmap에서 기간만 잘라내고 다음 중 하나로
+줄인다. 요청 중에는 yfinance를 호출하지 않는다.
+
+    line  종가. resolution=auto이면 LTTB(Largest-Triangle-Three-Buckets)로 points개,
+          1w/1mo이면 기간별 마지막 종가
+    ohlc  open/high/low/close/volume. auto이면 bar 수가 같은 points개 구간,
+          1w/1mo이면 달력 기간별로 묶는다
+
+결과는 (ticker, rewrite 횟수, 저장된 bar 수, 마지막 날짜, 파라미터)로 캐시하므로 price
+store가 갱신되거나 재조정되면 자동으로 새로 계산된다.
+"""
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+from app.services import price_store
+from app.services.etf_encoder import render_json
+
+RANGES = {"1m": 31, "3m": 92, "6m": 183, "ytd": None, "1y": 366, "3y": 365 * 3 + 1, "5y": 365 * 5 + 2, "max": None}
+
+_OHLC_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class _Series:
+    days: np.ndarray
+    columns: dict[str, np.ndarray]
+
+
+def range_start(last: int, range_: str) -> int | None:
+    """마지막 날짜(last) 기준 기간의 첫 날짜. max이면 None."""
+    if range_ == "max":
+        return None
+    if range_ == "ytd":
+        return price_store.to_day(date(price_store.from_day(last).year, 1, 1))
+    return last - RANGES[range_]
+
+
+def _slice(bars: np.ndarray, range_: str) -> np.ndarray:
+    """마지막 bar 날짜 기준으로 기간을 자른다 (종가가 없는 bar 제외)."""
+    bars = bars[np.isfinite(bars["close"])]
+    if not len(bars):
+        return bars
+    start = range_start(int(bars["date"][-1]), range_)
+    if start is None:
+        return bars
+    return bars[np.searchsorted(bars["date"], start, side="left"):]
+
+
+def _calendar_starts(days: np.ndarray, resolution: str) -> np.ndarray:
+    """주(월요일 시작)/월이 바뀌는 위치."""
+    if resolution == "1w":
+        keys = (days + 3) // 7  # 1970-01-01은 목요일
+    else:
+        keys = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets로 고른 점의 index (처음과 끝 포함)."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    # 구간별 평균점은 한 번에 계산 (구간 i의 다음 구간 평균 = avg[i + 1], 마지막은 끝점)
+    counts = np.diff(np.append(edges, n))
+    avg_x = np.add.reduceat(x, edges) / counts
+    avg_y = np.add.reduceat(y, edges) / counts
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i + 1]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[i + 1] - ay))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def _line(bars: np.ndarray, resolution: str, points: int) -> _Series:
+    days = np.asarray(bars["date"], dtype=np.int64)
+    close = np.asarray(bars["close"])
+    if resolution == "auto":
+        idx = lttb(days, close, points)
+    elif resolution == "1d":
+        idx = np.arange(len(bars))
+    else:
+        # 기간의 마지막 bar
+        idx = np.append(_calendar_starts(days, resolution)[1:] - 1, len(bars) - 1)
+    return _Series(days[idx], {"close": close[idx]})
+
+
+def _ohlc(bars: np.ndarray, resolution: str, points: int) -> _Series:
+    days = np.asarray(bars["date"], dtype=np.int64)
+    if resolution == "1d" or (resolution == "auto" and len(bars) <= points):
+        return _Series(days, {f: np.asarray(bars[f]) for f in _OHLC_FIELDS})
+    if resolution == "auto":
+        starts = np.unique(np.linspace(0, len(bars), points, endpoint=False).astype(np.int64))
+    else:
+        starts = _calendar_starts(days, resolution)
+    ends = np.append(starts[1:], len(bars)) - 1
+    close = np.asarray(bars["close"])
+    open_ = np.asarray(bars["open"])
+    return _Series(days[starts], {
+        # open이 비어 있으면 첫 종가
+        "open": np.where(np.isfinite(open_[starts]), open_[starts], close[starts]),
+        "high": np.fmax.reduceat(np.fmax(np.asarray(bars["high"]), close), starts),
+        "low": np.fmin.reduceat(np.fmin(np.asarray(bars["low"]), close), starts),
+        "close": close[ends],
+        "volume": np.add.reduceat(np.nan_to_num(np.asarray(bars["volume"])), starts),
+    })
+
+
+def _values(column: np.ndarray, field: str) -> list:
+    if field == "volume":
+        return [int(v) if v == v else None for v in column.tolist()]
+    return [v if v == v else None for v in np.round(column, 4).tolist()]
+
+
+@lru_cache(maxsize=256)
+def _render(ticker: str, stamp: tuple, range_: str, resolution: str, kind: str, points: int) -> bytes:
+    # stamp(파일 inode/mtime/크기)는 캐시 key. 그 시점의 bar 수만큼만 읽는다
+    bars = _slice(price_store.load(ticker)[: stamp[-1] // price_store.BAR_DTYPE.itemsize], range_)
+    series = _ohlc(bars, resolution, points) if kind == "ohlc" else _line(bars, resolution, points)
+    content = {
+        "ticker": ticker,
+        "range": range_,
+        "resolution": resolution,
+        "kind": kind,
+        "bars": len(bars),
+        "dates": series.days.astype("datetime64[D]").astype(str).tolist(),
+    }
+    content.update({f: _values(c, f) for f, c in series.columns.items()})
+    return render_json(content)
+
+
+def render_history(ticker: str, range_: str, resolution: str, kind: str, points: int) -> bytes | None:
+    """PriceHistoryResponse JSON. 저장된 가격이 없으면 None."""
+    stamp = price_store.stamp(ticker)
+    if stamp is None or stamp[-1] < price_store.BAR_DTYPE.itemsize:
+        return None
+    return _render(ticker, stamp, range_, resolution, kind, points)
@@ -0,0 +1,234 @@
+"""Local append-only daily price-history store.
+
+ticker마다 `PRICE_STORE_DIR/<TICKER>.bin` 파일 하나에 고정 길이 레코드(BAR_DTYPE)를
+날짜 오름차순으로 이어 붙인다. 읽을 때는 np.memmap으로 매핑하므로 복사가 없다.
+sync는 마지막 저장 날짜부터 내려받는다. 겹치는 마지막 bar의 종가가 달라졌으면
+(분할/배당으로 yfinance가 과거 가격을 재조정) 그 ticker의 이력을 처음부터 다시 받아
+파일을 통째로 바꾼다.
+"""
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from app.config import PRICE_ADJUST_TOLERANCE, PRICE_HISTORY_DAYS, PRICE_STORE_DIR
+from app.services.fetch_engine import AdaptiveTokenBucket, is_rate_limited_error
+from app.services.metrics import FETCH_RATE_LIMITED, FETCH_REQUESTS, FETCH_SECONDS, PRICE_BARS
+
+logger = logging.getLogger(__name__)
+
+# date: 1970-01-01 기준 일수
+BAR_DTYPE = np.dtype([
+    ("date", "<i4"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+_FIELDS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+_EMPTY = np.empty(0, dtype=BAR_DTYPE)
+_SAFE_NAME = re.compile(r"[^A-Z0-9.\-^=]")
+
+_DOWNLOAD_SUB_BATCH = 50  # 증분 다운로드는 작으므로 한 번에 더 많은 ticker를 요청
+
+
+def _path(ticker: str):
+    return PRICE_STORE_DIR / f"{_SAFE_NAME.sub('_', ticker.upper())}.bin"
+
+
+def to_day(d: date) -> int:
+    return (d - date(1970, 1, 1)).days
+
+
+def from_day(day: int) -> date:
+    return date(1970, 1, 1) + timedelta(days=int(day))
+
+
+def load(ticker: str) -> np.ndarray:
+    """저장된 bar 전체 (read-only memmap). 없으면 빈 배열."""
+    path = _path(ticker)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        return _EMPTY
+    # 쓰기 도중 중단되어 남은 불완전한 레코드는 무시
+    count = size // BAR_DTYPE.itemsize
+    if count == 0:
+        return _EMPTY
+    return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+
+def stamp(ticker: str) -> tuple[int, int, int] | None:
+    """ticker 파일의 (inode, mtime_ns, 크기). 없으면 None.
+
+    append는 크기와 mtime을, rewrite는 inode를 바꾼다. 파일 메타데이터라 다른
+    프로세스(다른 worker, sync 스크립트)가 쓴 경우에도 바뀌므로 캐시 key로 쓴다.
+    """
+    try:
+        st = _path(ticker).stat()
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def last_day(ticker: str) -> int | None:
+    bars = load(ticker)
+    return int(bars["date"][-1]) if len(bars) else None
+
+
+def append(ticker: str, bars: np.ndarray) -> int:
+    """마지막 저장 날짜 이후의 bar만 파일 끝에 추가. 추가된 개수를 반환."""
+    last = last_day(ticker)
+    if last is not None:
+        bars = bars[bars["date"] > last]
+    if not len(bars):
+        return 0
+    path = _path(ticker)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    size = path.stat().st_size if path.exists() else 0
+    with open(path, "r+b" if size else "wb") as f:
+        # 불완전한 꼬리 레코드가 있으면 잘라내고 이어 쓴다
+        f.truncate(size - size % BAR_DTYPE.itemsize)
+        f.seek(0, 2)
+        f.write(np.ascontiguousarray(bars, dtype=BAR_DTYPE).tobytes())
+    return len(bars)
+
+
+def rewrite(ticker: str, bars: np.ndarray) -> int:
+    """ticker의 이력 전체를 bars로 바꾼다 (임시 파일 → rename, 열린 memmap은 이전 내용 유지)."""
+    path = _path(ticker)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(np.ascontiguousarray(bars, dtype=BAR_DTYPE).tobytes())
+    os.replace(tmp, path)
+    return len(bars)
+
+
+def _readjusted(ticker: str, bars: np.ndarray) -> bool:
+    """다시 받은 bar 중 저장된 마지막 bar의 종가가 tolerance 이상 달라졌는지."""
+    stored = load(ticker)
+    if not len(stored) or not len(bars):
+        return False
+    overlap = bars[bars["date"] == stored["date"][-1]]
+    if not len(overlap):
+        return False
+    old, new = float(stored["close"][-1]), float(overlap["close"][0])
+    return abs(new - old) > PRICE_ADJUST_TOLERANCE * abs(old)
+
+
+def _frame_to_bars(df: pd.DataFrame, ticker: str, single: bool) -> np.ndarray:
+    if isinstance(df.columns, pd.MultiIndex):
+        if ticker not in df.columns.get_level_values(1):
+            return _EMPTY
+        frame = df.xs(ticker, axis=1, level=1)
+    elif single:
+        frame = df
+    else:
+        return _EMPTY
+    if "Close" not in frame.columns:
+        return _EMPTY
+    frame = frame.dropna(subset=["Close"])
+    bars = np.zeros(len(frame), dtype=BAR_DTYPE)
+    bars["date"] = frame.index.values.astype("datetime64[D]").astype(np.int64)
+    for field, column in _FIELDS.items():
+        if column in frame.columns:
+            bars[field] = frame[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            bars[field] = np.nan
+    return bars
+
+
+def _download(tickers: list[str], start: int, end: date, limiter: AdaptiveTokenBucket) -> pd.DataFrame | None:
+    limiter.acquire()
+    FETCH_REQUESTS.inc(kind="history")
+    try:
+        with FETCH_SECONDS.time(kind="history"):
+            df = yf.download(
+                tickers,
+                start=from_day(start).strftime("%Y-%m-%d"),
+                end=end.strftime("%Y-%m-%d"),
+                progress=False,
+                threads=False,
+            )
+    except Exception as e:
+        if is_rate_limited_error(str(e)):
+            FETCH_RATE_LIMITED.inc(kind="history")
+            limiter.on_rate_limited()
+        logger.warning("Price download failed for sub-batch %s", tickers)
+        return None
+    return None if df.empty else df
+
+
+def update_prices(tickers: list[str], limiter: AdaptiveTokenBucket) -> int:
+    """각 ticker의 마지막 저장 날짜부터 bar를 내려받아 새 bar를 저장. 추가된 bar 수를 반환.
+
+    저장된 데이터가 없는 ticker는 PRICE_HISTORY_DAYS만큼 받는다. 시작 날짜가 같은
+    ticker끼리 묶어 yf.download 한 번으로 요청한다. 겹치는 마지막 bar의 종가가
+    달라진 ticker는 이력 전체를 다시 받아 rewrite한다.
+    """
+    end = datetime.utcnow().date()
+    default_start = to_day(end - timedelta(days=PRICE_HISTORY_DAYS))
+
+    groups: dict[int, list[str]] = defaultdict(list)
+    for t in tickers:
+        last = last_day(t)
+        if last is None:
+            groups[default_start].append(t)
+        elif last + 1 < to_day(end):
+            groups[last].append(t)
+
+    added = 0
+    readjusted = []
+    for start, group in sorted(groups.items()):
+        for i in range(0, len(group), _DOWNLOAD_SUB_BATCH):
+            sub = group[i : i + _DOWNLOAD_SUB_BATCH]
+            df = _download(sub, start, end, limiter)
+            if df is None:
+                continue
+            for t in sub:
+                bars = _frame_to_bars(df, t, single=len(sub) == 1)
+                if _readjusted(t, bars):
+                    readjusted.append(t)
+                else:
+                    added += append(t, bars)
+
+    if readjusted:
+        logger.info("Price store: re-downloading %d tickers with adjusted history", len(readjusted))
+    for i in range(0, len(readjusted), _DOWNLOAD_SUB_BATCH):
+        sub = readjusted[i : i + _DOWNLOAD_SUB_BATCH]
+        df = _download(sub, default_start, end, limiter)
+        if df is None:
+            continue
+        for t in sub:
+            bars = _frame_to_bars(df, t, single=len(sub) == 1)
+            if len(bars):
+                added += rewrite(t, bars)
+
+    PRICE_BARS.inc(added)
+    logger.info(
+        "Price store: %d bars added for %d tickers (%d already up to date, %d re-adjusted)",
+        added, len(tickers), len(tickers) - sum(len(g) for g in groups.values()), len(readjusted),
+    )
+    return added
+
+
+def close_matrix(tickers: list[str], since_day: int | None = None) -> pd.DataFrame:
+    """저장소에서 dates × tickers 종가 행렬을 만든다 (없는 값은 NaN)."""
+    series = {}
+    for t in tickers:
+        bars = load(t)
+        if since_day is not None:
+            bars = bars[bars["date"] >= since_day]
+        if len(bars):
+            series[t] = pd.Series(
+                np.asarray(bars["close"]),
+                index=pd.to_datetime(np.asarray(bars["date"]).astype("datetime64[D]")),
+            )
+    if not series:
+        return pd.DataFrame()
+    return pd.DataFrame(series).sort_index()
@@ -0,0 +1,121 @@
+"""Lightweight intraday price/volume refresh.
+
+전체 `.info` 대신 여러 ticker를 묶은 yf.download 몇 번으로 최신 시세를 받아
+price, volume, data_updated_at만 일괄 UPDATE 한다 (quote tier). 장이 닫혀 있을 때처럼
+값이 그대로인 ticker는 쓰지 않는다.
+"""
+import asyncio
+import logging
+from datetime import datetime
+
+import pandas as pd
+import yfinance as yf
+from sqlalchemy import bindparam, func, select, update
+
+from app.database import SessionLocal
+from app.models.etf import ETF
+from app.services.etf_data_fetcher import limiter
+from app.services.etf_snapshot import refresh_snapshot
+from app.services.fetch_engine import is_rate_limited_error
+from app.services.metrics import FETCH_RATE_LIMITED, FETCH_REQUESTS, FETCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_QUOTE_CHUNK = 200  # yf.download 한 번에 요청할 ticker 수
+
+_refresh_running = False
+
+_TABLE = ETF.__table__
+# 거래량이 비어 있는 quote(NaN)는 기존 volume을 유지한다
+_UPDATE_QUOTE = (
+    update(_TABLE)
+    .where(_TABLE.c.ticker == bindparam("b_ticker"))
+    .values(
+        price=bindparam("b_price"),
+        volume=func.coalesce(bindparam("b_volume", type_=_TABLE.c.volume.type), _TABLE.c.volume),
+        data_updated_at=bindparam("b_updated_at"),
+    )
+)
+
+
+def _field(df: pd.DataFrame, name: str, tickers: list[str]) -> pd.DataFrame:
+    if isinstance(df.columns, pd.MultiIndex):
+        return df.xs(name, axis=1, level=0) if name in df.columns.get_level_values(0) else pd.DataFrame()
+    return df[[name]].set_axis(tickers[:1], axis=1) if name in df.columns else pd.DataFrame()
+
+
+def _latest_quotes(tickers: list[str]) -> list[dict]:
+    """최근 5일 일봉 중 마지막 유효 종가(장중이면 현재가)와 그날 거래량."""
+    limiter.acquire()
+    FETCH_REQUESTS.inc(kind="quotes")
+    try:
+        with FETCH_SECONDS.time(kind="quotes"):
+            df = yf.download(tickers, period="5d", interval="1d", progress=False, threads=False)
+    except Exception as e:
+        if is_rate_limited_error(str(e)):
+            FETCH_RATE_LIMITED.inc(kind="quotes")
+            limiter.on_rate_limited()
+        logger.warning("Quote download failed for %d tickers", len(tickers))
+        return []
+    if df.empty:
+        return []
+
+    close = _field(df, "Close", tickers)
+    volume = _field(df, "Volume", tickers)
+    now = datetime.utcnow()
+    quotes = []
+    for t in tickers:
+        if t not in close.columns:
+            continue
+        series = close[t].dropna()
+        if series.empty:
+            continue
+        last = series.index[-1]
+        vol = volume[t].get(last) if t in volume.columns else None
+        quotes.append({
+            "b_ticker": t,
+            "b_price": round(float(series.iloc[-1]), 4),
+            "b_volume": int(vol) if vol is not None and pd.notna(vol) else None,
+            "b_updated_at": now,
+        })
+    return quotes
+
+
+def _changed(current: tuple, quote: dict) -> bool:
+    price, volume = current
+    return quote["b_price"] != price or (quote["b_volume"] is not None and quote["b_volume"] != volume)
+
+
+def refresh_quotes() -> int:
+    """상장 폐지로 표시되지 않은 모든 ETF의 price/volume을 갱신. 갱신한 row 수를 반환."""
+    db = SessionLocal()
+    try:
+        current = {t: (price, volume) for t, price, volume in db.execute(
+            select(ETF.ticker, ETF.price, ETF.volume).where(ETF.delisted_at.is_(None))
+        )}
+        tickers = list(current)
+        quotes = []
+        for i in range(0, len(tickers), _QUOTE_CHUNK):
+            quotes.extend(_latest_quotes(tickers[i : i + _QUOTE_CHUNK]))
+        fetched = len(quotes)
+        quotes = [q for q in quotes if _changed(current[q["b_ticker"]], q)]
+        if quotes:
+            db.execute(_UPDATE_QUOTE, quotes)
+            db.commit()
+            refresh_snapshot(db)
+        logger.info("Quote refresh: %d/%d tickers changed (%d quotes fetched)", len(quotes), len(tickers), fetched)
+        return len(quotes)
+    finally:
+        db.close()
+
+
+async def run_quote_refresh() -> str:
+    global _refresh_running
+    if _refresh_running:
+        return "Quote refresh already in progress"
+    _refresh_running = True
+    try:
+        updated = await asyncio.to_thread(refresh_quotes)
+        return f"Quote refresh complete: {updated} ETFs updated"
+    finally:
+        _refresh_running = False
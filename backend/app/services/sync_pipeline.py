@@ -0,0 +1,132 @@
+"""Bounded producer/consumer pipeline used by the sync service.
+
+각 stage는 하나의 coroutine이 입력 queue에서 항목을 꺼내 동기 함수를 thread에서
+실행하고 다음 stage의 queue로 넘긴다. 서로 다른 배치가 서로 다른 stage에 동시에
+있을 수 있으므로 네트워크 대기와 DB 쓰기가 겹친다. queue 크기가 제한되어 있어
+앞 stage가 너무 앞서 나가지 않는다 (메모리 상한). stage당 worker가 하나이므로
+항목 순서가 유지된다. on_error를 주면 한 항목의 실패가 pipeline 전체를 멈추지 않는다.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from app.services.metrics import SYNC_STAGE_SECONDS
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+
+    def as_dict(self, queue: asyncio.Queue) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "stage": self.name,
+            "processed": self.processed,
+            "failed": self.failed,
+            "throughput_per_min": round(self.processed / elapsed * 60, 2),
+            "busy_seconds": round(self.busy_seconds, 1),
+            "utilization": round(self.busy_seconds / elapsed, 3),
+            "queue_depth": queue.qsize(),
+            "queue_capacity": queue.maxsize,
+        }
+
+
+class Pipeline:
+    """stages: (이름, 동기 함수) 목록. 함수의 반환값이 다음 stage의 입력이 된다.
+
+    on_error(stage 이름, 항목, 예외)는 stage 함수가 예외를 던졌을 때 그 항목 대신
+    다음 stage로 넘길 값을 반환한다. 없으면 예외가 run()까지 전파된다.
+    """
+
+    def __init__(
+        self,
+        stages: list[tuple[str, Callable[[Any], Any]]],
+        queue_size: int,
+        on_error: Callable[[str, Any, Exception], Any] | None = None,
+    ):
+        self._stages = stages
+        self._on_error = on_error
+        self._queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+        self.stats = [StageStats(name) for name, _ in stages]
+        self._error: BaseException | None = None
+
+    async def _source(self, items: Iterable) -> None:
+        for item in items:
+            await self._queues[0].put(item)
+        await self._queues[0].put(_DONE)
+
+    async def _worker(self, index: int, results: list) -> None:
+        name, fn = self._stages[index]
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self._queues) else None
+        stats = self.stats[index]
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                if outbox is not None:
+                    await outbox.put(_DONE)
+                return
+            started = time.monotonic()
+            try:
+                result = await asyncio.to_thread(fn, item)
+            except Exception as e:
+                if self._on_error is not None:
+                    stats.failed += 1
+                    try:
+                        result = await asyncio.to_thread(self._on_error, name, item, e)
+                    except Exception as handler_error:
+                        e = handler_error
+                    else:
+                        e = None
+                if e is not None:
+                    # 뒤 stage는 이미 받은 항목을 끝까지 처리하도록 종료 신호만 보낸다
+                    self._error = e
+                    if outbox is not None:
+                        await outbox.put(_DONE)
+                    return
+            elapsed = time.monotonic() - started
+            stats.busy_seconds += elapsed
+            SYNC_STAGE_SECONDS.observe(elapsed, stage=stats.name)
+            stats.processed += 1
+            if outbox is not None:
+                await outbox.put(result)
+            else:
+                results.append(result)
+
+    async def run(self, items: Iterable) -> list:
+        """모든 항목을 처리하고 마지막 stage의 결과를 순서대로 반환.
+
+        on_error가 처리하지 못한 예외가 나면 그 뒤 stage들은 이미 넘겨받은 항목까지만
+        처리하고, 앞 stage들은 취소된 뒤 예외가 다시 발생한다.
+        """
+        results: list = []
+        self._error = None
+        tasks = [asyncio.create_task(self._source(items))]
+        tasks += [asyncio.create_task(self._worker(i, results)) for i in range(len(self._stages))]
+        try:
+            await tasks[-1]
+        finally:
+            # 남은 task를 취소하고, 취소/예외로 끝난 결과까지 모두 회수한다
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._error is not None:
+            raise self._error
+        return results
+
+    def status(self) -> list[dict]:
+        """stage별 처리량, 사용률, 입력 queue 깊이 — 병목 stage 확인용."""
+        return [s.as_dict(q) for s, q in zip(self.stats, self._queues)]
+
+    def summary(self) -> str:
+        return ", ".join(
+            f"{s['stage']}: {s['processed']} done, {s['failed']} failed, {s['utilization']:.0%} busy, queue {s['queue_depth']}/{s['queue_capacity']}"
+            for s in self.status()
+        )
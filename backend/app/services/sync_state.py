@@ -0,0 +1,189 @@
+"""Persistent sync-run checkpoints and per-ticker freshness tracking."""
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.config import SYNC_FRESHNESS_HOURS, SYNC_RESUME_MAX_AGE_HOURS
+from app.models.etf import ETF
+from app.models.sync import SyncRun, TickerSyncState
+
+logger = logging.getLogger(__name__)
+
+RESUMABLE = ("running", "interrupted")
+# 한 번에 이보다 많은 비율이 목록에서 빠지면 목록 쪽 문제로 보고 상장 폐지로 표시하지 않는다
+MAX_DELIST_RATIO = 0.1
+
+
+@dataclass(frozen=True)
+class UniverseDiff:
+    added: list[str]  # DB에 없는 ticker
+    delisted: list[str]  # 이번에 상장 폐지로 표시한 ticker
+    relisted: list[str]  # 표시를 해제한 ticker
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    # SQLite는 timezone-naive datetime을 반환
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def find_resumable_run(db: Session) -> SyncRun | None:
+    """중단된 최근 실행. 너무 오래된 실행은 abandoned로 표시하고 무시한다."""
+    run = (
+        db.query(SyncRun)
+        .filter(SyncRun.status.in_(RESUMABLE))
+        .order_by(SyncRun.id.desc())
+        .first()
+    )
+    if run is None:
+        return None
+    age = datetime.now(timezone.utc) - _utc(run.checkpoint_at or run.started_at)
+    if age > timedelta(hours=SYNC_RESUME_MAX_AGE_HOURS):
+        run.status = "abandoned"
+        run.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        logger.info("Abandoning sync run #%d (last checkpoint %s ago)", run.id, age)
+        return None
+    return run
+
+
+def apply_universe(db: Session, tickers: list[str], authoritative: bool) -> UniverseDiff:
+    """ticker 목록과 DB를 비교해 delisted_at을 갱신하고 커밋.
+
+    목록에서 빠진 ticker는 authoritative(주 source) 목록일 때만, 그리고 빠진 비율이
+    MAX_DELIST_RATIO 이하일 때만 상장 폐지로 표시한다. 다시 나타난 ticker는 해제.
+    """
+    universe = set(tickers)
+    known = dict(db.execute(select(ETF.ticker, ETF.delisted_at)).all())
+    added = [t for t in tickers if t not in known]
+    relisted = [t for t, delisted_at in known.items() if delisted_at is not None and t in universe]
+    missing = [t for t, delisted_at in known.items() if delisted_at is None and t not in universe]
+
+    delisted: list[str] = []
+    if missing and not authoritative:
+        logger.info("%d tickers missing from fallback ticker list — not marking delisted", len(missing))
+    elif len(missing) > MAX_DELIST_RATIO * len(known):
+        logger.warning(
+            "%d/%d tickers missing from ticker list — too many, not marking delisted",
+            len(missing), len(known),
+        )
+    else:
+        delisted = missing
+
+    if relisted:
+        db.execute(update(ETF).where(ETF.ticker.in_(relisted)).values(delisted_at=None))
+    if delisted:
+        now = datetime.now(timezone.utc)
+        db.execute(update(ETF).where(ETF.ticker.in_(delisted)).values(delisted_at=now))
+    db.commit()
+    logger.info(
+        "Ticker universe diff: %d added, %d delisted, %d relisted",
+        len(added), len(delisted), len(relisted),
+    )
+    return UniverseDiff(added, delisted, relisted)
+
+
+def plan_stale_tickers(db: Session, tickers: list[str], first: list[str] = ()) -> list[str]:
+    """freshness 기준보다 오래된 ticker만, 마지막 시도가 가장 오래된 것부터 반환.
+
+    first(새로 상장된 ticker 등)는 목록 맨 앞에 둔다. 최근에 실패한 ticker도 마지막
+    시도 시각 기준으로 판단하므로 매번 재시도하지 않는다.
+    """
+    states = {s.ticker: s for s in db.query(TickerSyncState).all()}
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=SYNC_FRESHNESS_HOURS)
+    epoch = datetime.min.replace(tzinfo=timezone.utc)
+    priority = set(first)
+
+    due = []
+    for position, t in enumerate(dict.fromkeys(tickers)):
+        state = states.get(t)
+        last = _utc(state.last_attempt_at) if state else None
+        if last is None or last < cutoff:
+            due.append((t not in priority, last or epoch, position, t))
+    due.sort()
+    return [t for *_, t in due]
+
+
+def start_run(db: Session, tickers: list[str]) -> SyncRun:
+    run = SyncRun(status="running", tickers=json.dumps(tickers), total=len(tickers), cursor=0)
+    db.add(run)
+    db.commit()
+    return run
+
+
+def run_tickers(run: SyncRun) -> list[str]:
+    return json.loads(run.tickers)
+
+
+def record_batch(
+    db: Session,
+    run: SyncRun,
+    cursor: int,
+    succeeded: set[str],
+    failed: set[str],
+    updated: int,
+) -> None:
+    """배치 결과를 ticker 상태와 run checkpoint에 반영. 커밋은 호출자가 한다."""
+    now = datetime.now(timezone.utc)
+    attempted = succeeded | failed
+    states = {
+        s.ticker: s
+        for s in db.query(TickerSyncState).filter(TickerSyncState.ticker.in_(list(attempted)))
+    }
+    for t in attempted:
+        state = states.get(t)
+        if state is None:
+            state = TickerSyncState(ticker=t, failure_count=0)
+            db.add(state)
+        if t in succeeded:
+            state.last_success_at = now
+            state.failure_count = 0
+        else:
+            state.last_failure_at = now
+            state.failure_count = (state.failure_count or 0) + 1
+
+    run.cursor = cursor
+    run.updated += updated
+    run.error_count += len(failed)
+    run.checkpoint_at = now
+
+
+def finish_run(db: Session, run: SyncRun, status: str, message: str) -> None:
+    run.status = status
+    run.message = message[:256]
+    run.finished_at = datetime.now(timezone.utc)
+    db.commit()
+
+
+def sync_due(db: Session) -> str | None:
+    """시작 시 sync가 필요한 이유. 필요 없으면 None."""
+    run = find_resumable_run(db)
+    if run is not None:
+        return f"Resuming interrupted sync run #{run.id} at {run.cursor}/{run.total}"
+
+    count = db.query(ETF).count()
+    if count < 10:
+        return f"DB has only {count} ETFs"
+
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=SYNC_FRESHNESS_HOURS)
+    # plan_stale_tickers와 같은 기준: ticker별 마지막 시도(성공/실패 중 늦은 쪽).
+    # 상장 폐지됐거나 etfs에 없는 ticker는 더 이상 sync하지 않으므로 제외
+    oldest = (
+        db.query(func.min(TickerSyncState.last_attempt_at))
+        .join(ETF, ETF.ticker == TickerSyncState.ticker)
+        .filter(ETF.delisted_at.is_(None))
+        .scalar()
+    )
+    if oldest is None:
+        # ticker 상태가 아직 없으면 마지막으로 확인한 시각 기준
+        oldest = db.query(func.max(func.coalesce(ETF.checked_at, ETF.data_updated_at))).scalar()
+        if oldest is None:
+            return "No checked_at found"
+    if _utc(oldest) < cutoff:
+        return f"Data older than {SYNC_FRESHNESS_HOURS}h (oldest: {oldest})"
+    return None
@@ -5,8 +5,9 @@ from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from pytz import timezone
 
-from app.config import SYNC_HOUR, SYNC_MINUTE
+from app.config import PRICE_UPDATE_INTERVAL_HOURS, STALE_SYNC_INTERVAL_HOURS, SYNC_HOUR, SYNC_MINUTE
 from app.services.etf_sync_service import run_full_sync
+from app.services.quote_refresher import run_quote_refresh
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,17 @@ def _run_sync():
     asyncio.ensure_future(run_full_sync())
 
 
+def _run_stale_sync():
+    # 중단된 실행을 이어가고, freshness 기준을 넘긴 ticker만 갱신
+    logger.info("Stale-ticker sync triggered at %s", datetime.now(KST))
+    asyncio.ensure_future(run_full_sync())
+
+
+def _run_quote_refresh():
+    logger.info("Quote refresh triggered at %s", datetime.now(KST))
+    asyncio.ensure_future(run_quote_refresh())
+
+
 def start_scheduler():
     daily_job = scheduler.add_job(
         _run_sync,
@@ -31,11 +43,31 @@ def start_scheduler():
         misfire_grace_time=3600,  # 1시간 이내 misfire는 실행
         coalesce=True,            # 여러 번 misfire 시 한 번만 실행
     )
+    stale_job = scheduler.add_job(
+        _run_stale_sync,
+        "interval",
+        hours=STALE_SYNC_INTERVAL_HOURS,
+        id="stale_ticker_sync",
+        replace_existing=True,
+        coalesce=True,
+    )
+    quote_job = scheduler.add_job(
+        _run_quote_refresh,
+        "interval",
+        hours=PRICE_UPDATE_INTERVAL_HOURS,
+        id="quote_refresh",
+        replace_existing=True,
+        coalesce=True,
+    )
     scheduler.start()
 
     logger.info("Scheduler started (timezone: %s)", KST)
     logger.info("Daily full sync scheduled at %02d:%02d KST - Next run: %s",
                 SYNC_HOUR, SYNC_MINUTE, daily_job.next_run_time)
+    logger.info("Stale-ticker sync every %dh - Next run: %s",
+                STALE_SYNC_INTERVAL_HOURS, stale_job.next_run_time)
+    logger.info("Quote refresh every %dh - Next run: %s",
+                PRICE_UPDATE_INTERVAL_HOURS, quote_job.next_run_time)
 
 
 def stop_scheduler():
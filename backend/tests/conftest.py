@@ -0,0 +1,49 @@
+"""테스트 공통 설정.
+
+app 모듈은 import 시점에 DATABASE_URL로 engine을 만들므로, 먼저 임시 SQLite DB를
+가리키게 한다 (TEST_DATABASE_URL로 다른 DB를 지정할 수 있다). 실행 중인 서버의
+DB나 data/ 디렉터리는 건드리지 않는다.
+"""
+import os
+import tempfile
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL", f"sqlite:///{_tmp.name}/test.db")
+os.environ["SKIP_STARTUP_SYNC"] = "true"
+
+import pytest  # noqa: E402
+
+import app.models.etf  # noqa: E402, F401
+import app.models.sync  # noqa: E402, F401
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.services import etf_snapshot, info_cache, price_store  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _data_dirs(tmp_path, monkeypatch):
+    """가격/info 캐시 파일은 테스트마다 빈 임시 디렉터리에."""
+    monkeypatch.setattr(price_store, "PRICE_STORE_DIR", tmp_path / "prices")
+    monkeypatch.setattr(info_cache, "INFO_CACHE_DIR", tmp_path / "info_cache")
+
+
+@pytest.fixture
+def client():
+    """lifespan(시작 sync, scheduler) 없이 app을 호출하는 client."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    """빈 테이블로 다시 만든 DB의 session. snapshot도 비운다."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    etf_snapshot._snapshot = None
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        etf_snapshot._snapshot = None
@@ -0,0 +1,73 @@
+import pytest
+
+from app.services.etf_screen import MAX_PREDICATES, InvalidScreen, Predicate, parse_where
+
+
+def test_empty():
+    assert parse_where(None) == ()
+    assert parse_where(["", " , "]) == ()
+
+
+def test_comma_is_and_pipe_is_or():
+    screen = parse_where(["expense_ratio<0.2,dividend_yield>3|return_1y>=10", "price=50"])
+    assert screen == (
+        (Predicate("expense_ratio", high=0.2, high_inclusive=False),),
+        (
+            Predicate("dividend_yield", low=3, low_inclusive=False),
+            Predicate("return_1y", low=10, low_inclusive=True),
+        ),
+        (Predicate("price", 50, 50),),
+    )
+
+
+@pytest.mark.parametrize(("text", "value"), [
+    ("market_cap>1.5k", 1.5e3),
+    ("market_cap>2M", 2e6),
+    ("market_cap>1B", 1e9),
+    ("market_cap>0.5t", 5e11),
+    ("market_cap>1e3", 1e3),
+    ("market_cap > -2", -2),
+])
+def test_suffixes(text, value):
+    (clause,) = parse_where([text])
+    assert clause[0].low == pytest.approx(value)
+
+
+@pytest.mark.parametrize("text", [
+    "expense_ratio",  # 연산자 없음
+    "expense_ratio<<1",
+    "expense_ratio<1X",  # 알 수 없는 suffix
+    "expense_ratio<1.2.3",
+    "name>1",  # 숫자 컬럼이 아님
+    "unknown_field>1",
+    "price>1|",  # 빈 OR 항
+])
+def test_invalid(text):
+    with pytest.raises(InvalidScreen):
+        parse_where([text])
+
+
+def test_too_many_predicates():
+    parse_where(["|".join(["price>1"] * MAX_PREDICATES)])
+    with pytest.raises(InvalidScreen):
+        parse_where(["|".join(["price>1"] * (MAX_PREDICATES + 1))])
+
+
+@pytest.mark.parametrize("where", ["price>>1", "name>1", ",".join(["price>1"] * (MAX_PREDICATES + 1))])
+def test_api_rejects_invalid_where(db, client, where):
+    response = client.get("/api/etfs", params={"where": where})
+    assert response.status_code == 400
+    assert response.json()["detail"]
+
+
+def test_api_screen(db, client):
+    from app.models.etf import ETF
+    db.add_all([
+        ETF(ticker="AAA", market_cap=2 * 10**9, expense_ratio=0.1),
+        ETF(ticker="BBB", market_cap=5 * 10**8, expense_ratio=0.05),
+        ETF(ticker="CCC", market_cap=None, expense_ratio=0.01),
+        ETF(ticker="DDD", market_cap=3 * 10**9, expense_ratio=0.5),
+    ])
+    db.commit()
+    response = client.get("/api/etfs", params=[("where", "market_cap>=1B"), ("where", "expense_ratio<0.2|price>0")])
+    assert [e["ticker"] for e in response.json()["items"]] == ["AAA"]
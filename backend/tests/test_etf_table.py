@@ -0,0 +1,111 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models.etf import ETF
+from app.services.etf_encoder import ROWS_QUERY
+from app.services.etf_screen import parse_where
+from app.services.etf_table import ETFTable, InvalidCursor, encode_cursor
+
+SORTS = ("ticker", "name", "price", "category", "market_cap", "data_updated_at")
+
+
+@pytest.fixture
+def rows(db):
+    rng = random.Random(1)
+    db.execute(insert(ETF.__table__), [
+        {
+            "ticker": f"T{i:03d}",
+            "name": rng.choice([None, "Alpha", "Beta", f"Fund {i}"]),
+            "category": rng.choice([None, "Equity", "Bond"]),
+            "price": rng.choice([None, 10.0, 20.0, round(rng.uniform(1, 500), 2)]),
+            "market_cap": rng.choice([None, 10**9, rng.randint(10**6, 10**12)]),
+            "data_updated_at": rng.choice([None, datetime(2024, 1, 1) + timedelta(days=rng.randint(0, 5))]),
+            "created_at": datetime(2024, 1, 1),
+        }
+        for i in range(240)
+    ])
+    db.commit()
+    return db.execute(ROWS_QUERY.order_by(ETF.ticker)).all()
+
+
+def _walk(table: ETFTable, sort_by: str, sort_dir: str, limit: int, **filters) -> list[str]:
+    tickers, cursor = [], None
+    while True:
+        page, _, cursor = table.query_after(sort_by, sort_dir, cursor, limit=limit, **filters)
+        tickers += [table.items[i].ticker for i in page]
+        if cursor is None:
+            return tickers
+
+
+@pytest.mark.parametrize("sort_dir", ["asc", "desc"])
+@pytest.mark.parametrize("sort_by", SORTS)
+def test_order_matches_sqlite(db, rows, sort_by, sort_dir):
+    # NULL은 SQLite의 ORDER BY처럼 asc면 맨 앞, desc면 맨 뒤. 같은 값은 ticker 순
+    column = getattr(ETF, sort_by)
+    expected = db.scalars(
+        select(ETF.ticker).order_by(column.asc() if sort_dir == "asc" else column.desc(), ETF.ticker)
+    ).all()
+    table = ETFTable(rows)
+    order, total = table.query(sort_by, sort_dir)
+    assert [rows[i].ticker for i in order] == expected
+    assert total == len(rows)
+
+
+@pytest.mark.parametrize("limit", [1, 7, 50, 500])
+@pytest.mark.parametrize("sort_dir", ["asc", "desc"])
+@pytest.mark.parametrize("sort_by", SORTS)
+def test_cursor_pages_match_offset_pages(rows, sort_by, sort_dir, limit):
+    table = ETFTable(rows)
+    order, _ = table.query(sort_by, sort_dir)
+    assert _walk(table, sort_by, sort_dir, limit) == [rows[i].ticker for i in order]
+
+    filters = {"category": "Equity", "search": "fund"}
+    order, total = table.query(sort_by, sort_dir, **filters)
+    assert _walk(table, sort_by, sort_dir, limit, **filters) == [rows[i].ticker for i in order]
+    assert total == len(order)
+
+
+def test_cursor_survives_removed_row(rows):
+    # cursor의 마지막 row가 다음 snapshot에 없어도 정렬 위치로 이어진다
+    table = ETFTable(rows)
+    first, _, cursor = table.query_after("price", "desc", limit=10)
+    removed = rows[first[-1]].ticker
+    remaining = [r for r in rows if r.ticker != removed]
+    rest, _, _ = ETFTable(remaining).query_after("price", "desc", cursor, limit=1000)
+    order, _ = table.query("price", "desc")
+    expected = [rows[i].ticker for i in order][10:]
+    assert [remaining[i].ticker for i in rest] == expected
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    encode_cursor("price", "asc", 1.0, "T001"),  # 다른 정렬의 cursor
+    encode_cursor("price", "desc", "text", "T001"),  # 숫자 컬럼에 문자열 값
+])
+def test_invalid_cursor(rows, cursor):
+    with pytest.raises(InvalidCursor):
+        ETFTable(rows).query_after("price", "desc", cursor)
+
+
+def test_screen_matches_brute_force(rows):
+    table = ETFTable(rows)
+    screen = parse_where(["price>=20,price<300|market_cap>=500B"])
+    expected = [
+        r.ticker for r in rows
+        if r.price is not None and r.price >= 20
+        and ((r.price is not None and r.price < 300) or (r.market_cap is not None and r.market_cap >= 5e11))
+    ]
+    assert [rows[i].ticker for i in table.screen_rows(screen)] == expected
+
+
+def test_delisted_rows_are_opt_in(rows):
+    delisted = frozenset(r.ticker for r in rows[::3])
+    table = ETFTable(rows, delisted)
+    listed, total = table.query()
+    assert total == len(rows) - len(delisted)
+    assert not {rows[i].ticker for i in listed} & delisted
+    assert table.query(include_delisted=True)[1] == len(rows)
+    assert sum(table.facet_counts()["category"].values()) <= total
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.etf import ETF
+from app.routers import etfs as etfs_router
+from app.services.etf_upsert import _merge_records, bulk_upsert_etfs, existing_tickers, mark_checked
+
+
+def test_merge_records_normalizes_and_merges():
+    merged = _merge_records([
+        {"ticker": " spy ", "name": "SPDR", "price": 1.0, "not_a_column": 1},
+        {"ticker": "SPY", "price": 2.0, "name": None},
+        {"ticker": "qqq", "id": 5, "created_at": datetime(2020, 1, 1)},
+    ])
+    # 나중 값 우선, None은 기존 값을 지우지 않는다. 허용되지 않은 컬럼은 버린다
+    assert merged == {
+        "SPY": {"ticker": "SPY", "name": "SPDR", "price": 2.0},
+        "QQQ": {"ticker": "QQQ"},
+    }
+
+
+def test_merge_records_skips_invalid_tickers():
+    assert _merge_records([{"ticker": None}, {"ticker": 5}, {"ticker": "  "}, {"name": "x"}]) == {}
+
+
+def test_upsert_keeps_existing_values(db):
+    first = bulk_upsert_etfs(db, [{"ticker": "spy", "name": "SPDR", "price": 1.0}])
+    second = bulk_upsert_etfs(db, [{"ticker": "SPY", "name": None, "price": 2.0}, {"ticker": "IVV"}])
+    db.commit()
+    assert (first.inserted, first.updated) == (1, 0)
+    assert (second.inserted, second.updated) == (1, 1)
+    spy = db.scalars(select(ETF).where(ETF.ticker == "SPY")).one()
+    assert (spy.name, spy.price) == ("SPDR", 2.0)
+
+
+def test_changed_only_skips_unchanged_rows(db):
+    stamp = datetime(2024, 1, 1)
+    bulk_upsert_etfs(db, [
+        {"ticker": "SPY", "name": "SPDR", "price": 1.0, "data_updated_at": stamp},
+        {"ticker": "IVV", "name": "iShares", "price": 3.0, "data_updated_at": stamp},
+    ])
+    db.commit()
+
+    later = datetime(2024, 2, 1)
+    result = bulk_upsert_etfs(db, [
+        {"ticker": "SPY", "name": "SPDR", "price": 1.0, "data_updated_at": later},
+        {"ticker": "IVV", "name": "iShares", "price": 4.0, "data_updated_at": later},
+        {"ticker": "QQQ", "name": "Invesco", "data_updated_at": later},
+    ], changed_only=True)
+    db.commit()
+
+    assert (result.inserted, result.updated, result.unchanged) == (1, 1, 1)
+    rows = {e.ticker: e for e in db.scalars(select(ETF))}
+    # 값이 그대로인 row는 data_updated_at(마지막 변경 시각)도 그대로
+    assert rows["SPY"].data_updated_at == stamp
+    assert (rows["IVV"].price, rows["IVV"].data_updated_at) == (4.0, later)
+    assert rows["QQQ"].name == "Invesco"
+
+
+def test_changed_only_ignores_none_and_timestamp_only(db):
+    bulk_upsert_etfs(db, [{"ticker": "SPY", "name": "SPDR", "price": 1.0}])
+    db.commit()
+    result = bulk_upsert_etfs(db, [
+        {"ticker": "SPY", "name": None, "data_updated_at": datetime(2024, 3, 1)},
+    ], changed_only=True)
+    assert (result.total, result.unchanged) == (0, 1)
+
+
+def test_existing_tickers_and_mark_checked(db):
+    bulk_upsert_etfs(db, [{"ticker": "SPY", "name": "SPDR"}, {"ticker": "NEW"}])
+    db.commit()
+    assert existing_tickers(db, ["SPY", "NEW", "MISSING"]) == {"SPY"}
+
+    at = datetime(2024, 5, 1)
+    mark_checked(db, {"SPY"}, at)
+    db.commit()
+    checked = dict(db.execute(select(ETF.ticker, ETF.checked_at)).all())
+    assert checked == {"SPY": at, "NEW": None}
+
+
+@pytest.mark.parametrize("payload", [
+    [{"ticker": None}],
+    [{"ticker": 5}],
+    [{"name": "no ticker"}],
+    [{"ticker": "SPY"}, {"ticker": "  "}],
+    [{"ticker": "SPY", "data_updated_at": "yesterday"}],
+])
+def test_bulk_update_rejects_invalid_items(db, client, monkeypatch, payload):
+    monkeypatch.setattr(etfs_router, "ADMIN_API_KEY", "secret")
+    response = client.post("/api/admin/bulk-update", json=payload, headers={"X-Admin-Key": "secret"})
+    assert response.status_code == 422
+    assert db.scalar(select(func.count(ETF.id))) == 0
+
+
+def test_bulk_update(db, client, monkeypatch):
+    monkeypatch.setattr(etfs_router, "ADMIN_API_KEY", "secret")
+    payload = [{"ticker": " spy ", "name": "SPDR", "data_updated_at": "2024-01-01T00:00:00+00:00"}]
+    assert client.post("/api/admin/bulk-update", json=payload, headers={"X-Admin-Key": "wrong"}).status_code == 403
+    response = client.post("/api/admin/bulk-update", json=payload, headers={"X-Admin-Key": "secret"})
+    assert response.status_code == 200
+    assert client.get("/api/etfs/SPY").json()["name"] == "SPDR"
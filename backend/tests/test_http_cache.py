@@ -0,0 +1,76 @@
+import gzip
+
+import pytest
+
+from app.models.etf import ETF
+from app.services import etf_snapshot
+from app.services.etf_snapshot import brotli
+
+ENCODINGS = [None, "gzip"] + (["br"] if brotli else [])
+
+
+@pytest.fixture
+def seeded(db):
+    db.add_all([ETF(ticker=f"T{i}", name=f"Fund {i}", category="Equity", price=10.0 + i) for i in range(30)])
+    db.commit()
+    return db
+
+
+def _get(client, path, encoding, **headers):
+    return client.get(path, headers={"Accept-Encoding": encoding or "identity", **headers})
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+@pytest.mark.parametrize("path", ["/api/etfs", "/api/etfs/filters", "/api/etfs/T1"])
+def test_etag_per_encoding_and_304(seeded, client, path, encoding):
+    first = _get(client, path, encoding)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    data_version = etf_snapshot.current_snapshot(fresh_only=False).etag
+    # 미리 압축해 둔 응답(전체 목록, 조건 없는 filters)만 압축 표현이 있다
+    served = first.headers.get("content-encoding")
+    if path != "/api/etfs/T1":
+        assert served == encoding
+    assert etag == (f'"{data_version}-{served}"' if served else f'"{data_version}"')
+    assert "Accept-Encoding" in first.headers["vary"]
+    assert first.headers["last-modified"]
+
+    again = _get(client, path, encoding, **{"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    since = _get(client, path, encoding, **{"If-Modified-Since": first.headers["last-modified"]})
+    assert since.status_code == 304
+
+
+def test_compressed_full_list_matches_identity(seeded, client):
+    identity = _get(client, "/api/etfs", None)
+    compressed = client.get("/api/etfs", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] != identity.headers["etag"]
+    # 클라이언트는 이미 압축을 푼 본문을 받는다
+    assert compressed.content == identity.content
+    assert gzip.decompress(etf_snapshot.current_snapshot(fresh_only=False).full_list.gzip) == identity.content
+
+
+def test_etag_changes_with_data(seeded, client):
+    etag = _get(client, "/api/etfs", None).headers["etag"]
+    seeded.get(ETF, 1).price = 999.0
+    seeded.commit()
+    etf_snapshot.refresh_snapshot()
+    response = _get(client, "/api/etfs", None, **{"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_stale_tag_and_weak_tag(seeded, client):
+    etag = _get(client, "/api/etfs", "gzip").headers["etag"]
+    assert _get(client, "/api/etfs", None, **{"If-None-Match": '"stale"'}).status_code == 200
+    # 다른 표현의 tag와 약한 비교도 같은 data version이면 304
+    assert _get(client, "/api/etfs", None, **{"If-None-Match": f"W/{etag}"}).status_code == 304
+
+
+def test_compare_is_not_cached(seeded, client):
+    response = client.get("/api/etfs/compare", params={"tickers": "T1"})
+    assert "etag" not in response.headers
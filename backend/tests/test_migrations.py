@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, MetaData, Table, UniqueConstraint, inspect, insert, select, text
+
+from app.database import Base, engine
+from app.migrations import MIGRATIONS, run_migrations
+from app.models.etf import ETF
+from app.models.sync import TickerSyncState
+
+ALL_VERSIONS = sorted(m.version for m in MIGRATIONS)
+
+
+@pytest.fixture
+def empty_db():
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    yield
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+
+
+def _legacy_schema() -> Table:
+    """delisted_at/checked_at 컬럼과 index가 없던 시절의 etfs."""
+    metadata = MetaData()
+    table = Table(
+        "etfs", metadata,
+        *(Column(c.name, c.type, primary_key=c.primary_key) for c in ETF.__table__.c
+          if c.name not in ("delisted_at", "checked_at")),
+        UniqueConstraint("ticker"),
+    )
+    metadata.create_all(engine)
+    TickerSyncState.__table__.create(engine)
+    return table
+
+
+def test_versions_are_unique_and_ordered():
+    assert ALL_VERSIONS == list(range(1, len(MIGRATIONS) + 1))
+
+
+# 식 index(ix_etfs_ticker_upper)는 reflection이 건너뛴다 — 사용 여부는 test_query_plans가 확인
+@pytest.mark.filterwarnings("ignore:Skipped unsupported reflection")
+def test_fresh_database(empty_db):
+    Base.metadata.create_all(bind=engine)
+    assert run_migrations(engine) == ALL_VERSIONS
+    assert run_migrations(engine) == []
+    indexes = {i["name"] for i in inspect(engine).get_indexes("etfs")}
+    assert {"ix_etfs_market_cap_desc", "ix_etfs_category_market_cap"} <= indexes
+
+
+def test_legacy_database_is_upgraded(empty_db):
+    legacy = _legacy_schema()
+    created = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for row in [
+            # IVV 세 row: 정규화된 row가 남고, 컬럼마다 가장 최근 row의 NULL이 아닌 값
+            {"id": 1, "ticker": "ivv", "price": 1.0, "expense_ratio": 0.5,
+             "data_updated_at": datetime(2023, 1, 1), "created_at": created},
+            {"id": 2, "ticker": "IVV", "price": 2.0, "expense_ratio": None,
+             "data_updated_at": datetime(2024, 1, 1), "created_at": created},
+            {"id": 3, "ticker": " Ivv ", "price": None, "name": "iShares Core S&P 500",
+             "data_updated_at": datetime(2024, 6, 1), "created_at": created},
+            {"id": 4, "ticker": " spy", "price": 5.0, "data_updated_at": None, "created_at": created},
+        ]:
+            conn.execute(insert(legacy).values(**row))
+        conn.execute(insert(TickerSyncState.__table__), [{"ticker": "ivv"}, {"ticker": "IVV"}])
+
+    assert run_migrations(engine) == ALL_VERSIONS
+
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("SELECT id, ticker, name, price, expense_ratio, checked_at FROM etfs ORDER BY id")
+        ).all()
+        states = conn.scalars(text("SELECT ticker FROM ticker_sync_state")).all()
+    assert [(r.id, r.ticker, r.name, r.price, r.expense_ratio) for r in rows] == [
+        (2, "IVV", "iShares Core S&P 500", 2.0, 0.5),
+        (4, "SPY", None, 5.0, None),
+    ]
+    # 기존 data_updated_at은 확인 시각이었으므로 checked_at으로 옮긴다
+    assert rows[0].checked_at is not None and rows[1].checked_at is None
+    assert states == ["IVV"]
+    assert {"delisted_at", "checked_at"} <= {c["name"] for c in inspect(engine).get_columns("etfs")}
+
+
+def test_partially_applied(empty_db):
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM schema_migrations WHERE version >= 3"))
+    # 이미 반영된 변경을 다시 실행해도 안전해야 한다
+    assert run_migrations(engine) == [v for v in ALL_VERSIONS if v >= 3]
+    with engine.connect() as conn:
+        assert conn.scalar(select(ETF.id).limit(1)) is None
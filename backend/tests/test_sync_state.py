@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.config import SYNC_FRESHNESS_HOURS
+from app.models.etf import ETF
+from app.models.sync import SyncRun, TickerSyncState
+from app.services import sync_state
+from app.services.sync_state import MAX_DELIST_RATIO, apply_universe, plan_stale_tickers, sync_due
+
+NOW = datetime.now(timezone.utc)
+FRESH = NOW - timedelta(hours=1)
+STALE = NOW - timedelta(hours=SYNC_FRESHNESS_HOURS + 1)
+
+
+def _etfs(db, count: int, **values) -> list[str]:
+    tickers = [f"T{i:03d}" for i in range(count)]
+    db.add_all([ETF(ticker=t, **values) for t in tickers])
+    db.commit()
+    return tickers
+
+
+def _attempts(db, **last_success: datetime) -> None:
+    db.add_all([TickerSyncState(ticker=t, last_success_at=at, failure_count=0) for t, at in last_success.items()])
+    db.commit()
+
+
+def test_sync_due_small_database(db):
+    _etfs(db, 3)
+    assert "only 3" in sync_due(db)
+
+
+def test_sync_due_resumes_interrupted_run(db):
+    _etfs(db, 20)
+    run = sync_state.start_run(db, ["T000", "T001"])
+    assert f"#{run.id}" in sync_due(db)
+
+
+def test_sync_due_abandons_old_run(db):
+    tickers = _etfs(db, 20, checked_at=FRESH)
+    run = sync_state.start_run(db, tickers)
+    run.started_at = NOW - timedelta(days=30)
+    db.commit()
+    assert sync_due(db) is None
+    assert db.get(SyncRun, run.id).status == "abandoned"
+
+
+def test_sync_due_falls_back_to_checked_at(db):
+    _etfs(db, 20, data_updated_at=STALE, checked_at=FRESH)
+    assert sync_due(db) is None
+
+
+def test_sync_due_stale_without_state(db):
+    _etfs(db, 20, data_updated_at=STALE)
+    assert sync_due(db).startswith("Data older")
+
+
+def test_sync_due_uses_oldest_attempt(db):
+    tickers = _etfs(db, 20)
+    _attempts(db, **{t: FRESH for t in tickers})
+    assert sync_due(db) is None
+    db.get(TickerSyncState, "T005").last_success_at = STALE
+    db.commit()
+    assert sync_due(db).startswith("Data older")
+
+
+def test_sync_due_recent_failure_counts_as_attempt(db):
+    tickers = _etfs(db, 20)
+    _attempts(db, **{t: FRESH for t in tickers})
+    state = db.get(TickerSyncState, "T005")
+    state.last_success_at, state.last_failure_at = STALE, FRESH
+    db.commit()
+    assert sync_due(db) is None
+
+
+def test_sync_due_ignores_delisted_and_unknown_tickers(db):
+    tickers = _etfs(db, 20)
+    _attempts(db, **{t: FRESH for t in tickers}, GONE=STALE)
+    db.get(TickerSyncState, "T007").last_success_at = STALE
+    db.scalars(select(ETF).where(ETF.ticker == "T007")).one().delisted_at = NOW
+    db.commit()
+    assert sync_due(db) is None
+
+
+def test_plan_stale_tickers_order(db):
+    _attempts(db, AAA=FRESH, BBB=STALE, CCC=STALE - timedelta(days=1))
+    assert plan_stale_tickers(db, ["AAA", "BBB", "CCC", "NEW"], first=["BBB"]) == ["BBB", "NEW", "CCC"]
+
+
+def test_apply_universe_marks_and_clears_delisted(db):
+    tickers = _etfs(db, 20)
+    diff = apply_universe(db, tickers[1:] + ["NEW"], authoritative=True)
+    assert (diff.added, diff.delisted, diff.relisted) == (["NEW"], ["T000"], [])
+    assert db.scalars(select(ETF.delisted_at).where(ETF.ticker == "T000")).one() is not None
+
+    diff = apply_universe(db, tickers, authoritative=True)
+    assert diff.relisted == ["T000"]
+    assert db.scalars(select(ETF.delisted_at).where(ETF.ticker == "T000")).one() is None
+
+
+def test_apply_universe_guards_against_truncated_list(db):
+    tickers = _etfs(db, 20)
+    allowed = int(MAX_DELIST_RATIO * len(tickers))
+    # 허용 비율보다 많이 빠지면 목록 쪽 문제로 보고 아무것도 표시하지 않는다
+    diff = apply_universe(db, tickers[allowed + 1:], authoritative=True)
+    assert diff.delisted == []
+    assert db.scalars(select(ETF).where(ETF.delisted_at.isnot(None))).all() == []
+
+    diff = apply_universe(db, tickers[allowed:], authoritative=True)
+    assert diff.delisted == tickers[:allowed]
+
+
+def test_apply_universe_fallback_list_never_delists(db):
+    tickers = _etfs(db, 20)
+    assert apply_universe(db, tickers[1:], authoritative=False).delisted == []
+
@@ -9,18 +9,42 @@ interface Message {
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL ?? "http://localhost:8000";
 
-async function sendChat(messages: Message[]): Promise<string> {
-  const res = await fetch(`${API_BASE}/api/chat`, {
+/** /api/chat/stream의 SSE 응답을 읽어 token이 도착할 때마다 onDelta를 호출 */
+async function streamChat(messages: Message[], onDelta: (delta: string) => void): Promise<void> {
+  const res = await fetch(`${API_BASE}/api/chat/stream`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
     body: JSON.stringify({ messages }),
   });
-  if (!res.ok) {
+  if (!res.ok || !res.body) {
     const err = await res.json().catch(() => ({}));
     throw new Error(err.detail ?? "요청 실패");
   }
-  const data = await res.json();
-  return data.message as string;
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary: number;
+    while ((boundary = buffer.indexOf("\n\n")) >= 0) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      const payload = data ? JSON.parse(data) : {};
+      if (event === "error") throw new Error(payload.detail ?? "요청 실패");
+      if (event === "done") return;
+      if (payload.delta) onDelta(payload.delta);
+    }
+  }
 }
 
 export default function ChatBot() {
@@ -52,15 +76,19 @@ export default function ChatBot() {
     setInput("");
     setLoading(true);
 
+    let reply = "";
     try {
-      const reply = await sendChat(next);
-      setMessages([...next, { role: "assistant", content: reply }]);
+      await streamChat(next, (delta) => {
+        reply += delta;
+        setMessages([...next, { role: "assistant", content: reply }]);
+      });
     } catch (e) {
+      const error = `오류가 발생했습니다: ${e instanceof Error ? e.message : "알 수 없는 오류"}`;
       setMessages([
         ...next,
         {
           role: "assistant",
-          content: `오류가 발생했습니다: ${e instanceof Error ? e.message : "알 수 없는 오류"}`,
+          content: reply ? `${reply}\n\n${error}` : error,
         },
       ]);
     } finally {
@@ -116,7 +144,8 @@ export default function ChatBot() {
                 </div>
               </div>
             ))}
-            {loading && (
+            {/* 첫 token이 도착하기 전까지만 표시 */}
+            {loading && messages[messages.length - 1]?.role === "user" && (
               <div className="flex justify-start">
                 <div className="bg-white border border-gray-200 rounded-2xl rounded-bl-sm px-3 py-2 shadow-sm">
                   <span className="inline-flex gap-1">
@@ -0,0 +1,23 @@
+"use client";
+
+import { useState, type ReactNode } from "react";
+import { useQuery } from "@tanstack/react-query";
+import { fetchEtf } from "@/lib/api";
+import Tooltip from "./Tooltip";
+
+// 목록 응답에는 description이 없으므로 tooltip을 처음 열 때 상세 조회로 가져온다
+export default function EtfDescription({ ticker, children }: { ticker: string; children: ReactNode }) {
+  const [open, setOpen] = useState(false);
+  const { data } = useQuery({
+    queryKey: ["etf", ticker],
+    queryFn: () => fetchEtf(ticker),
+    enabled: open,
+    staleTime: 30 * 60 * 1000,
+  });
+
+  return (
+    <Tooltip content={data?.description} onOpenChange={setOpen}>
+      {children}
+    </Tooltip>
+  );
+}
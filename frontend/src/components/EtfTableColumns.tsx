@@ -11,6 +11,7 @@ import {
   formatVolume,
   returnColor,
 } from "@/lib/formatters";
+import EtfDescription from "./EtfDescription";
 import Tooltip from "./Tooltip";
 import { ExternalLink, Globe } from "lucide-react";
 
@@ -72,11 +73,10 @@ export const columns = [
     enableSorting: true,
     cell: (info) => {
       const name = info.getValue();
-      const description = info.row.original.description;
       return (
-        <Tooltip content={description}>
+        <EtfDescription ticker={info.row.original.ticker}>
           {name ?? "--"}
-        </Tooltip>
+        </EtfDescription>
       );
     },
   }),
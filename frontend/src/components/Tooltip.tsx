@@ -6,26 +6,30 @@ import { type ReactNode } from "react";
 interface TooltipProps {
   children: ReactNode;
   content: string | null | undefined;
+  // 내용을 열 때 불러오는 경우: content가 아직 없어도 trigger를 유지
+  onOpenChange?: (open: boolean) => void;
 }
 
-export default function Tooltip({ children, content }: TooltipProps) {
-  if (!content) return <>{children}</>;
+export default function Tooltip({ children, content, onOpenChange }: TooltipProps) {
+  if (!content && !onOpenChange) return <>{children}</>;
 
   return (
     <TooltipPrimitive.Provider delayDuration={300}>
-      <TooltipPrimitive.Root>
+      <TooltipPrimitive.Root onOpenChange={onOpenChange}>
         <TooltipPrimitive.Trigger asChild>
           <span className="cursor-help inline-block">{children}</span>
         </TooltipPrimitive.Trigger>
-        <TooltipPrimitive.Portal>
-          <TooltipPrimitive.Content
-            className="z-50 max-w-md rounded-lg bg-gray-900 px-3 py-2 text-sm text-white shadow-lg animate-in fade-in-0 zoom-in-95"
-            sideOffset={5}
-          >
-            {content}
-            <TooltipPrimitive.Arrow className="fill-gray-900" />
-          </TooltipPrimitive.Content>
-        </TooltipPrimitive.Portal>
+        {content && (
+          <TooltipPrimitive.Portal>
+            <TooltipPrimitive.Content
+              className="z-50 max-w-md rounded-lg bg-gray-900 px-3 py-2 text-sm text-white shadow-lg animate-in fade-in-0 zoom-in-95"
+              sideOffset={5}
+            >
+              {content}
+              <TooltipPrimitive.Arrow className="fill-gray-900" />
+            </TooltipPrimitive.Content>
+          </TooltipPrimitive.Portal>
+        )}
       </TooltipPrimitive.Root>
     </TooltipPrimitive.Provider>
   );
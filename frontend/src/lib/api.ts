@@ -1,4 +1,4 @@
-import type { ETFListResponse, FilterOptions } from "@/types/etf";
+import type { ETF, ETFColumnarResponse, ETFListResponse, FilterOptions } from "@/types/etf";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000";
 
@@ -8,8 +8,33 @@ async function fetchJSON<T>(path: string): Promise<T> {
   return res.json();
 }
 
-export function fetchAllEtfs(): Promise<ETFListResponse> {
-  return fetchJSON<ETFListResponse>("/api/etfs?per_page=0");
+// 목록 테이블에 필요한 필드만 columnar 형식으로 받는다.
+// description은 길어서 제외하고 tooltip을 열 때 fetchEtf로 가져온다.
+const LIST_FIELDS = [
+  "ticker", "name", "issuer", "category", "underlying_index", "exchange",
+  "price", "volume", "market_cap", "net_assets", "inception_date",
+  "expense_ratio", "dividend_yield", "ex_dividend_date",
+  "return_1m", "return_1y", "return_3y", "return_3y_avg", "return_5y", "return_5y_avg",
+  "data_updated_at",
+];
+
+export async function fetchAllEtfs(): Promise<ETFListResponse> {
+  const data = await fetchJSON<ETFColumnarResponse>(
+    `/api/etfs?per_page=0&format=columnar&fields=${LIST_FIELDS.join(",")}`
+  );
+  const { columns } = data;
+  const items = data.rows.map((row) => {
+    const etf: Record<string, unknown> = {};
+    columns.forEach((c, i) => {
+      etf[c] = row[i];
+    });
+    return etf as unknown as ETF;
+  });
+  return { items, total: data.total };
+}
+
+export function fetchEtf(ticker: string): Promise<ETF | null> {
+  return fetchJSON<ETF | null>(`/api/etfs/${encodeURIComponent(ticker)}`);
 }
 
 export function fetchFilters(): Promise<FilterOptions> {
@@ -1,7 +1,8 @@
 export interface ETF {
   ticker: string;
   name: string | null;
-  description: string | null;
+  // 목록 응답(fetchAllEtfs)에는 없음. 상세 조회(fetchEtf)에만 포함
+  description?: string | null;
   issuer: string | null;
   category: string | null;
   underlying_index: string | null;
@@ -26,9 +27,19 @@ export interface ETF {
 export interface ETFListResponse {
   items: ETF[];
   total: number;
+  next_cursor?: string | null;
+}
+
+export interface ETFColumnarResponse {
+  columns: string[];
+  rows: unknown[][];
+  total: number;
+  next_cursor?: string | null;
 }
 
 export interface FilterOptions {
   categories: string[];
   issuers: string[];
+  category_counts: Record<string, number>;
+  issuer_counts: Record<string, number>;
 }
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""읽기 API 부하 벤치마크 — 기존 동기 handler(threadpool) vs. async handler.
+
+같은 DB를 쓰는 uvicorn 서버를 subprocess로 띄우고, 동시 연결 N개로 일정 시간 동안
+요청을 보내 초당 처리량과 지연 시간(p50/p99)을 비교합니다. 동기 경로는 이전의
+`def` + Session handler를 그대로 옮긴 것이고, async 경로는 app.routers.etfs의 실제
+endpoint입니다.
+
+사용:
+    cd backend && DATABASE_URL=sqlite:///data/etfmaster.db python ../scripts/bench_api_load.py
+    python scripts/bench_api_load.py --concurrency 200 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import SessionLocal, get_db  # noqa: E402
+from app.models.etf import ETF  # noqa: E402
+from app.routers.etfs import router as etfs_router  # noqa: E402
+from app.schemas.etf import ETFResponse, FilterOptions  # noqa: E402
+
+bench_app = FastAPI()
+bench_app.include_router(etfs_router)
+
+
+@bench_app.get("/sync/etfs/filters")
+def sync_filters(db: Session = Depends(get_db)):
+    categories = [
+        r[0]
+        for r in db.query(ETF.category).filter(ETF.category.isnot(None)).distinct().order_by(ETF.category).all()
+    ]
+    issuers = [
+        r[0]
+        for r in db.query(ETF.issuer).filter(ETF.issuer.isnot(None)).distinct().order_by(ETF.issuer).all()
+    ]
+    return FilterOptions(categories=categories, issuers=issuers)
+
+
+@bench_app.get("/sync/etfs/{ticker}")
+def sync_etf(ticker: str, db: Session = Depends(get_db)):
+    etf = db.query(ETF).filter(func.upper(ETF.ticker) == ticker.upper()).first()
+    if not etf:
+        return None
+    return ETFResponse.model_validate(etf)
+
+
+async def _load(url_for, concurrency: int, duration: float) -> tuple[int, list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    r = await client.get(url_for())
+                    r.raise_for_status()
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return len(latencies), latencies, errors
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _wait_ready(base: str, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(f"{base}/api/etfs/filters", timeout=2)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동기 vs async 읽기 API 부하 비교")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=5.0, help="endpoint별 측정 시간 (초)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+
+        uvicorn.run(bench_app, host="127.0.0.1", port=args.port, log_level="warning")
+        return
+
+    with SessionLocal() as db:
+        tickers = [t for (t,) in db.query(ETF.ticker).limit(2000)]
+    if not tickers:
+        sys.exit("DB에 ETF가 없습니다. sync 후 다시 실행하세요.")
+
+    base = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", "--port", str(args.port)],
+        env=os.environ.copy(),
+    )
+    try:
+        _wait_ready(base)
+        cases = [
+            ("filters", "sync", lambda: f"{base}/sync/etfs/filters"),
+            ("filters", "async", lambda: f"{base}/api/etfs/filters"),
+            ("etf detail", "sync", lambda: f"{base}/sync/etfs/{random.choice(tickers)}"),
+            ("etf detail", "async", lambda: f"{base}/api/etfs/{random.choice(tickers)}"),
+        ]
+        print(f"concurrency={args.concurrency}, duration={args.duration}s per case, {len(tickers)} tickers\n")
+        print(f"{'endpoint':<12} {'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for name, mode, url_for in cases:
+            asyncio.run(_load(url_for, args.concurrency, 1.0))  # warm-up
+            count, latencies, errors = asyncio.run(_load(url_for, args.concurrency, args.duration))
+            print(
+                f"{name:<12} {mode:<6} {count / args.duration:>9.0f} "
+                f"{_percentile(latencies, 0.5) * 1000:>9.1f} {_percentile(latencies, 0.99) * 1000:>9.1f} {errors:>7}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""수익률 계산 벤치마크 — 기존 ticker별 루프 vs. 벡터화(app.services.returns).
+
+합성 종가 행렬(영업일 × ticker, 상장일/결측 포함)로 두 구현의 결과가 같은지
+확인하고 실행 시간을 비교합니다.
+
+사용:
+    python scripts/bench_returns.py                 # 4,000 / 40,000 tickers
+    python scripts/bench_returns.py --tickers 4000 --days 1300
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from app.services.returns import HORIZONS, horizon_returns  # noqa: E402
+
+
+def loop_returns(close: pd.DataFrame) -> dict[str, dict]:
+    """기존 compute_returns의 ticker별 계산."""
+    results = {}
+    now = close.index[-1]
+    for t in close.columns:
+        series = close[t].dropna()
+        if len(series) < 2:
+            continue
+        current = series.iloc[-1]
+        r = {}
+        for key, days in HORIZONS:
+            idx = series.index[series.index >= now - pd.Timedelta(days=days)]
+            if len(idx) > 0:
+                p = series.loc[idx[0]]
+                r[key] = round(float(((current - p) / p) * 100), 2)
+        if r:
+            results[t] = r
+    return results
+
+
+def make_matrix(n_tickers: int, n_days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2026-10-16", periods=n_days)
+    log_ret = rng.normal(0.0003, 0.012, size=(n_days, n_tickers)).astype(np.float64)
+    values = 100 * np.exp(np.cumsum(log_ret, axis=0))
+    # 신규 상장(앞부분 결측), 거래정지(중간 결측), 상장폐지(뒷부분 결측)
+    listed = rng.integers(0, n_days, size=n_tickers)
+    listed[rng.random(n_tickers) < 0.7] = 0
+    values[np.arange(n_days)[:, None] < listed[None, :]] = np.nan
+    values[rng.random((n_days, n_tickers)) < 0.01] = np.nan
+    delisted = rng.random(n_tickers) < 0.02
+    values[-20:, delisted] = np.nan
+    return pd.DataFrame(values, index=dates, columns=[f"T{i:05d}" for i in range(n_tickers)])
+
+
+def bench(fn, close: pd.DataFrame, repeat: int) -> tuple[float, dict]:
+    best = float("inf")
+    result = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(close)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, nargs="+", default=[4000, 40000])
+    parser.add_argument("--days", type=int, default=1300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'tickers':>8} {'loop (s)':>10} {'vectorized (s)':>15} {'speedup':>8}  identical")
+    for n in args.tickers:
+        close = make_matrix(n, args.days)
+        loop_time, expected = bench(loop_returns, close, 1)
+        vec_time, got = bench(horizon_returns, close, args.repeat)
+        print(f"{n:>8} {loop_time:>10.3f} {vec_time:>15.4f} {loop_time / vec_time:>7.0f}x  {got == expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""ETF 목록 직렬화 벤치마크 — ORM + Pydantic 검증 vs. Core tuple + orjson.
+
+임시 SQLite DB에 합성 ETF row(긴 description, 지수 표기 float, NULL, 마이크로초
+datetime 포함)를 만들고 snapshot이 쓰는 두 직렬화 경로의 처리량(rows/sec)을
+비교합니다. 두 경로의 결과가 바이트 단위로 같은지도 확인하며, 다르면 종료 코드 1.
+
+    before  db.query(ETF) → ETFResponse.model_validate → model_dump → json.dumps (이전 _build)
+    after   select(columns) row tuple → etf_encoder.encode_rows (현재 _build)
+
+사용:
+    python scripts/bench_serialization.py                  # 4,000 / 50,000 rows
+    python scripts/bench_serialization.py --rows 4000 --repeat 5
+"""
+
+import argparse
+import random
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.models.etf import ETF  # noqa: E402
+from app.schemas.etf import ETFResponse  # noqa: E402
+from app.services import etf_encoder  # noqa: E402
+from app.services.etf_encoder import ROWS_QUERY, encode_rows, render_json  # noqa: E402
+
+_TABLE = ETF.__table__
+
+
+def _maybe(rng: random.Random, value, p: float = 0.1):
+    return None if rng.random() < p else value
+
+
+def _populate(engine, rows: int) -> None:
+    _TABLE.metadata.create_all(engine, tables=[_TABLE])
+    rng = random.Random(rows)
+    words = ["equity", "bond", "índice", "배당", "growth", "value", "\"quoted\"", "tab\tsep", "선진국"]
+    base = datetime(2024, 1, 1)
+    records = []
+    for i in range(rows):
+        records.append({
+            "ticker": "".join(rng.choices(string.ascii_uppercase, k=3)) + str(i),
+            "name": f"Fund {i} {rng.choice(words)}",
+            "description": _maybe(rng, " ".join(rng.choices(words, k=rng.randint(20, 300)))[:2048], 0.2),
+            "issuer": _maybe(rng, f"Issuer {i % 40}"),
+            "category": _maybe(rng, f"Category {i % 60}"),
+            "underlying_index": _maybe(rng, f"Index {i % 300}", 0.4),
+            "exchange": rng.choice(["PCX", "NMS", "BTS", None]),
+            "price": _maybe(rng, round(rng.uniform(1, 600), 2)),
+            "volume": _maybe(rng, rng.randint(0, 10**8)),
+            "market_cap": _maybe(rng, rng.randint(10**5, 10**12)),
+            "net_assets": _maybe(rng, rng.randint(10**5, 10**12)),
+            "inception_date": _maybe(rng, rng.randint(6 * 10**8, 17 * 10**8)),
+            # 1e-05 같은 지수 표기 값(표준 json 경로)이 일부 섞이도록
+            "expense_ratio": _maybe(rng, rng.uniform(0, 1e-4) if rng.random() < 0.01 else rng.uniform(0, 0.01)),
+            "dividend_yield": _maybe(rng, rng.choice([0.0, rng.uniform(0, 10)])),
+            "ex_dividend_date": _maybe(rng, rng.randint(6 * 10**8, 17 * 10**8), 0.5),
+            "return_1m": _maybe(rng, rng.gauss(0, 5)),
+            "return_1y": _maybe(rng, rng.gauss(8, 20)),
+            "return_3y": _maybe(rng, rng.gauss(20, 30), 0.3),
+            "return_3y_avg": _maybe(rng, rng.gauss(6, 8), 0.3),
+            "return_5y": _maybe(rng, rng.gauss(35, 40), 0.4),
+            "return_5y_avg": _maybe(rng, rng.gauss(7, 8), 0.4),
+            "data_updated_at": _maybe(rng, base + timedelta(
+                seconds=rng.randint(0, 10**7),
+                microseconds=rng.choice([0, rng.randint(1, 999999)]),
+            )),
+        })
+    with engine.begin() as conn:
+        for i in range(0, len(records), 5000):
+            conn.execute(insert(_TABLE), records[i : i + 5000])
+
+
+def _before(session: Session) -> list[bytes]:
+    items = sorted((ETFResponse.model_validate(e) for e in session.query(ETF).all()), key=lambda e: e.ticker)
+    return [render_json(e.model_dump(mode="json")) for e in items]
+
+
+def _after(session: Session) -> list[bytes]:
+    rows_json, _ = encode_rows(sorted(session.execute(ROWS_QUERY).all(), key=lambda e: e.ticker))
+    return rows_json
+
+
+def _best(fn, engine, repeat: int) -> tuple[float, list[bytes]]:
+    best, result = float("inf"), []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            result = fn(session)
+            best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(rows: int, repeat: int) -> bool:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        _populate(engine, rows)
+        before, expected = _best(_before, engine, repeat)
+        after, actual = _best(_after, engine, repeat)
+        engine.dispose()
+
+    identical = actual == expected
+    print(f"\n{rows:,} rows (orjson {'on' if etf_encoder.orjson else 'off'}, best of {repeat})")
+    for name, seconds in (("before", before), ("after", after)):
+        print(f"  {name:<7} {seconds * 1000:>9.1f} ms   {rows / seconds:>12,.0f} rows/sec")
+    print(f"  speedup {before / after:.1f}x, byte-identical: {identical}")
+    if not identical:
+        diff = next(i for i, (a, b) in enumerate(zip(expected, actual)) if a != b)
+        print(f"  first mismatch at row {diff}:\n    {expected[diff][:300]!r}\n    {actual[diff][:300]!r}")
+    return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETF 목록 직렬화 경로 비교")
+    parser.add_argument("--rows", type=int, nargs="*", default=[4000, 50_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    ok = all([run(rows, args.repeat) for rows in args.rows])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
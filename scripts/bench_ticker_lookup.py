@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""ETF 상세 조회 벤치마크 — upper(ticker) 전체 스캔 vs. 식 index vs. snapshot dict.
+
+임시 SQLite DB에 합성 ETF row를 만들고 같은 ticker들을 네 가지 방법으로 조회합니다.
+
+    scan      기존 get_etf: upper(ticker) = ?, 식 index 없음 (전체 스캔)
+    expr      같은 쿼리 + ix_etfs_ticker_upper (migration 1)
+    exact     정규화된 ticker = ? (unique index)
+    snapshot  in-process dict → 미리 직렬화된 JSON (현재 get_etf, DB 조회 없음)
+
+사용:
+    python scripts/bench_ticker_lookup.py                  # 4,000 / 100,000 rows
+    python scripts/bench_ticker_lookup.py --rows 4000 --lookups 2000
+"""
+
+import argparse
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
+
+from sqlalchemy import create_engine, func, insert, select, text  # noqa: E402
+
+from app.models.etf import ETF  # noqa: E402
+
+_TABLE = ETF.__table__
+
+
+def _tickers(n: int) -> list[str]:
+    rng = random.Random(n)
+    seen: set[str] = set()
+    while len(seen) < n:
+        seen.add("".join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 5))) + str(rng.randint(0, 99)))
+    return sorted(seen)
+
+
+def _populate(engine, tickers: list[str]) -> None:
+    _TABLE.metadata.create_all(engine, tables=[_TABLE])
+    rows = [
+        {"ticker": t, "name": f"{t} Fund", "category": "Large Blend", "price": 100.0 + i % 50}
+        for i, t in enumerate(tickers)
+    ]
+    with engine.begin() as conn:
+        for i in range(0, len(rows), 5000):
+            conn.execute(insert(_TABLE), rows[i : i + 5000])
+
+
+def _time_queries(engine, stmt_for, keys: list[str]) -> float:
+    with engine.connect() as conn:
+        started = time.perf_counter()
+        for key in keys:
+            conn.execute(stmt_for(key)).first()
+        return (time.perf_counter() - started) / len(keys)
+
+
+def _plan(engine, sql: str) -> str:
+    with engine.connect() as conn:
+        return "; ".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+def run(rows: int, lookups: int) -> None:
+    tickers = _tickers(rows)
+    rng = random.Random(0)
+    keys = [rng.choice(tickers).lower() for _ in range(lookups)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        _populate(engine, tickers)
+
+        by_upper = select(_TABLE).where(func.upper(_TABLE.c.ticker) == text(":t"))
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_etfs_ticker_upper"))
+        scan_plan = _plan(engine, "SELECT * FROM etfs WHERE upper(ticker) = 'SPY'")
+        scan = _time_queries(engine, lambda k: by_upper.params(t=k.upper()), keys[: max(50, lookups // 20)])
+
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX ix_etfs_ticker_upper ON etfs (upper(ticker))"))
+        expr_plan = _plan(engine, "SELECT * FROM etfs WHERE upper(ticker) = 'SPY'")
+        expr = _time_queries(engine, lambda k: by_upper.params(t=k.upper()), keys)
+
+        exact = _time_queries(engine, lambda k: select(_TABLE).where(_TABLE.c.ticker == k.upper()), keys)
+
+        with engine.connect() as conn:
+            rendered = {r.ticker: repr(tuple(r)).encode() for r in conn.execute(select(_TABLE))}
+        by_ticker = {t.upper(): i for i, t in enumerate(rendered)}
+        rows_json = list(rendered.values())
+        started = time.perf_counter()
+        for key in keys:
+            i = by_ticker.get(key.strip().upper())
+            _ = rows_json[i] if i is not None else b"null"
+        snapshot = (time.perf_counter() - started) / len(keys)
+        engine.dispose()
+
+    print(f"\n{rows:,} rows")
+    print(f"  plan without expr index: {scan_plan}")
+    print(f"  plan with expr index:    {expr_plan}")
+    for name, seconds in (("scan", scan), ("expr", expr), ("exact", exact), ("snapshot", snapshot)):
+        print(f"  {name:<9} {seconds * 1e6:>10.1f} µs/lookup   ({scan / seconds:>8.0f}x vs scan)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETF ticker 조회 방식 비교")
+    parser.add_argument("--rows", type=int, nargs="*", default=[4000, 100_000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    for rows in args.rows:
+        run(rows, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""OpenAI 호환 mock LLM 서버 — /api/chat, /api/chat/stream 로컬 테스트용.
+
+POST /v1/chat/completions 만 구현합니다. 마지막 사용자 메시지를 인용한 고정 답변을
+돌려주며, stream=true면 단어 단위로 --delay 간격을 두고 SSE chunk를 보냅니다.
+
+사용:
+    python scripts/mock_llm_server.py --port 8001 --delay 0.05
+    OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=test uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Mock LLM")
+app.state.delay = 0.0
+
+
+def _reply(body: dict) -> str:
+    question = next(
+        (m["content"] for m in reversed(body.get("messages", [])) if m.get("role") == "user"),
+        "",
+    )
+    system = next((m["content"] for m in body.get("messages", []) if m.get("role") == "system"), "")
+    etf_lines = sum(1 for line in system.splitlines() if line.startswith("["))
+    return f"[mock] '{question}'에 대한 답변입니다. 참고한 ETF {etf_lines}개. 투자에는 원금 손실 위험이 있습니다."
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason: str | None = None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "mock")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    text = _reply(body)
+    delay = request.app.state.delay
+
+    if not body.get("stream"):
+        await asyncio.sleep(delay * len(text.split()))
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    async def events():
+        yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+        for i, word in enumerate(text.split(" ")):
+            await asyncio.sleep(delay)
+            yield _chunk(completion_id, model, {"content": word if i == 0 else " " + word})
+        yield _chunk(completion_id, model, {}, finish_reason="stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI 호환 mock LLM 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.05, help="token 사이 지연 (초)")
+    args = parser.parse_args()
+    app.state.delay = args.delay
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
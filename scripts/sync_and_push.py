@@ -16,7 +16,6 @@ import asyncio
 import logging
 import os
 import sys
-from datetime import datetime, timezone
 from pathlib import Path
 
 # ── 1. DATABASE_URL 을 SSL 포함으로 정규화 (app 모듈 임포트 전에 수행) ──
@@ -41,12 +40,14 @@ os.environ["DATABASE_URL"] = _db_url
 # ── 2. backend/ 경로 추가 후 app 모듈 임포트 ──
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))
 
-from sqlalchemy.orm import Session  # noqa: E402
-
 from app.database import Base, SessionLocal, engine  # noqa: E402
-from app.models.etf import ETF  # noqa: E402
+from app.migrations import run_migrations  # noqa: E402
+from app.models.sync import SyncRun  # noqa: E402
 from app.services.etf_data_fetcher import compute_returns, fetch_etf_batch  # noqa: E402
-from app.services.etf_list_provider import fetch_etf_tickers  # noqa: E402
+from app.services.etf_list_provider import close_http_client, load_universe  # noqa: E402
+from app.services.etf_upsert import bulk_upsert_etfs, existing_tickers, mark_checked  # noqa: E402
+from app.services.fetch_engine import FetchStats  # noqa: E402
+from app.services.sync_state import apply_universe, finish_run, record_batch, start_run  # noqa: E402
 
 logging.basicConfig(
     level=logging.INFO,
@@ -54,51 +55,62 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-SYNC_BATCH_SIZE = 50     # yfinance 요청 배치 크기
-BATCH_DELAY_SECONDS = 5  # 배치 간 딜레이
+SYNC_BATCH_SIZE = 50     # yfinance 요청 배치 크기 (속도 제한은 FETCH_RATE_LIMIT_PER_SEC)
 DB_WRITE_EVERY = 200     # 몇 건마다 DB flush 할지
 
-_ETF_COLS = {c.key for c in ETF.__table__.columns} - {"id", "created_at"}
+
+def upsert_batch(run_id: int, cursor: int, attempted: list[str], records: list[dict]) -> int:
+    """ETF upsert와 ticker 상태/run checkpoint를 한 트랜잭션으로 커밋 (서버 sync와 같은 기록)."""
+    succeeded = {data["ticker"] for data in records}
+    failed = set(attempted) - succeeded
+    with SessionLocal() as session:
+        result = bulk_upsert_etfs(session, records, changed_only=True)
+        mark_checked(session, succeeded)
+        record_batch(session, session.get(SyncRun, run_id), cursor, succeeded, failed, result.total)
+        session.commit()
+    logger.info("upsert: 신규 %d건, 갱신 %d건, 변경 없음 %d건", result.inserted, result.updated, result.unchanged)
+    return result.total
 
 
-def upsert_batch(session: Session, records: list[dict]) -> int:
-    count = 0
-    for data in records:
-        if not data.get("ticker"):
-            continue
-        row = {k: v for k, v in data.items() if k in _ETF_COLS}
-        etf = session.query(ETF).filter(ETF.ticker == row["ticker"]).first()
-        if etf:
-            for k, v in row.items():
-                if v is not None:
-                    setattr(etf, k, v)
-        else:
-            session.add(ETF(**row))
-        count += 1
-    return count
+def finish(run_id: int, status: str, message: str) -> None:
+    with SessionLocal() as session:
+        finish_run(session, session.get(SyncRun, run_id), status, message)
 
 
 async def main() -> None:
     # DB 연결 확인 및 테이블 생성
     try:
         Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
         logger.info("DB 연결 성공 (URL: %s)", _db_url.split("@")[-1])
     except Exception as e:
         logger.error("DB 연결 실패: %s", e)
         sys.exit(1)
 
     logger.info("ETF 티커 목록 가져오는 중...")
-    tickers = await fetch_etf_tickers()
-    logger.info("총 %d개 티커 확인", len(tickers))
+    universe = await load_universe()
+    await close_http_client()
+    logger.info("총 %d개 티커 확인 (source: %s)", len(universe.tickers), universe.source)
+    # 상장 폐지 표시를 반영하고, 새로 상장된 티커부터 처리
+    with SessionLocal() as session:
+        diff = apply_universe(session, universe.tickers, universe.authoritative)
+    added = set(diff.added)
+    tickers = diff.added + [t for t in universe.tickers if t not in added]
+    with SessionLocal() as session:
+        run_id = start_run(session, tickers).id
 
     pending: list[dict] = []
+    attempted: list[str] = []
     total_written = 0
+    stats = FetchStats()
 
     for i in range(0, len(tickers), SYNC_BATCH_SIZE):
         batch = tickers[i: i + SYNC_BATCH_SIZE]
         logger.info("배치 처리 중: %d-%d / %d", i, i + len(batch), len(tickers))
 
-        etf_data_list = await asyncio.to_thread(fetch_etf_batch, batch)
+        with SessionLocal() as session:
+            known = existing_tickers(session, batch)
+        etf_data_list = await asyncio.to_thread(fetch_etf_batch, batch, stats, known)
         returns = await asyncio.to_thread(compute_returns, batch)
 
         for data in etf_data_list:
@@ -106,34 +118,33 @@ async def main() -> None:
             if t in returns:
                 data.update(returns[t])
             pending.append(data)
+        attempted.extend(batch)
 
         if len(pending) >= DB_WRITE_EVERY:
             try:
-                with SessionLocal() as session:
-                    n = upsert_batch(session, pending)
-                    session.commit()
+                n = upsert_batch(run_id, i + len(batch), attempted, pending)
                 total_written += n
                 logger.info("DB 저장: %d건 (누적 %d건)", n, total_written)
             except Exception as e:
                 logger.error("DB 저장 실패: %s", e, exc_info=True)
+                finish(run_id, "failed", f"DB error: {e}")
                 sys.exit(1)
             pending = []
+            attempted = []
 
-        if i + SYNC_BATCH_SIZE < len(tickers):
-            await asyncio.sleep(BATCH_DELAY_SECONDS)
-
-    if pending:
+    if attempted:
         try:
-            with SessionLocal() as session:
-                n = upsert_batch(session, pending)
-                session.commit()
+            n = upsert_batch(run_id, len(tickers), attempted, pending)
             total_written += n
             logger.info("DB 저장 (최종): %d건 (누적 %d건)", n, total_written)
         except Exception as e:
             logger.error("DB 저장 실패: %s", e, exc_info=True)
+            finish(run_id, "failed", f"DB error: {e}")
             sys.exit(1)
 
+    finish(run_id, "completed", f"Synced {len(tickers)} tickers, {total_written} rows written")
     logger.info("완료. 총 %d건 저장.", total_written)
+    logger.info("요청 통계: %s", stats.summary())
 
 
 if __name__ == "__main__":